@@ -0,0 +1,343 @@
+"""
+Stage-level benchmarks with regression thresholds.
+
+Every stage of the pipeline is timed in isolation against fixed inputs. The first
+run (or --update-baseline) stores the results as the baseline; later runs fail
+with exit code 1 when a stage gets slower than the baseline by more than the
+tolerance. Stages whose dependencies are missing (mediapipe, a display for Tk)
+are reported as skipped.
+
+    python benchmarks/bench_stages.py
+    python benchmarks/bench_stages.py --update-baseline
+    python benchmarks/bench_stages.py --tolerance 0.5 --stage oscillator
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCE = 0.25
+REPEATS = 7
+MIN_REPEAT_TIME = 0.05
+FRAME_COUNT = 30
+
+STAGES: Dict[str, Callable] = {}
+
+
+class SkipStage(Exception):
+    """Raised by a stage setup when its dependencies are not available."""
+
+
+def stage(name: str) -> Callable:
+    """
+    Register a stage setup function under a name.
+
+    A setup function receives the input frames and returns the callable to time.
+    """
+    def register(setup: Callable) -> Callable:
+        STAGES[name] = setup
+        return setup
+    return register
+
+def load_frames(spec: Optional[str], count: int = FRAME_COUNT) -> List[np.ndarray]:
+    """
+    Load the fixed frame set: the frames of a source, or deterministic synthetic frames.
+    """
+    from frame_sources import SyntheticSource, open_frame_source
+
+    source = open_frame_source(spec, realtime=False) if spec else SyntheticSource(realtime=False)
+    frames = []
+    while len(frames) < count:
+        success, frame = source.read()
+        if not success:
+            break
+        frames.append(source.flip_horizontal(frame))
+    source.release()
+    return frames
+
+def tk_root():
+    """
+    Create a hidden Tk root, or skip when there is no display.
+    """
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise SkipStage(f"no display: {e}")
+    root.withdraw()
+    return root
+
+def cycle(items: List) -> Callable:
+    """
+    Return a function giving the items in turn, forever.
+    """
+    state = {"index": 0}
+    def next_item():
+        item = items[state["index"] % len(items)]
+        state["index"] += 1
+        return item
+    return next_item
+
+
+@stage("hand_tracking.process_image")
+def bench_process_image(frames):
+    try:
+        import mediapipe_utils
+    except ImportError as e:
+        raise SkipStage(f"mediapipe not available: {e}")
+    import hand_tracking
+    hand_detector, drawing_utils, connections_draw_spec = mediapipe_utils.init_mediapipe()
+    next_frame = cycle(frames)
+    return lambda: hand_tracking.process_image(next_frame().copy(), hand_detector, drawing_utils, connections_draw_spec)
+
+@stage("hand_tracking.process_landmarks")
+def bench_process_landmarks(frames):
+    import hand_tracking
+    from frame_sources import SyntheticSource
+    landmarks = SyntheticSource().landmarks_at(0)
+    next_frame = cycle(frames)
+    return lambda: hand_tracking.process_landmarks(next_frame().copy(), landmarks, ["Right", "Left"])
+
+@stage("motion_gate.MotionGate.should_infer")
+def bench_motion_gate(frames):
+    from motion_gate import MotionGate
+    from frame_sources import SyntheticSource
+    gate = MotionGate()
+    landmarks = SyntheticSource().landmarks_at(0)
+    next_frame = cycle(frames)
+    return lambda: gate.should_infer(next_frame(), landmarks)
+
+@stage("oscillator.create_sine_wave")
+def bench_create_sine_wave(frames):
+    import oscillator
+    return lambda: oscillator.create_sine_wave(440, oscillator.BLOCK_SIZE / oscillator.SAMPLE_RATE, 50)
+
+@stage("oscillator.StreamingOscillator.render_block")
+def bench_render_block(frames):
+    import oscillator
+    synth = oscillator.StreamingOscillator(waveform="saw")
+    frequencies = cycle(list(np.linspace(100, 1000, 50)))
+    def render():
+        synth.set_target(frequencies(), 60)
+        synth.render_block()
+    return render
+
+@stage("voices.PolyphonicOscillator.render_block")
+def bench_polyphonic_render_block(frames):
+    import voices
+    synth = voices.PolyphonicOscillator(max_voices=8)
+    synth.set_voices({slot: (110 * (slot + 1), 50) for slot in range(8)})
+    return synth.render_block
+
+@stage("effects.EffectsChain.process")
+def bench_effects_chain(frames):
+    import effects
+    import oscillator
+    chain = effects.create_effects_chain(effects.EFFECTS)
+    chain["vibrato"].set_depth(0.5)
+    chain["tremolo"].set_depth(0.5)
+    synth = oscillator.StreamingOscillator(waveform="saw")
+    synth.set_target(220, 60)
+    def process():
+        chain.process(synth.render_block())
+    return process
+
+@stage("smoothing.DataSmoother.smooth")
+def bench_data_smoother(frames):
+    from smoothing import DataSmoother
+    smoother = DataSmoother()
+    values = cycle(list(np.linspace(0, 100, 50)))
+    return lambda: smoother.smooth(values())
+
+@stage("smoothing.ParameterRamp.render")
+def bench_parameter_ramp(frames):
+    from smoothing import ParameterRamp
+    ramp = ParameterRamp(slew_rate=1500)
+    out = np.empty(512)
+    targets = cycle(list(np.linspace(100, 1000, 50)))
+    def render():
+        ramp.set_target(targets())
+        ramp.render(out)
+    return render
+
+@stage("smoothing.LandmarkFilter.update")
+def bench_landmark_filter(frames):
+    from smoothing import LandmarkFilter
+    landmark_filter = LandmarkFilter()
+    rng = np.random.default_rng(0)
+    hands = cycle([rng.random((2, 21, 3), dtype=np.float32) for _ in range(50)])
+    times = cycle(list(np.arange(50) / 30))
+    def update():
+        landmark_filter.update(hands(), ["Right", "Left"], times())
+        landmark_filter.predict(0.5)
+    return update
+
+@stage("midi.y_to_frequency")
+def bench_y_to_frequency(frames):
+    import midi
+    positions = cycle(list(np.linspace(0, 100, 50)))
+    return lambda: midi.y_to_frequency(positions())
+
+@stage("midi.PitchMap.frequency")
+def bench_pitch_map(frames):
+    import midi
+    pitch_map = midi.PitchMap(mode="soft", scale="major")
+    positions = cycle(list(np.linspace(0, 100, 50)))
+    return lambda: pitch_map.frequency(positions())
+
+@stage("pitch_detector.PitchDetector.detect")
+def bench_pitch_detector(frames):
+    from pitch_detector import PitchDetector
+    detector = PitchDetector()
+    t = np.arange(detector.frame_size) / detector.sample_rate
+    signals = cycle([4096 * np.sin(2 * np.pi * frequency * t) for frequency in (55, 220, 880)])
+    return lambda: detector.detect(signals())
+
+@stage("tuner.Tuner.frequency_to_note")
+def bench_frequency_to_note(frames):
+    from tuner import Tuner
+    tuner = Tuner()
+    frequencies = cycle(list(np.linspace(30, 1000, 50)))
+    return lambda: tuner.frequency_to_note(frequencies())
+
+@stage("tuner_canvas.TunerCanvas.draw_tuner")
+def bench_draw_tuner(frames):
+    from tuner_canvas import TunerCanvas
+    root = tk_root()
+    canvas = TunerCanvas(root, width=300, height=300)
+    canvas.pack()
+    root.update()
+    notes = cycle([(note, cents) for note in ("A", "C#") for cents in range(-50, 51, 7)])
+    return lambda: canvas.draw_tuner(*notes())
+
+@stage("gui.ThereminGUI.update_canvas")
+def bench_update_canvas(frames):
+    tk_root().destroy()  # Skip early without a display
+    from gui import ThereminGUI
+    theremin_gui = ThereminGUI(lambda *args, **kwargs: None, lambda: None)
+    theremin_gui.root.withdraw()
+    next_frame = cycle(frames)
+    def update():
+        theremin_gui.update_canvas(next_frame())
+        theremin_gui.root.update_idletasks()
+    return update
+
+
+def time_stage(function: Callable, repeats: int = REPEATS, min_repeat_time: float = MIN_REPEAT_TIME) -> Dict[str, float]:
+    """
+    Time a callable: calls per repeat are calibrated to last min_repeat_time.
+
+    :return: The median and minimum time per call in microseconds, and the calls per repeat.
+    """
+    function()  # Warm-up
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_repeat_time:
+            break
+        calls *= 2
+
+    timings = [elapsed / calls]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        timings.append((time.perf_counter() - start) / calls)
+    return {
+        "median_us": float(np.median(timings) * 1e6),
+        "min_us": float(np.min(timings) * 1e6),
+        "calls": calls,
+    }
+
+def run_benchmarks(names: List[str], frames: List[np.ndarray], repeats: int = REPEATS) -> Dict[str, Dict]:
+    """
+    Run the selected stages.
+
+    :return: The timings of each stage, or the reason it was skipped.
+    """
+    results = {}
+    for name in names:
+        try:
+            function = STAGES[name](frames)
+        except SkipStage as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        results[name] = time_stage(function, repeats)
+    return results
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    List the stages slower than their baseline by more than the tolerance.
+
+    The minimum time per call is compared, as it is the least sensitive to noise
+    from other processes.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if "min_us" not in result or not reference or "min_us" not in reference:
+            continue
+        limit = reference["min_us"] * (1 + tolerance)
+        if result["min_us"] > limit:
+            regressions.append(f"{name}: {result['min_us']:.1f} us > {limit:.1f} us (baseline {reference['min_us']:.1f} us)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time each theremin stage and compare with the baseline.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=None, help=f"allowed slowdown, 0.25 = 25%% (default: baseline's or {TOLERANCE})")
+    parser.add_argument("--frames", default=None, help="frame source for the image stages (default: synthetic frames)")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--stage", action="append", default=[], help="only run stages whose name contains this (repeatable)")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    names = [name for name in STAGES if not args.stage or any(part in name for part in args.stage)]
+    frames = load_frames(args.frames)
+    results = run_benchmarks(names, frames, args.repeats)
+
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<45} skipped ({result['skipped']})")
+        else:
+            print(f"{name:<45} {result['median_us']:>10.1f} us  (min {result['min_us']:.1f} us, {result['calls']} calls)")
+
+    report = {
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.platform()},
+        "stages": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        report["tolerance"] = args.tolerance if args.tolerance is not None else TOLERANCE
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", TOLERANCE)
+    regressions = compare(results, baseline.get("stages", {}), tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
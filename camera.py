@@ -1,16 +1,93 @@
+import threading
+import time
 import cv2
-from typing import Tuple, Union
+from typing import Optional, Tuple, Union
+from frame_sources import FrameSource, capture_frame_shape
 
-class Camera:
+class Camera(FrameSource):
     """Class representing a camera to capture images."""
     
-    def __init__(self, device_id: int = 0) -> None:
+    def __init__(self, device_id: int = 0, threaded: bool = False) -> None:
         """
         Initialize the camera with the specified device ID.
 
         :param device_id: Camera device ID (default: 0)
+        :param threaded: Whether to capture continuously in a background thread. (default: False)
         """
+        super().__init__(realtime=False)
         self.video_capture = cv2.VideoCapture(device_id)
+        self.fps = self.video_capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.threaded = threaded
+        self.dropped_frames = 0
+        self.captured_frames = 0
+        self._latest_frame = None
+        self._latest_timestamp = 0.0
+        self._latest_consumed = True
+        self._frame_ready = threading.Condition()
+        self._running = False
+        self._thread = None
+        if threaded:
+            self.start()
+
+    @property
+    def frame_shape(self) -> Optional[Tuple[int, int, int]]:
+        """
+        The shape of the frames the camera announces.
+        """
+        return capture_frame_shape(self.video_capture)
+
+    def start(self) -> None:
+        """
+        Start grabbing frames continuously in a background thread.
+
+        Only the newest frame is kept: a frame replaced before the consumer read it
+        is counted in dropped_frames. This overlaps capture with the processing of
+        the previous frame and keeps the driver queue from serving stale frames.
+        """
+        if self._running:
+            return
+        self.threaded = True
+        self._running = True
+        self._thread = threading.Thread(target=self._capture, name="camera-capture", daemon=True)
+        self._thread.start()
+
+    def _capture(self) -> None:
+        """
+        Grab frames into the latest-frame slot until the camera is released.
+        """
+        while self._running:
+            success, image = self.video_capture.read()
+            timestamp = time.perf_counter()
+            if not success:
+                time.sleep(0.005)
+                continue
+            with self._frame_ready:
+                if not self._latest_consumed:
+                    self.dropped_frames += 1
+                self._latest_frame = image
+                self._latest_timestamp = timestamp
+                self._latest_consumed = False
+                self.captured_frames += 1
+                self._frame_ready.notify()
+
+    def read_latest(self, timeout: Optional[float] = 1.0) -> Tuple[bool, Union[None, cv2.Mat], float]:
+        """
+        Return the newest captured frame, waiting for one if it was already read.
+
+        :param timeout: The maximum time to wait for a new frame in seconds, None to wait forever. (default: 1.0)
+        :return: Tuple (ret, image, timestamp), where timestamp is the time.perf_counter() time of the capture.
+        """
+        if not self.threaded:
+            success, image = self.video_capture.read()
+            return success, image, time.perf_counter()
+
+        with self._frame_ready:
+            if self._latest_consumed:
+                self._frame_ready.wait_for(lambda: not self._latest_consumed or not self._running, timeout)
+            if self._latest_consumed:
+                return False, None, 0.0
+            self._latest_consumed = True
+            return True, self._latest_frame, self._latest_timestamp
 
     def read(self) -> Tuple[bool, Union[None, cv2.Mat]]:
         """
@@ -18,23 +95,32 @@ class Camera:
 
         :return: Tuple (ret, image), where ret is a boolean indicating if the capture was successful and image is the captured image.
         """
+        if self.threaded:
+            success, image, _ = self.read_latest()
+            return success, image
         return self.video_capture.read()
 
-    def flip_horizontal(self, image: cv2.Mat) -> cv2.Mat:
+    def flip_horizontal(self, image: cv2.Mat, dst: Optional[cv2.Mat] = None) -> cv2.Mat:
         """
         Flip an image horizontally.
 
         :param image: Image to flip.
+        :param dst: Array of the same shape to write the flipped image to, if any. (default: None)
         :return: Horizontally flipped image.
         """
-        return cv2.flip(image, 1)
+        return cv2.flip(image, 1, dst=dst)
 
     def release(self) -> None:
         """
         Release the camera resources and destroy all opened windows.
         """
+        self._running = False
+        if self._thread is not None:
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+            self._thread.join()
+            self._thread = None
         self.video_capture.release()
-        cv2.destroyAllWindows()
         try:
             cv2.destroyAllWindows()
         except cv2.error as e:
@@ -0,0 +1,398 @@
+import socket
+import struct
+import threading
+import time
+from typing import Optional, Tuple
+import midi
+from latency import LatencyTracer
+
+MAX_SEND_RATE = 100.0
+OSC_ADDRESS = "/theremin"
+VOLUME_CONTROLLER = 7
+NOTE_VELOCITY = 100
+
+
+def _osc_string(value: str) -> bytes:
+    """
+    Encode an OSC string: null terminated and padded to a multiple of 4 bytes.
+
+    :param value: The string.
+    :return: The encoded bytes.
+    """
+    data = value.encode() + b"\0"
+    return data + b"\0" * (-len(data) % 4)
+
+def encode_osc_message(address: str, *arguments) -> bytes:
+    """
+    Encode an OSC message.
+
+    :param address: The OSC address pattern, such as "/theremin/control".
+    :param arguments: The arguments: floats are sent as float32 ("f"), ints as int32 ("i"),
+                      strings as "s", and (seconds,) tuples as float64 times ("d").
+    :return: The encoded message.
+    """
+    tags = ","
+    payload = b""
+    for argument in arguments:
+        if isinstance(argument, tuple):
+            tags += "d"
+            payload += struct.pack(">d", argument[0])
+        elif isinstance(argument, bool) or isinstance(argument, int):
+            tags += "i"
+            payload += struct.pack(">i", int(argument))
+        elif isinstance(argument, float):
+            tags += "f"
+            payload += struct.pack(">f", argument)
+        elif isinstance(argument, str):
+            tags += "s"
+            payload += _osc_string(argument)
+        else:
+            raise TypeError(f"Unsupported OSC argument {argument!r}")
+    return _osc_string(address) + _osc_string(tags) + payload
+
+def decode_osc_message(data: bytes) -> Tuple[str, list]:
+    """
+    Decode an OSC message encoded by encode_osc_message.
+
+    :param data: The encoded message.
+    :return: A tuple (address, arguments).
+    """
+    def read_string(offset):
+        end = data.index(b"\0", offset)
+        return data[offset:end].decode(), end + 1 + (-(end + 1) % 4)
+
+    address, offset = read_string(0)
+    tags, offset = read_string(offset)
+    arguments = []
+    for tag in tags[1:]:
+        if tag == "s":
+            value, offset = read_string(offset)
+        else:
+            fmt = {"f": ">f", "i": ">i", "d": ">d"}[tag]
+            value = struct.unpack_from(fmt, data, offset)[0]
+            offset += struct.calcsize(fmt)
+        arguments.append(value)
+    return address, arguments
+
+
+class UdpTransport:
+    """Datagrams to a UDP address, sent without blocking."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9000) -> None:
+        """
+        Open the socket.
+
+        :param host: The destination host. (default: "127.0.0.1")
+        :param port: The destination port. (default: 9000)
+        """
+        self.address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def send(self, data: bytes) -> None:
+        """
+        Send a datagram, dropping it if the socket buffer is full.
+
+        :param data: The datagram.
+        """
+        try:
+            self._socket.sendto(data, self.address)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass
+
+    def close(self) -> None:
+        """
+        Close the socket.
+        """
+        self._socket.close()
+
+
+class MidiPortTransport:
+    """Raw MIDI messages to a MIDI output port, through mido (optional dependency)."""
+
+    def __init__(self, port_name: Optional[str] = None, virtual: bool = False) -> None:
+        """
+        Open the MIDI port.
+
+        :param port_name: The name of the port, None for the default one. (default: None)
+        :param virtual: Whether to create a virtual port other software can connect to. (default: False)
+        """
+        # Imported here so that the rest of the module works without mido
+        try:
+            import mido
+        except ImportError as e:
+            raise ImportError("MIDI port output needs mido and python-rtmidi: pip install mido python-rtmidi") from e
+        self._mido = mido
+        self._port = mido.open_output(port_name, virtual=virtual)
+
+    def send(self, data: bytes) -> None:
+        """
+        Send a raw MIDI message.
+
+        :param data: The bytes of one message.
+        """
+        self._port.send(self._mido.Message.from_bytes(data))
+
+    def close(self) -> None:
+        """
+        Close the port.
+        """
+        self._port.close()
+
+
+class ControlOutput:
+    """
+    Base class of the sinks that send frequency and volume to other software.
+
+    update only stores the newest values and wakes a dedicated send thread, so the
+    caller never waits on the network or the MIDI port. The thread sends at most
+    max_rate times per second: values updated in between are coalesced, only the
+    newest being sent, and unchanged values are not sent again. The delay between
+    each update and its send, and the interval between sends, are recorded for
+    jitter measurements.
+    """
+
+    def __init__(self, transport, max_rate: float = MAX_SEND_RATE) -> None:
+        """
+        Initialize the sink.
+
+        :param transport: The object whose send(bytes) method delivers a message.
+        :param max_rate: The maximum number of sends per second. (default: 100)
+        """
+        self.transport = transport
+        self.min_interval = 1 / max_rate
+        self.tracer = LatencyTracer(enabled=True)
+        self.updates = 0
+        self.sends = 0
+        # (frequency, volume, timestamp, updated) not sent yet, swapped under _pending_lock
+        self._pending: Optional[Tuple[float, float, float, float]] = None
+        self._pending_lock = threading.Lock()
+        self._last_sent: Optional[Tuple[float, float]] = None
+        self._last_send_time = 0.0
+        self._wake = threading.Event()
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the send thread.
+        """
+        if self._running.is_set():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def update(self, frequency: float, volume: float, timestamp: Optional[float] = None) -> None:
+        """
+        Set the values to send, replacing those not sent yet.
+
+        :param frequency: The frequency in Hz, 0 or less for none.
+        :param volume: The volume, from 0 to 100.
+        :param timestamp: The time.perf_counter() time the values are from, such as the
+                          capture time of their frame. (default: now)
+        """
+        now = time.perf_counter()
+        with self._pending_lock:
+            self._pending = (frequency, volume, timestamp if timestamp is not None else now, now)
+            self.updates += 1
+        self._wake.set()
+
+    def _run(self) -> None:
+        """
+        Send the newest values whenever they change, at most max_rate times per second.
+        """
+        while self._running.is_set():
+            if not self._wake.wait(0.1):
+                continue
+            wait = self._last_send_time + self.min_interval - time.perf_counter()
+            if wait > 0:
+                # Updates arriving meanwhile replace the pending values
+                time.sleep(wait)
+            self._wake.clear()
+            self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        """
+        Send the values not sent yet, if any.
+        """
+        # Taken and cleared under the lock, so an update in between is not lost
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self.flush(*pending)
+
+    def flush(self, frequency: float, volume: float, timestamp: float, updated: Optional[float] = None) -> None:
+        """
+        Send values now, in the calling thread, unless they did not change.
+
+        :param frequency: The frequency in Hz, 0 or less for none.
+        :param volume: The volume, from 0 to 100.
+        :param timestamp: The time.perf_counter() time the values are from, sent with them.
+        :param updated: The time.perf_counter() time update was called with them. (default: timestamp)
+        """
+        if (frequency, volume) == self._last_sent:
+            return
+        self._send(frequency, volume, timestamp)
+        now = time.perf_counter()
+        self.tracer.record("update_to_send", now - (updated if updated is not None else timestamp))
+        self.tracer.record("source_to_send", now - timestamp)
+        if self._last_send_time:
+            self.tracer.record("send_interval", now - self._last_send_time)
+        self._last_send_time = now
+        self._last_sent = (frequency, volume)
+        self.sends += 1
+
+    def _send(self, frequency: float, volume: float, timestamp: float) -> None:
+        """
+        Encode and send values.
+
+        :param frequency: The frequency in Hz, 0 or less for none.
+        :param volume: The volume, from 0 to 100.
+        :param timestamp: The time.perf_counter() time the values are from.
+        """
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        """
+        Stop the send thread, send the values still pending and close the transport.
+        """
+        self._running.clear()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush_pending()
+        self._finish()
+        self.transport.close()
+
+    def _finish(self) -> None:
+        """
+        Send what the receiver needs before the transport is closed.
+        """
+
+
+class OscOutput(ControlOutput):
+    """
+    Frequency and volume as OSC messages.
+
+    Each send is one message, address + "/control", with the frequency in Hz and the
+    volume from 0 to 1 as floats, and the time.perf_counter() time of the values as a
+    double, so a receiver on the same machine can measure the delay and jitter.
+    """
+
+    def __init__(self, transport, address: str = OSC_ADDRESS, max_rate: float = MAX_SEND_RATE) -> None:
+        """
+        Initialize the sink.
+
+        :param transport: The object whose send(bytes) method delivers a datagram, usually a UdpTransport.
+        :param address: The prefix of the OSC address. (default: "/theremin")
+        :param max_rate: The maximum number of sends per second. (default: 100)
+        """
+        super().__init__(transport, max_rate)
+        self.address = address + "/control"
+
+    def _send(self, frequency: float, volume: float, timestamp: float) -> None:
+        self.transport.send(encode_osc_message(self.address, float(max(frequency, 0)), volume / 100, (timestamp,)))
+
+
+class MidiOutput(ControlOutput):
+    """
+    Frequency and volume as MIDI messages, for monophonic synths.
+
+    The frequency becomes the nearest note plus a pitch bend for the rest, and the
+    volume a control change (channel volume by default). A new note is only started
+    when the pitch leaves the bend range of the current one, so glides stay smooth.
+    Silence (no frequency or zero volume) ends the note.
+    """
+
+    def __init__(
+            self,
+            transport,
+            channel: int = 0,
+            bend_range: float = 2,
+            volume_controller: int = VOLUME_CONTROLLER,
+            max_rate: float = MAX_SEND_RATE
+        ) -> None:
+        """
+        Initialize the sink.
+
+        :param transport: The object whose send(bytes) method delivers a raw MIDI message.
+        :param channel: The MIDI channel, from 0 to 15. (default: 0)
+        :param bend_range: The pitch bend range of the receiving synth, in semitones. (default: 2)
+        :param volume_controller: The controller the volume is sent to. (default: 7, channel volume)
+        :param max_rate: The maximum number of sends per second. (default: 100)
+        """
+        super().__init__(transport, max_rate)
+        self.channel = channel
+        self.bend_range = bend_range
+        self.volume_controller = volume_controller
+        self.note: Optional[int] = None
+        self._bend = None
+        self._volume = None
+
+    def _send(self, frequency: float, volume: float, timestamp: float) -> None:
+        level = max(0, min(127, round(volume * 127 / 100)))
+        if frequency <= 0 or level == 0:
+            if self.note is not None:
+                self.transport.send(midi.note_off(self.note, self.channel))
+                self.note = None
+            return
+
+        pitch = midi.frequency_to_note(frequency)
+        if level != self._volume:
+            self.transport.send(midi.control_change(self.volume_controller, level, self.channel))
+            self._volume = level
+        if self.note is None or abs(pitch - self.note) > self.bend_range:
+            # Bend first, so that the new note starts at the right pitch
+            note = max(0, min(127, round(pitch)))
+            self._send_bend(pitch - note)
+            if self.note is not None:
+                self.transport.send(midi.note_off(self.note, self.channel))
+            self.transport.send(midi.note_on(note, NOTE_VELOCITY, self.channel))
+            self.note = note
+        else:
+            self._send_bend(pitch - self.note)
+
+    def _send_bend(self, semitones: float) -> None:
+        """
+        Send a pitch bend, unless it did not change.
+
+        :param semitones: The offset from the current note, in semitones.
+        """
+        bend = midi.pitch_bend_value(semitones, self.bend_range)
+        if bend != self._bend:
+            self.transport.send(midi.pitch_bend(bend, self.channel))
+            self._bend = bend
+
+    def _finish(self) -> None:
+        """
+        End the current note.
+        """
+        if self.note is not None:
+            self.transport.send(midi.note_off(self.note, self.channel))
+            self.note = None
+
+
+def open_control_output(spec: str, max_rate: float = MAX_SEND_RATE) -> ControlOutput:
+    """
+    Open a control output from a specification string.
+
+    :param spec: "osc:host:port" for OSC over UDP, "midi-udp:host:port" for raw MIDI
+                 bytes over UDP, "midi" for the default MIDI port, "midi:name" for a
+                 named port, or "midi-virtual:name" for a new virtual port.
+    :param max_rate: The maximum number of sends per second. (default: 100)
+    :return: The control output, not started yet.
+    """
+    kind, _, rest = spec.partition(":")
+    if kind in ("osc", "midi-udp"):
+        host, _, port = rest.rpartition(":")
+        transport = UdpTransport(host or "127.0.0.1", int(port))
+        if kind == "osc":
+            return OscOutput(transport, max_rate=max_rate)
+        return MidiOutput(transport, max_rate=max_rate)
+    if kind == "midi":
+        return MidiOutput(MidiPortTransport(rest or None), max_rate=max_rate)
+    if kind == "midi-virtual":
+        return MidiOutput(MidiPortTransport(rest or "Theremin", virtual=True), max_rate=max_rate)
+    raise ValueError(f"Unknown control output {spec!r}, expected osc:host:port, midi-udp:host:port, midi[:name] or midi-virtual[:name]")
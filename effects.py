@@ -0,0 +1,582 @@
+import time
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from oscillator import SAMPLE_RATE, BLOCK_SIZE
+from smoothing import ParameterRamp
+
+# The order effects are applied in
+EFFECTS = ("vibrato", "tremolo", "lowpass", "delay", "reverb")
+FILTER_KINDS = ("one-pole", "biquad")
+DEPTH_GLIDE_TIME = 0.05
+# Freeverb's delays at 44.1 kHz, in samples
+REVERB_COMB_DELAYS = (1116, 1188, 1277, 1356)
+REVERB_ALLPASS_DELAYS = (556, 441)
+REVERB_ALLPASS_GAIN = 0.5
+
+
+def _load_lfilter():
+    """
+    Import scipy's IIR filter, if scipy is installed.
+
+    :return: scipy.signal.lfilter, or None without scipy.
+    """
+    try:
+        from scipy.signal import lfilter
+    except ImportError:
+        return None
+    return lfilter
+
+def feedback_chunks(size: int, delay: int) -> Iterator[slice]:
+    """
+    Split a block into slices no longer than a feedback delay.
+
+    Within such a slice, every sample fed back was written before the slice, so the
+    slice is computed at once from the delay line.
+
+    :param size: The number of samples of the block.
+    :param delay: The feedback delay in samples.
+    :return: The consecutive slices covering the block.
+    """
+    for start in range(0, size, delay):
+        yield slice(start, min(start + delay, size))
+
+
+class DelayLine:
+    """A circular buffer of past samples, read and written by contiguous slices."""
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Initialize the delay line, filled with silence.
+
+        :param capacity: The number of samples kept, the longest delay.
+        """
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity)
+        self.index = 0  # Where the next sample is written
+
+    def read(self, delay: int, out: np.ndarray) -> np.ndarray:
+        """
+        Copy the samples written delay samples before the next ones to write.
+
+        :param delay: The delay in samples, at least len(out) and at most the capacity.
+        :param out: The array to fill.
+        :return: out.
+        """
+        size = len(out)
+        start = (self.index - delay) % self.capacity
+        first = min(size, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:] = self.buffer[:size - first]
+        return out
+
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Append samples, overwriting the oldest ones.
+
+        :param samples: The samples, no more than the capacity.
+        """
+        size = len(samples)
+        first = min(size, self.capacity - self.index)
+        self.buffer[self.index:self.index + first] = samples[:first]
+        self.buffer[:size - first] = samples[first:]
+        self.index = (self.index + size) % self.capacity
+
+    def reset(self) -> None:
+        """
+        Fill the line with silence.
+        """
+        self.buffer.fill(0)
+        self.index = 0
+
+
+class Effect:
+    """
+    Base class of the effects: a block is processed in place, and the state needed
+    by the next block (delay lines, filter memories, LFO phases) is kept between calls.
+    """
+
+    name = "effect"
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, block_size: int = BLOCK_SIZE) -> None:
+        """
+        Initialize the effect.
+
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The largest number of samples per block. (default: 512)
+        """
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.enabled = True
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Apply the effect to the next block.
+
+        :param block: The float samples, modified in place.
+        :return: block.
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """
+        Forget the past samples, so nothing of them is heard when the effect is enabled again.
+        """
+
+
+class LfoEffect(Effect):
+    """
+    An effect modulated by a raised-cosine LFO, whose depth follows a target set at
+    the control rate (from a hand, say) through a ParameterRamp.
+    """
+
+    def __init__(
+            self,
+            rate: float = 5.0,
+            depth: float = 0.0,
+            sample_rate: int = SAMPLE_RATE,
+            block_size: int = BLOCK_SIZE
+        ) -> None:
+        """
+        Initialize the effect.
+
+        :param rate: The LFO rate in Hz. (default: 5)
+        :param depth: The initial depth, from 0 to 1. (default: 0)
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The largest number of samples per block. (default: 512)
+        """
+        super().__init__(sample_rate, block_size)
+        self.rate = rate
+        self.lfo_phase = 0.0  # In radians
+        self.depth_ramp = ParameterRamp(DEPTH_GLIDE_TIME, sample_rate=sample_rate, value=float(depth))
+        self._steps = np.arange(block_size, dtype=np.float64)
+        self._depth = np.empty(block_size)
+        self._lfo = np.empty(block_size)
+
+    @property
+    def depth(self) -> float:
+        """The depth at the end of the last block, from 0 to 1."""
+        return self.depth_ramp.value
+
+    def set_depth(self, depth: float) -> None:
+        """
+        Set the depth the effect moves towards.
+
+        :param depth: The depth, from 0 to 1.
+        """
+        self.depth_ramp.set_target(float(np.clip(depth, 0, 1)))
+
+    def render_modulation(self, size: int) -> np.ndarray:
+        """
+        Render the depth times the LFO for the next samples, advancing the LFO.
+
+        :param size: The number of samples.
+        :return: The modulation, from 0 to the depth, valid until the next call.
+        """
+        increment = 2 * np.pi * self.rate / self.sample_rate
+        lfo = self._lfo[:size]
+        np.multiply(self._steps[:size], increment, out=lfo)
+        lfo += self.lfo_phase
+        self.lfo_phase = (self.lfo_phase + size * increment) % (2 * np.pi)
+        np.cos(lfo, out=lfo)
+        lfo *= -0.5
+        lfo += 0.5
+        lfo *= self.depth_ramp.render(self._depth[:size])
+        return lfo
+
+
+class Vibrato(LfoEffect):
+    """
+    Pitch vibrato: the block is read back from a delay line with a delay swept by the
+    LFO, between 0 and max_delay times the depth, with linear interpolation.
+    """
+
+    name = "vibrato"
+
+    def __init__(
+            self,
+            rate: float = 5.5,
+            depth: float = 0.0,
+            max_delay: float = 0.004,
+            sample_rate: int = SAMPLE_RATE,
+            block_size: int = BLOCK_SIZE
+        ) -> None:
+        """
+        Initialize the vibrato.
+
+        :param rate: The vibrato rate in Hz. (default: 5.5)
+        :param depth: The initial depth, from 0 to 1. (default: 0)
+        :param max_delay: The delay swing at full depth in seconds, about a semitone at 5.5 Hz. (default: 0.004)
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The largest number of samples per block. (default: 512)
+        """
+        super().__init__(rate, depth, sample_rate, block_size)
+        self.max_delay = max_delay
+        self.max_delay_samples = max_delay * sample_rate
+        self.line = DelayLine(int(np.ceil(self.max_delay_samples)) + block_size + 2)
+        self._positions = np.empty(block_size)
+        self._indices = np.empty(block_size, dtype=np.intp)
+        self._next_indices = np.empty(block_size, dtype=np.intp)
+        self._fractions = np.empty(block_size)
+        self._next_samples = np.empty(block_size)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        size = len(block)
+        delays = self.render_modulation(size)
+        delays *= self.max_delay_samples
+        start = self.line.index
+        self.line.write(block)
+
+        # Fractional read positions, delays[n] samples behind sample n
+        positions = self._positions[:size]
+        np.add(self._steps[:size], start, out=positions)
+        positions -= delays
+        positions %= self.line.capacity
+        indices, next_indices, fractions = self._indices[:size], self._next_indices[:size], self._fractions[:size]
+        np.floor(positions, out=fractions)
+        np.copyto(indices, fractions, casting="unsafe")
+        np.subtract(positions, fractions, out=fractions)
+        np.add(indices, 1, out=next_indices)
+        next_indices %= self.line.capacity
+
+        next_samples = self._next_samples[:size]
+        np.take(self.line.buffer, indices, out=block)
+        np.take(self.line.buffer, next_indices, out=next_samples)
+        next_samples -= block
+        next_samples *= fractions
+        block += next_samples
+        return block
+
+    def reset(self) -> None:
+        self.line.reset()
+
+
+class Tremolo(LfoEffect):
+    """Amplitude tremolo: the gain dips by up to the depth on every LFO cycle."""
+
+    name = "tremolo"
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        gains = self.render_modulation(len(block))
+        np.subtract(1, gains, out=gains)
+        block *= gains
+        return block
+
+
+class FeedbackDelay(Effect):
+    """
+    Echo: the block plus mix times the output of a delay line fed with the block and
+    feedback times its own output. Blocks longer than the delay are processed in
+    slices of the delay, so any delay works with any block size.
+    """
+
+    name = "delay"
+
+    def __init__(
+            self,
+            delay_time: float = 0.3,
+            feedback: float = 0.4,
+            mix: float = 0.35,
+            max_delay_time: float = 2.0,
+            sample_rate: int = SAMPLE_RATE,
+            block_size: int = BLOCK_SIZE
+        ) -> None:
+        """
+        Initialize the delay.
+
+        :param delay_time: The time between two echoes in seconds. (default: 0.3)
+        :param feedback: The gain of each echo relative to the previous one, below 1. (default: 0.4)
+        :param mix: The gain of the echoes added to the block. (default: 0.35)
+        :param max_delay_time: The longest delay_time that can be set later, in seconds. (default: 2)
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The largest number of samples per block. (default: 512)
+        """
+        super().__init__(sample_rate, block_size)
+        self.feedback = feedback
+        self.mix = mix
+        self.line = DelayLine(max(1, int(round(max_delay_time * sample_rate))))
+        self.delay = 1
+        self.set_delay_time(delay_time)
+        self._delayed = np.empty(block_size)
+        self._input = np.empty(block_size)
+
+    def set_delay_time(self, delay_time: float) -> None:
+        """
+        Set the time between two echoes.
+
+        :param delay_time: The delay in seconds, up to max_delay_time.
+        """
+        self.delay = int(np.clip(round(delay_time * self.sample_rate), 1, self.line.capacity))
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        for chunk in feedback_chunks(len(block), self.delay):
+            size = chunk.stop - chunk.start
+            delayed = self.line.read(self.delay, self._delayed[:size])
+            line_input = self._input[:size]
+            np.multiply(delayed, self.feedback, out=line_input)
+            line_input += block[chunk]
+            self.line.write(line_input)
+            delayed *= self.mix
+            block[chunk] += delayed
+        return block
+
+    def reset(self) -> None:
+        self.line.reset()
+
+
+class LowPassFilter(Effect):
+    """
+    One-pole (6 dB/octave) or biquad (12 dB/octave, resonant) low-pass filter.
+
+    Both are computed as a second-order section in transposed direct form II, whose
+    two memories carry the filter across blocks. The section runs in scipy's
+    lfilter when scipy is installed, and in a Python loop over the block otherwise.
+    """
+
+    name = "lowpass"
+
+    def __init__(
+            self,
+            cutoff: float = 2000.0,
+            kind: str = "biquad",
+            q: float = 0.7071,
+            sample_rate: int = SAMPLE_RATE,
+            block_size: int = BLOCK_SIZE
+        ) -> None:
+        """
+        Initialize the filter.
+
+        :param cutoff: The cutoff frequency in Hz. (default: 2000)
+        :param kind: "one-pole" or "biquad". (default: "biquad")
+        :param q: The resonance of the biquad, 0.7071 for no peak. (default: 0.7071)
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The largest number of samples per block. (default: 512)
+        """
+        super().__init__(sample_rate, block_size)
+        if kind not in FILTER_KINDS:
+            raise ValueError(f"Unknown filter kind {kind!r}, expected one of {FILTER_KINDS}")
+        self.kind = kind
+        self.q = q
+        self.b = np.zeros(3)
+        self.a = np.zeros(3)
+        self.state = np.zeros(2)
+        self._lfilter = _load_lfilter()
+        self.set_cutoff(cutoff)
+
+    def set_cutoff(self, cutoff: float) -> None:
+        """
+        Compute the coefficients for a cutoff frequency, keeping the filter memories.
+
+        :param cutoff: The cutoff frequency in Hz, below half the sample rate.
+        """
+        self.cutoff = float(np.clip(cutoff, 1.0, 0.49 * self.sample_rate))
+        w0 = 2 * np.pi * self.cutoff / self.sample_rate
+        if self.kind == "one-pole":
+            alpha = -np.expm1(-w0)
+            self.b[:] = (alpha, 0, 0)
+            self.a[:] = (1, alpha - 1, 0)
+            return
+        # Audio EQ Cookbook low-pass
+        cos_w0 = np.cos(w0)
+        alpha = np.sin(w0) / (2 * self.q)
+        a0 = 1 + alpha
+        self.b[:] = ((1 - cos_w0) / 2 / a0, (1 - cos_w0) / a0, (1 - cos_w0) / 2 / a0)
+        self.a[:] = (1, -2 * cos_w0 / a0, (1 - alpha) / a0)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self._lfilter is not None:
+            filtered, self.state[:] = self._lfilter(self.b, self.a, block, zi=self.state)
+            block[:] = filtered
+            return block
+        b0, b1, b2 = self.b
+        _, a1, a2 = self.a
+        s1, s2 = self.state
+        samples = block.tolist()
+        for index, x in enumerate(samples):
+            y = b0 * x + s1
+            s1 = b1 * x - a1 * y + s2
+            s2 = b2 * x - a2 * y
+            samples[index] = y
+        block[:] = samples
+        self.state[:] = (s1, s2)
+        return block
+
+    def reset(self) -> None:
+        self.state.fill(0)
+
+
+class Reverb(Effect):
+    """
+    Lightweight Schroeder reverb: four parallel feedback combs followed by two
+    allpasses in series, at Freeverb's delays scaled by room_size. The comb input is
+    scaled by 1 - feedback so the tail is about as loud as the dry sound.
+    """
+
+    name = "reverb"
+
+    def __init__(
+            self,
+            room_size: float = 1.0,
+            feedback: float = 0.84,
+            mix: float = 0.25,
+            sample_rate: int = SAMPLE_RATE,
+            block_size: int = BLOCK_SIZE
+        ) -> None:
+        """
+        Initialize the reverb.
+
+        :param room_size: The factor applied to the delays. (default: 1)
+        :param feedback: The feedback of the combs, the longer the tail the closer to 1. (default: 0.84)
+        :param mix: The gain of the reverberated sound added to the block. (default: 0.25)
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The largest number of samples per block. (default: 512)
+        """
+        super().__init__(sample_rate, block_size)
+        self.feedback = feedback
+        self.mix = mix
+        scale = room_size * sample_rate / 44100
+        self.comb_delays = [max(1, int(round(delay * scale))) for delay in REVERB_COMB_DELAYS]
+        self.allpass_delays = [max(1, int(round(delay * scale))) for delay in REVERB_ALLPASS_DELAYS]
+        self.combs = [DelayLine(delay) for delay in self.comb_delays]
+        self.allpasses = [DelayLine(delay) for delay in self.allpass_delays]
+        self._input = np.empty(block_size)
+        self._wet = np.empty(block_size)
+        self._delayed = np.empty(block_size)
+        self._line_input = np.empty(block_size)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        size = len(block)
+        comb_input = self._input[:size]
+        np.multiply(block, (1 - self.feedback) / len(self.combs), out=comb_input)
+        wet = self._wet[:size]
+        wet.fill(0)
+
+        # Combs: the output is the line, fed with the input plus feedback times the output
+        for line, delay in zip(self.combs, self.comb_delays):
+            for chunk in feedback_chunks(size, delay):
+                delayed = line.read(delay, self._delayed[:chunk.stop - chunk.start])
+                wet[chunk] += delayed
+                delayed *= self.feedback
+                delayed += comb_input[chunk]
+                line.write(delayed)
+
+        # Allpasses: v = x + g v[n - D], y = v[n - D] - g v
+        for line, delay in zip(self.allpasses, self.allpass_delays):
+            for chunk in feedback_chunks(size, delay):
+                chunk_size = chunk.stop - chunk.start
+                delayed = line.read(delay, self._delayed[:chunk_size])
+                line_input = self._line_input[:chunk_size]
+                np.multiply(delayed, REVERB_ALLPASS_GAIN, out=line_input)
+                line_input += wet[chunk]
+                line.write(line_input)
+                line_input *= REVERB_ALLPASS_GAIN
+                np.subtract(delayed, line_input, out=wet[chunk])
+
+        wet *= self.mix
+        block += wet
+        return block
+
+    def reset(self) -> None:
+        for line in self.combs + self.allpasses:
+            line.reset()
+
+
+class EffectsChain:
+    """
+    Effects applied in series to every output block, each one timed.
+
+    The cost of every effect on the last block is kept in costs, and recorded as an
+    "effect_<name>" stage of the tracer when there is one, so percentiles can be
+    checked against the block duration: load is the share of the last block's
+    duration the whole chain took, which must stay well below 1 for the audio
+    thread to meet its deadline. Disabled effects are skipped and cost nothing.
+    """
+
+    def __init__(self, effects: Sequence[Effect], sample_rate: int = SAMPLE_RATE, tracer=None) -> None:
+        """
+        Initialize the chain.
+
+        :param effects: The effects, in the order they are applied.
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param tracer: The LatencyTracer the costs are recorded to. (default: None)
+        """
+        self.effects: List[Effect] = list(effects)
+        self.sample_rate = sample_rate
+        self.tracer = tracer
+        self.costs: Dict[str, float] = {effect.name: 0.0 for effect in self.effects}
+        self.load = 0.0
+
+    def __getitem__(self, name: str) -> Effect:
+        for effect in self.effects:
+            if effect.name == name:
+                return effect
+        raise KeyError(name)
+
+    @property
+    def enabled(self) -> Tuple[str, ...]:
+        """The names of the enabled effects, in chain order."""
+        return tuple(effect.name for effect in self.effects if effect.enabled)
+
+    def set_enabled(self, names: Sequence[str]) -> None:
+        """
+        Enable the given effects and disable the others.
+
+        An effect enabled again starts from silence rather than from the samples it
+        held when it was disabled.
+
+        :param names: The names of the effects to enable.
+        """
+        for effect in self.effects:
+            enabled = effect.name in names
+            if enabled and not effect.enabled:
+                effect.reset()
+            effect.enabled = enabled
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Apply the enabled effects to a block, in place.
+
+        :param block: The float samples.
+        :return: block.
+        """
+        total = 0.0
+        for effect in self.effects:
+            if not effect.enabled:
+                self.costs[effect.name] = 0.0
+                continue
+            start = time.perf_counter()
+            effect.process(block)
+            cost = time.perf_counter() - start
+            self.costs[effect.name] = cost
+            total += cost
+            if self.tracer is not None:
+                self.tracer.record(f"effect_{effect.name}", cost)
+        self.load = total * self.sample_rate / len(block)
+        return block
+
+
+def create_effects_chain(
+        enabled: Sequence[str] = (),
+        sample_rate: int = SAMPLE_RATE,
+        block_size: int = BLOCK_SIZE,
+        tracer=None
+    ) -> EffectsChain:
+    """
+    Build the chain of every effect with its default settings.
+
+    :param enabled: The names of the effects enabled at first. (default: none)
+    :param sample_rate: The sample rate of the stream. (default: 44100)
+    :param block_size: The largest number of samples per block. (default: 512)
+    :param tracer: The LatencyTracer the costs are recorded to. (default: None)
+    :return: The chain, in the order of EFFECTS.
+    """
+    unknown = set(enabled) - set(EFFECTS)
+    if unknown:
+        raise ValueError(f"Unknown effects {sorted(unknown)}, expected some of {EFFECTS}")
+    effect_classes = {"vibrato": Vibrato, "tremolo": Tremolo, "lowpass": LowPassFilter, "delay": FeedbackDelay, "reverb": Reverb}
+    chain = EffectsChain(
+        [effect_classes[name](sample_rate=sample_rate, block_size=block_size) for name in EFFECTS],
+        sample_rate=sample_rate,
+        tracer=tracer
+    )
+    chain.set_enabled(enabled)
+    return chain
@@ -0,0 +1,55 @@
+import numpy as np
+from typing import Dict, Tuple
+
+
+class FramePool:
+    """
+    Reusable frame buffers, keyed by purpose and dtype.
+
+    Every stage that would allocate a new frame (flipping, colour conversion,
+    resizing) asks the pool for its destination array instead, and writes into it
+    with the dst argument of OpenCV. A purpose keeps one flat buffer, grown to the
+    largest frame requested and viewed with the shape asked for, so regions of
+    interest whose size changes every frame are served without allocating either.
+    A buffer is overwritten the next time its purpose is requested, so a stage must
+    be done with its previous result by then.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty pool.
+        """
+        self._buffers: Dict[Tuple[str, np.dtype], np.ndarray] = {}
+
+    def get(self, purpose: str, shape: Tuple[int, ...], dtype: np.dtype = np.uint8) -> np.ndarray:
+        """
+        Return the buffer of a purpose with the given shape, allocating only when it grows.
+
+        :param purpose: The name of the stage the buffer is for, such as "flip" or "rgb".
+        :param shape: The shape of the buffer.
+        :param dtype: The dtype of the buffer. (default: np.uint8)
+        :return: An uninitialized C-contiguous array of the given shape and dtype.
+        """
+        key = (purpose, np.dtype(dtype))
+        size = int(np.prod(shape))
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.size < size:
+            buffer = self._buffers[key] = np.empty(size, dtype=dtype)
+        return buffer[:size].reshape(shape)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory held by the pool, in bytes.
+        """
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def clear(self) -> None:
+        """
+        Drop every buffer.
+        """
+        self._buffers.clear()
+
+
+# Shared by the stages of the update loop (and of each inference worker process)
+FRAME_POOL = FramePool()
@@ -0,0 +1,327 @@
+import os
+import time
+import cv2
+import numpy as np
+from typing import List, Optional, Sequence, Tuple, Union
+from hand_tracking import draw_landmark_arrays, LANDMARK_COUNT
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+SKIN_COLOR = (140, 170, 225)
+
+# Landmarks of an open right hand around the wrist, in fractions of the frame height
+HAND_TEMPLATE = np.array([
+    (0.0, 0.0), (-0.06, -0.04), (-0.1, -0.09), (-0.13, -0.13), (-0.16, -0.17),
+    (-0.05, -0.16), (-0.06, -0.23), (-0.065, -0.27), (-0.07, -0.31),
+    (0.0, -0.17), (0.0, -0.25), (0.0, -0.3), (0.0, -0.34),
+    (0.04, -0.16), (0.05, -0.23), (0.055, -0.27), (0.06, -0.3),
+    (0.08, -0.13), (0.1, -0.18), (0.11, -0.21), (0.12, -0.24),
+])
+
+
+def capture_frame_shape(video_capture: cv2.VideoCapture) -> Optional[Tuple[int, int, int]]:
+    """
+    Read the frame shape an OpenCV capture announces.
+
+    :param video_capture: The opened capture.
+    :return: The (height, width, 3) shape of its frames, None if it does not tell.
+    """
+    width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return (height, width, 3) if width > 0 and height > 0 else None
+
+
+class FrameSource:
+    """
+    Base class of everything the update loop can read frames from.
+
+    A source either paces its frames in real time at its frame rate, like a camera
+    would, or delivers them as fast as they are read, for throughput measurements.
+    Sources that know the hands in their frames (synthetic ones) expose them as
+    landmarks and handedness, so inference can be skipped. Finite sources that do
+    not loop set ended once their last frame was read, so the update loop can stop.
+    """
+
+    # Whether the source sets landmarks and handedness with every frame
+    provides_landmarks = False
+
+    def __init__(self, fps: float = 30.0, realtime: bool = True) -> None:
+        """
+        Initialize the frame source.
+
+        :param fps: The frame rate of the source. (default: 30)
+        :param realtime: Whether frames are paced at fps, or delivered as fast as possible. (default: True)
+        """
+        self.fps = fps
+        self.realtime = realtime
+        self.landmarks: Optional[np.ndarray] = None
+        self.handedness: List[str] = []
+        # Set once a finite source has no frames left; cameras never end
+        self.ended = False
+        self._next_frame_time = None
+
+    def _read_frame(self) -> Tuple[bool, Union[None, np.ndarray]]:
+        """
+        Produce the next frame, without pacing.
+
+        :return: Tuple (ret, image).
+        """
+        raise NotImplementedError
+
+    @property
+    def frame_shape(self) -> Optional[Tuple[int, int, int]]:
+        """
+        The shape of the frames, if known before the first one is read.
+        """
+        return None
+
+    def _pace(self) -> None:
+        """
+        Sleep until the next frame is due, when pacing in real time.
+        """
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_frame_time is None or now - self._next_frame_time > 1 / self.fps:
+            # First frame, or too far behind: do not burst to catch up
+            self._next_frame_time = now
+        elif self._next_frame_time > now:
+            time.sleep(self._next_frame_time - now)
+        self._next_frame_time += 1 / self.fps
+
+    def read(self) -> Tuple[bool, Union[None, np.ndarray]]:
+        """
+        Read the next frame.
+
+        :return: Tuple (ret, image), where ret is a boolean indicating if a frame was produced.
+        """
+        self._pace()
+        return self._read_frame()
+
+    def read_latest(self, timeout: Optional[float] = 1.0) -> Tuple[bool, Union[None, np.ndarray], float]:
+        """
+        Read the next frame with its timestamp, if it is due within timeout.
+
+        :param timeout: The maximum time to wait for the next frame in seconds, None to wait as long as needed. (default: 1.0)
+        :return: Tuple (ret, image, timestamp), where timestamp is the time.perf_counter() time of the frame.
+        """
+        if timeout is not None and self.realtime and self._next_frame_time is not None:
+            if self._next_frame_time - time.perf_counter() > timeout:
+                return False, None, 0.0
+        success, image = self.read()
+        return success, image, time.perf_counter()
+
+    def flip_horizontal(self, image: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Flip an image horizontally.
+
+        :param image: Image to flip.
+        :param dst: Array of the same shape to write the flipped image to, if any. (default: None)
+        :return: Horizontally flipped image.
+        """
+        return cv2.flip(image, 1, dst=dst)
+
+    def release(self) -> None:
+        """
+        Release the resources of the source.
+        """
+
+
+class VideoFileSource(FrameSource):
+    """Frames read from a video file."""
+
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False) -> None:
+        """
+        Open a video file.
+
+        :param path: The path of the video file.
+        :param realtime: Whether frames are paced at the video frame rate. (default: True)
+        :param loop: Whether to restart from the first frame at the end. (default: False)
+        """
+        self.video_capture = cv2.VideoCapture(path)
+        if not self.video_capture.isOpened():
+            raise IOError(f"Could not open video file: {path}")
+        super().__init__(self.video_capture.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.loop = loop
+
+    @property
+    def frame_shape(self) -> Optional[Tuple[int, int, int]]:
+        return capture_frame_shape(self.video_capture)
+
+    def _read_frame(self) -> Tuple[bool, Union[None, np.ndarray]]:
+        success, image = self.video_capture.read()
+        if not success and self.loop:
+            self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, image = self.video_capture.read()
+        self.ended = not success and not self.loop
+        return success, image
+
+    def release(self) -> None:
+        self.video_capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Frames read from the images of a directory, in file name order."""
+
+    def __init__(self, directory: str, fps: float = 30.0, realtime: bool = True, loop: bool = False) -> None:
+        """
+        List the images of a directory.
+
+        :param directory: The directory holding the images.
+        :param fps: The frame rate to play the images at. (default: 30)
+        :param realtime: Whether frames are paced at fps. (default: True)
+        :param loop: Whether to restart from the first image at the end. (default: False)
+        """
+        super().__init__(fps, realtime)
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.paths:
+            raise IOError(f"No images found in: {directory}")
+        self.loop = loop
+        self.index = 0
+
+    def _read_frame(self) -> Tuple[bool, Union[None, np.ndarray]]:
+        if self.index >= len(self.paths):
+            if not self.loop:
+                self.ended = True
+                return False, None
+            self.index = 0
+        image = cv2.imread(self.paths[self.index])
+        self.index += 1
+        return image is not None, image
+
+
+class SyntheticSource(FrameSource):
+    """
+    Deterministic frames of hand-like shapes, with their landmarks known.
+
+    Without a landmark track, two hands follow slow Lissajous paths: a right hand
+    sweeping the pitch range and a left hand sweeping the volume. With a track of
+    prerecorded landmarks (of shape (frames, hands, 21, 3)), those are played back.
+    Each frame draws the hands, and the landmarks and handedness of the frame are
+    exposed so the update loop can skip inference.
+
+    Landmarks and handedness are given as the update loop sees them, in the mirrored
+    image: frames are produced unmirrored, like a camera's, and flip_horizontal
+    mirrors the landmarks back along with the image.
+    """
+
+    provides_landmarks = True
+
+    def __init__(
+            self,
+            width: int = 640,
+            height: int = 480,
+            fps: float = 30.0,
+            realtime: bool = True,
+            frame_count: Optional[int] = None,
+            landmark_track: Optional[np.ndarray] = None,
+            handedness: Sequence[str] = ("Right", "Left"),
+            loop: bool = False
+        ) -> None:
+        """
+        Initialize the synthetic source.
+
+        :param width: The width of the frames. (default: 640)
+        :param height: The height of the frames. (default: 480)
+        :param fps: The frame rate. (default: 30)
+        :param realtime: Whether frames are paced at fps. (default: True)
+        :param frame_count: The number of frames before the source ends, None for endless. (default: None)
+        :param landmark_track: Prerecorded normalized landmarks, of shape (frames, hands, 21, 3). (default: None)
+        :param handedness: The label of each hand. (default: ("Right", "Left"))
+        :param loop: Whether a landmark track restarts at the end instead of ending the source. (default: False)
+        """
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.landmark_track = landmark_track
+        if frame_count is None and landmark_track is not None and not loop:
+            frame_count = len(landmark_track)
+        self.frame_count = frame_count
+        self.track_handedness = list(handedness)
+        self.index = 0
+        self._frame = np.empty((height, width, 3), dtype=np.uint8)
+
+    @property
+    def frame_shape(self) -> Optional[Tuple[int, int, int]]:
+        return self._frame.shape
+
+    def landmarks_at(self, index: int) -> np.ndarray:
+        """
+        Compute the normalized landmarks of a frame, in mirrored image coordinates.
+
+        :param index: The frame index.
+        :return: The landmarks, of shape (hands, 21, 3).
+        """
+        if self.landmark_track is not None:
+            return np.asarray(self.landmark_track[index % len(self.landmark_track)], dtype=np.float32)
+
+        t = index / self.fps
+        aspect = self.height / self.width
+        wrists = np.array([
+            (0.7 + 0.1 * np.sin(0.7 * t), 0.55 + 0.3 * np.sin(0.5 * t)),
+            (0.25 + 0.1 * np.sin(0.9 * t), 0.6 + 0.25 * np.sin(0.3 * t + 1)),
+        ])
+        template = HAND_TEMPLATE * (aspect, 1)
+        landmarks = np.zeros((2, LANDMARK_COUNT, 3), dtype=np.float32)
+        landmarks[0, :, :2] = wrists[0] + template
+        landmarks[1, :, :2] = wrists[1] + template * (-1, 1)  # Left hand: mirrored
+        return landmarks
+
+    def _read_frame(self) -> Tuple[bool, Union[None, np.ndarray]]:
+        if self.frame_count is not None and self.index >= self.frame_count:
+            self.ended = True
+            return False, None
+        landmarks = self.landmarks_at(self.index).copy()
+        landmarks[..., 0] = 1 - landmarks[..., 0]
+        self.index += 1
+
+        frame = self._frame
+        frame[:] = (40, 40, 40)
+        for hand in landmarks:
+            points = np.rint(hand[:, :2] * (self.width, self.height)).astype(np.int32)
+            cv2.fillConvexPoly(frame, cv2.convexHull(points[[0, 1, 2, 5, 9, 13, 17]]), SKIN_COLOR)
+        draw_landmark_arrays(frame, landmarks, color=SKIN_COLOR, thickness=12, circle_radius=3)
+
+        self.landmarks = landmarks
+        self.handedness = self.track_handedness[:len(landmarks)]
+        return True, frame.copy()
+
+    def flip_horizontal(self, image: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Flip an image horizontally, along with the known landmarks.
+
+        :param image: Image to flip.
+        :param dst: Array of the same shape to write the flipped image to, if any. (default: None)
+        :return: Horizontally flipped image.
+        """
+        if self.landmarks is not None:
+            self.landmarks = self.landmarks.copy()
+            self.landmarks[..., 0] = 1 - self.landmarks[..., 0]
+        return cv2.flip(image, 1, dst=dst)
+
+
+def open_frame_source(spec: Union[int, str], realtime: bool = True, loop: bool = False) -> FrameSource:
+    """
+    Open a frame source from a command-line style description.
+
+    :param spec: A camera device ID, "synthetic", a directory of images, a .npz file with a
+                 "landmarks" array (and optionally "handedness") to play back, or a video file.
+    :param realtime: Whether non-camera sources are paced in real time. (default: True)
+    :param loop: Whether file sources restart at the end. (default: False)
+    :return: The opened frame source.
+    """
+    from camera import Camera
+
+    if isinstance(spec, int) or str(spec).isdigit():
+        return Camera(int(spec), threaded=True)
+    if spec == "synthetic":
+        return SyntheticSource(realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime, loop=loop)
+    if spec.endswith(".npz"):
+        track = np.load(spec)
+        handedness = [str(label) for label in track["handedness"]] if "handedness" in track else ("Right", "Left")
+        return SyntheticSource(realtime=realtime, landmark_track=track["landmarks"], handedness=handedness, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
@@ -1,29 +1,65 @@
+import time
 import tkinter as tk
 from tkinter import Scale, HORIZONTAL
 from functools import partial
 from PIL import Image, ImageTk
 import cv2
 from tuner import Tuner
-from typing import Callable
+from typing import Callable, Optional, Sequence, Tuple
+import numpy as np
 from tuner_canvas import TunerCanvas
+from wavetable import WAVEFORMS
+from midi import NOTE_NAMES, PITCH_MODES, SCALES
+from profiles import PROFILES
+from effects import EFFECTS
+
+# Timers may fire a little before a full display period has passed since the last
+# update: frames that early are displayed rather than skipped
+DISPLAY_TIMER_SLACK = 0.002
 
 
 class ThereminGUI:
     """A GUI class for Theremin."""
     
-    def __init__(self, update_loop: Callable, on_closing: Callable) -> None:
+    def __init__(
+            self,
+            update_loop: Callable,
+            on_closing: Callable,
+            display_fps: Optional[float] = 30,
+            performance_profile: str = "balanced",
+            auto_profile: bool = False,
+            effects: Sequence[str] = ()
+        ) -> None:
         """
         Initialize the Theremin GUI.
 
         :param update_loop: The function to call for updating the GUI.
         :param on_closing: The function to call when the GUI window is closed.
+        :param display_fps: The maximum rate of video canvas updates, None for no cap. (default: 30)
+        :param performance_profile: The name of the initial performance profile. (default: "balanced")
+        :param auto_profile: Whether the profile is initially chosen by the auto-tuner. (default: False)
+        :param effects: The names of the initially enabled effects. (default: none)
         """
+        self.update_loop = update_loop
         self.root = tk.Tk()
         self.root.protocol("WM_DELETE_WINDOW", on_closing)
         self.root.title("Theremin")
         self.smoothing_factor = 0.5
         self.change_limit = 50
+        self.waveform = "sine"
+        self.pitch_mode = "exponential"
+        self.scale = "chromatic"
+        self.scale_root = 0
+        self.performance_profile = performance_profile
+        self.auto_profile = auto_profile
+        self.effects = tuple(effects)
         self.tuner = Tuner()
+        self.display_fps = display_fps
+        self.canvas_image = None
+        self._canvas_item = None
+        self._frame_rgba = None
+        self._pil_image = None
+        self._last_display_time = 0.0
         
 
         # Create the canvas
@@ -46,6 +82,19 @@ class ThereminGUI:
 
         # Create change_limit slider
         self.change_limit_slider = self.create_change_limit_slider(right_frame)
+
+        # Create waveform selector
+        self.waveform_selector = self.create_waveform_selector(right_frame)
+
+        # Create pitch mapping selectors
+        self.pitch_mode_selector = self.create_pitch_mode_selector(right_frame)
+        self.scale_selector, self.scale_root_selector = self.create_scale_selector(right_frame)
+
+        # Create performance profile selector
+        self.profile_selector = self.create_profile_selector(right_frame)
+
+        # Create effect switches
+        self.effect_switches = self.create_effect_switches(right_frame)
         
         # # Create tuner_label
         # self.tuner_label = self.create_tuner_label(right_frame)
@@ -53,16 +102,49 @@ class ThereminGUI:
         # Create tuner_canvas
         self.tuner_canvas = self.create_tuner_canvas(right_frame)
     
-    def update_canvas(self, frame: cv2.Mat) -> None: 
+    def display_due(self) -> bool:
+        """
+        Tell whether the video canvas may be updated now under the display rate cap.
+
+        :return: True if a frame given to update_canvas now would be displayed.
         """
-        Update the canvas with the given frame.
+        if not self.display_fps:
+            return True
+        return time.perf_counter() - self._last_display_time >= 1 / self.display_fps - DISPLAY_TIMER_SLACK
+
+    def update_canvas(self, frame: cv2.Mat) -> bool:
+        """
+        Update the canvas with the given frame, unless the display rate cap says to skip it.
+
+        The canvas holds a single image item whose pixels are replaced in place, and
+        the colour conversion writes into a reused buffer, so neither the canvas item
+        list nor the memory grows over a session.
 
         :param frame: The frame to display on the canvas.
+        :return: True if the frame was displayed, False if it was skipped.
         """
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_rgb)
-        self.canvas_image = ImageTk.PhotoImage(pil_image)
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.canvas_image)
+        if not self.display_due():
+            return False
+        self._last_display_time = time.perf_counter()
+
+        height, width = frame.shape[:2]
+        if self._frame_rgba is None or self._frame_rgba.shape[:2] != (height, width):
+            self._frame_rgba = np.empty((height, width, 4), dtype=np.uint8)
+            # RGBA images built from a buffer share its memory: converting into the
+            # buffer updates the image without any copy or allocation
+            self._pil_image = Image.frombuffer("RGBA", (width, height), self._frame_rgba, "raw", "RGBA", 0, 1)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=self._frame_rgba)
+        pil_image = self._pil_image
+
+        if self.canvas_image is None or (self.canvas_image.width(), self.canvas_image.height()) != (width, height):
+            self.canvas_image = ImageTk.PhotoImage(pil_image)
+            if self._canvas_item is None:
+                self._canvas_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.canvas_image)
+            else:
+                self.canvas.itemconfig(self._canvas_item, image=self.canvas_image)
+        else:
+            self.canvas_image.paste(pil_image)
+        return True
     
     def create_canvas(self) -> tk.Canvas:
         canvas = tk.Canvas(self.root, width=640, height=480)
@@ -118,6 +200,111 @@ class ThereminGUI:
         change_limit_slider.pack()
         return change_limit_slider
     
+    def create_waveform_selector(self, parent: tk.Widget) -> tk.OptionMenu:
+        waveform_label = tk.Label(parent, text="Waveform:")
+        waveform_label.pack()
+        waveform_variable = tk.StringVar(parent, value=self.waveform)
+        waveform_selector = tk.OptionMenu(
+            parent,
+            waveform_variable,
+            *WAVEFORMS,
+            command=lambda x: setattr(self, 'waveform', x)
+        )
+        waveform_selector.variable = waveform_variable
+        waveform_selector.pack()
+        return waveform_selector
+
+    def create_pitch_mode_selector(self, parent: tk.Widget) -> tk.OptionMenu:
+        pitch_mode_label = tk.Label(parent, text="Pitch mapping:")
+        pitch_mode_label.pack()
+        pitch_mode_variable = tk.StringVar(parent, value=self.pitch_mode)
+        pitch_mode_selector = tk.OptionMenu(
+            parent,
+            pitch_mode_variable,
+            *PITCH_MODES,
+            command=lambda x: setattr(self, 'pitch_mode', x)
+        )
+        pitch_mode_selector.variable = pitch_mode_variable
+        pitch_mode_selector.pack()
+        return pitch_mode_selector
+
+    def create_profile_selector(self, parent: tk.Widget) -> tk.OptionMenu:
+        profile_label = tk.Label(parent, text="Performance:")
+        profile_label.pack()
+        profile_frame = tk.Frame(parent)
+        profile_frame.pack()
+        profile_variable = tk.StringVar(profile_frame, value=self.performance_profile)
+        profile_selector = tk.OptionMenu(
+            profile_frame,
+            profile_variable,
+            *PROFILES,
+            command=lambda x: setattr(self, 'performance_profile', x)
+        )
+        profile_selector.variable = profile_variable
+        profile_selector.pack(side=tk.LEFT)
+        auto_variable = tk.BooleanVar(profile_frame, value=self.auto_profile)
+        auto_checkbutton = tk.Checkbutton(
+            profile_frame,
+            text="Auto",
+            variable=auto_variable,
+            command=lambda: setattr(self, 'auto_profile', auto_variable.get())
+        )
+        auto_checkbutton.variable = auto_variable
+        auto_checkbutton.pack(side=tk.LEFT)
+        return profile_selector
+
+    def create_effect_switches(self, parent: tk.Widget) -> tk.Frame:
+        effects_label = tk.Label(parent, text="Effects:")
+        effects_label.pack()
+        effects_frame = tk.Frame(parent)
+        effects_frame.pack()
+        effect_variables = {}
+        for name in EFFECTS:
+            effect_variables[name] = tk.BooleanVar(effects_frame, value=name in self.effects)
+            effect_checkbutton = tk.Checkbutton(
+                effects_frame,
+                text=name,
+                variable=effect_variables[name],
+                command=lambda: setattr(self, 'effects', tuple(name for name in EFFECTS if effect_variables[name].get()))
+            )
+            effect_checkbutton.pack(side=tk.LEFT)
+        effects_frame.variables = effect_variables
+        return effects_frame
+
+    def set_performance_profile(self, name: str) -> None:
+        """
+        Select a performance profile from the code, such as the auto-tuner, and show it in the selector.
+
+        :param name: The name of the profile.
+        """
+        self.performance_profile = name
+        self.profile_selector.variable.set(name)
+
+    def create_scale_selector(self, parent: tk.Widget) -> Tuple[tk.OptionMenu, tk.OptionMenu]:
+        scale_label = tk.Label(parent, text="Scale:")
+        scale_label.pack()
+        scale_frame = tk.Frame(parent)
+        scale_frame.pack()
+        root_variable = tk.StringVar(scale_frame, value=NOTE_NAMES[self.scale_root])
+        root_selector = tk.OptionMenu(
+            scale_frame,
+            root_variable,
+            *NOTE_NAMES,
+            command=lambda x: setattr(self, 'scale_root', NOTE_NAMES.index(x))
+        )
+        root_selector.variable = root_variable
+        root_selector.pack(side=tk.LEFT)
+        scale_variable = tk.StringVar(scale_frame, value=self.scale)
+        scale_selector = tk.OptionMenu(
+            scale_frame,
+            scale_variable,
+            *SCALES,
+            command=lambda x: setattr(self, 'scale', x)
+        )
+        scale_selector.variable = scale_variable
+        scale_selector.pack(side=tk.LEFT)
+        return scale_selector, root_selector
+
     def create_tuner_label(self, parent: tk.Widget) -> tk.Label:
         tuner_label = tk.Label(parent)
         tuner_label.pack()
@@ -138,7 +325,7 @@ class ThereminGUI:
     
     def update(self) -> None:
         """
-        Update the GUI.
+        Schedule the update loop, with the current slider values.
         """
         smoothing_factor = self.smoothing_factor_slider.get()
         change_limit = self.change_limit_slider.get()
@@ -147,7 +334,7 @@ class ThereminGUI:
 
     def start(self) -> None:
         """
-        Start the main loop of the GUI.
+        Start the main loop of the GUI, which runs the update loop's scheduled tasks until the window closes.
         """
         self.root.after(0, self.update)
         self.root.mainloop()
@@ -1,5 +1,7 @@
 import cv2
-from mediapipe_utils import draw_landmarks
+from latency import NULL_TRACER
+from roi import RoiTracker, FULL_FRAME
+from frame_pool import FRAME_POOL
 import numpy as np
 
 def normalize_coordinates(coord, max_value, min_value=0):
@@ -15,30 +17,156 @@ def process_hand(hand_landmarks, hand_classification, coord_x, coord_y, image_sh
     hands_coord = {hand_classification: {"x": normalized_x, "y": normalized_y}}
     return hands_coord
 
-def process_image(image, hand_detector, drawing_utils, connections_draw_spec, display_camera_image=False):
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+def hand_key(hands_coord, hand_classification):
+    # Several performers: further hands of the same side become "Right 2", "Right 3"...
+    if hand_classification not in hands_coord:
+        return hand_classification
+    return f"{hand_classification} {sum(hand.startswith(hand_classification) for hand in hands_coord) + 1}"
+
+def process_image(image, hand_detector, drawing_utils, connections_draw_spec, display_camera_image=False, tracer=NULL_TRACER, roi_tracker=None, frame_pool=FRAME_POOL):
+    if roi_tracker is not None:
+        landmarks, handedness = detect_landmarks(image, hand_detector, roi_tracker=roi_tracker, tracer=tracer, frame_pool=frame_pool)
+        image, hands_coord = process_landmarks(image, landmarks, handedness, display_camera_image)
+        tracer.mark("landmark_drawing")
+        return image, hands_coord
+
+    # Imported here so that the landmark array helpers below work without mediapipe
+    from mediapipe_utils import draw_landmarks
+
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=frame_pool.get("rgb", image.shape))
+    tracer.mark("bgr_to_rgb")
     detection_results = hand_detector.process(image_rgb)
+    tracer.mark("hands_process")
     hands_coord = {}
-    
-    black_image = np.zeros_like(image) if not display_camera_image else None
+
+    # The camera image is not needed anymore: blank it in place and draw the hands on it
+    if not display_camera_image:
+        image[:] = 0
 
     if detection_results.multi_hand_landmarks:
         for index, hand_landmarks in enumerate(detection_results.multi_hand_landmarks):
-            hand_classification = detection_results.multi_handedness[index].classification[0].label
+            hand_classification = hand_key(hands_coord, detection_results.multi_handedness[index].classification[0].label)
             index_tip = hand_landmarks.landmark[8]
 
             coord_x, coord_y = float(index_tip.x * image.shape[1]), float(index_tip.y * image.shape[0])
 
             hands_coord.update(process_hand(hand_landmarks, hand_classification, coord_x, coord_y, image.shape))
             draw_landmarks(
-                black_image if not display_camera_image else image, 
+                image, 
                 hand_landmarks, 
                 drawing_utils, 
                 connections_draw_spec,  
                 display_camera_image
             )
-            
-    if not display_camera_image:
-        image[:] = black_image[:]
 
-    return image, hands_coord
\ No newline at end of file
+    tracer.mark("landmark_drawing")
+
+    return image, hands_coord
+
+LANDMARK_COUNT = 21
+INDEX_TIP = 8
+# Same topology as mediapipe's HAND_CONNECTIONS, without importing mediapipe
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+LANDMARK_COLOR = (198, 189, 10)
+
+def detection_to_arrays(detection_results, max_hands):
+    """
+    Convert MediaPipe detection results to compact arrays.
+
+    :param detection_results: The result of Hands.process.
+    :param max_hands: The maximum number of hands to keep.
+    :return: A tuple (landmarks, handedness) where landmarks is a float32 array of shape
+             (hands, 21, 3) of normalized x, y, z coordinates and handedness the list of
+             "Right"/"Left" labels.
+    """
+    if not detection_results.multi_hand_landmarks:
+        return np.empty((0, LANDMARK_COUNT, 3), dtype=np.float32), []
+    hands = detection_results.multi_hand_landmarks[:max_hands]
+    landmarks = np.array(
+        [[(point.x, point.y, point.z) for point in hand.landmark] for hand in hands],
+        dtype=np.float32
+    )
+    handedness = [result.classification[0].label for result in detection_results.multi_handedness[:len(hands)]]
+    return landmarks, handedness
+
+def detect_landmarks(image, hand_detector, max_hands=4, roi_tracker=None, tracer=NULL_TRACER, frame_pool=FRAME_POOL):
+    """
+    Run the hand detector on a BGR frame and return full-frame landmark arrays.
+
+    :param image: The BGR camera frame.
+    :param hand_detector: The MediaPipe hand detector.
+    :param max_hands: The maximum number of hands to keep. (default: 4)
+    :param roi_tracker: Crops and downscales the frame before inference, if given. (default: None)
+    :param tracer: The latency tracer. (default: disabled)
+    :param frame_pool: The pool the RGB (and downscaled) images are written to. (default: the shared pool)
+    :return: A tuple (landmarks, handedness) as returned by detection_to_arrays.
+    """
+    roi = FULL_FRAME
+    if roi_tracker is not None:
+        image, roi = roi_tracker.prepare(image, frame_pool=frame_pool)
+    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=frame_pool.get("rgb", image.shape))
+    tracer.mark("bgr_to_rgb")
+    detection_results = hand_detector.process(image_rgb)
+    tracer.mark("hands_process")
+    landmarks, handedness = detection_to_arrays(detection_results, max_hands)
+    if roi_tracker is not None:
+        RoiTracker.map_back(landmarks, roi)
+        roi_tracker.update(landmarks, roi)
+    return landmarks, handedness
+
+def draw_landmark_arrays(image, landmarks, color=LANDMARK_COLOR, thickness=2, circle_radius=1):
+    """
+    Draw hands given as landmark arrays, like mediapipe's draw_landmarks.
+
+    :param image: The image to draw on.
+    :param landmarks: The normalized landmarks, of shape (hands, 21, 3).
+    :param color: The BGR color of the connections and landmarks.
+    :param thickness: The thickness of the lines. (default: 2)
+    :param circle_radius: The radius of the landmark circles. (default: 1)
+    """
+    height, width = image.shape[:2]
+    for hand in landmarks:
+        points = np.rint(hand[:, :2] * (width, height)).astype(np.int32)
+        for start, end in HAND_CONNECTIONS:
+            cv2.line(image, tuple(points[start]), tuple(points[end]), color, thickness)
+        for point in points:
+            cv2.circle(image, tuple(point), circle_radius, color, thickness)
+
+def hands_from_landmarks(landmarks, handedness, image_shape=(100, 100)):
+    """
+    Compute the hand coordinates of landmark arrays, like process_image.
+
+    :param landmarks: The normalized landmarks, of shape (hands, 21, 3).
+    :param handedness: The "Right"/"Left" label of each hand.
+    :param image_shape: The shape of the image the landmarks are in. (default: (100, 100))
+    :return: A dictionary of the index tip coordinates of each hand, from 0 to 100.
+    """
+    hands_coord = {}
+    for hand_landmarks, label in zip(landmarks, handedness):
+        coord_x = float(hand_landmarks[INDEX_TIP, 0] * image_shape[1])
+        coord_y = float(hand_landmarks[INDEX_TIP, 1] * image_shape[0])
+        hands_coord.update(process_hand(hand_landmarks, hand_key(hands_coord, label), coord_x, coord_y, image_shape))
+    return hands_coord
+
+def process_landmarks(image, landmarks, handedness, display_camera_image=False):
+    """
+    Compute hand coordinates and draw hands from landmark arrays, like process_image.
+
+    :param image: The camera image, drawn on in place.
+    :param landmarks: The normalized landmarks, of shape (hands, 21, 3).
+    :param handedness: The "Right"/"Left" label of each hand.
+    :param display_camera_image: Whether to draw over the camera image instead of black. (default: False)
+    :return: A tuple (image, hands_coord).
+    """
+    hands_coord = hands_from_landmarks(landmarks, handedness, image.shape)
+
+    if not display_camera_image:
+        image[:] = 0
+    draw_landmark_arrays(image, landmarks)
+    return image, hands_coord
@@ -0,0 +1,94 @@
+from typing import Callable, Sequence
+from scheduler import HeadlessLoop
+
+
+class NullLabel:
+    """A label whose text is not shown anywhere."""
+
+    def config(self, **options) -> None:
+        """
+        Ignore a configuration change.
+
+        :param options: The options a Tk label would take.
+        """
+
+
+class HeadlessGUI:
+    """
+    The settings and event loop of ThereminGUI, without a window.
+
+    The update loop's tasks run on a HeadlessLoop instead of the Tk mainloop, with
+    the default settings of the GUI, so the theremin runs on a machine without a
+    display, or without paying for tkinter, PIL and the video canvas. There is no
+    canvas, so the display and tuner tasks are not scheduled.
+    """
+
+    def __init__(
+            self,
+            update_loop: Callable,
+            on_closing: Callable,
+            performance_profile: str = "balanced",
+            auto_profile: bool = False,
+            effects: Sequence[str] = ()
+        ) -> None:
+        """
+        Initialize the headless GUI.
+
+        :param update_loop: The function scheduling the tasks, as given to ThereminGUI.
+        :param on_closing: The function to call to quit, as given to ThereminGUI.
+        :param performance_profile: The name of the initial performance profile. (default: "balanced")
+        :param auto_profile: Whether the profile is chosen by the auto-tuner. (default: False)
+        :param effects: The names of the enabled effects. (default: none)
+        """
+        self.update_loop = update_loop
+        self.on_closing = on_closing
+        self.root = HeadlessLoop()
+        self.smoothing_factor = 0.5
+        self.change_limit = 50
+        self.waveform = "sine"
+        self.pitch_mode = "exponential"
+        self.scale = "chromatic"
+        self.scale_root = 0
+        self.performance_profile = performance_profile
+        self.auto_profile = auto_profile
+        self.effects = tuple(effects)
+        self.display_fps = None
+        self.canvas = None
+        self.frequency_label = NullLabel()
+        self.volume_label = NullLabel()
+        self.framerate_label = NullLabel()
+
+    def update_canvas(self, frame) -> bool:
+        """
+        Skip a frame, there being no canvas to show it on.
+
+        :param frame: The frame.
+        :return: True, the frame counting as displayed.
+        """
+        return True
+
+    def set_performance_profile(self, name: str) -> None:
+        """
+        Select a performance profile.
+
+        :param name: The name of the profile.
+        """
+        self.performance_profile = name
+
+    def update_tuner_canvas(self, frequency: float) -> None:
+        """
+        Skip a tuner update.
+
+        :param frequency: The frequency to show.
+        """
+
+    def start(self) -> None:
+        """
+        Schedule the update loop and run its tasks until on_closing is called or the
+        process is interrupted (Ctrl+C).
+        """
+        self.update_loop(self, smoothing_factor=self.smoothing_factor, change_limit=self.change_limit)
+        try:
+            self.root.mainloop()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,290 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing.shared_memory import SharedMemory
+import cv2
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+import hand_tracking
+from roi import RoiTracker
+
+SLOT_COUNT = 2
+MAX_IN_FLIGHT = 1
+
+
+def create_hand_detector(max_num_hands: int, **model_settings):
+    """
+    Create the MediaPipe hand detector inside the worker process.
+
+    :param max_num_hands: The maximum number of hands to detect.
+    :param model_settings: Further keyword arguments of mediapipe_utils.init_mediapipe, such as model_complexity.
+    :return: The hand detector.
+    """
+    import mediapipe_utils
+    hand_detector, _, _ = mediapipe_utils.init_mediapipe(max_num_hands=max_num_hands, **model_settings)
+    return hand_detector
+
+def close_hand_detector(hand_detector) -> None:
+    """
+    Release the graph and threads of a hand detector, if it has any.
+
+    :param hand_detector: The hand detector.
+    """
+    close = getattr(hand_detector, "close", None)
+    if close is not None:
+        close()
+
+def warm_up(hand_detector, frame_shape: Tuple[int, ...], max_num_hands: int) -> None:
+    """
+    Run a first inference on a blank frame, which initializes the detector's graph.
+
+    :param hand_detector: The hand detector.
+    :param frame_shape: The shape of the frames that will be given to it.
+    :param max_num_hands: The maximum number of hands to detect.
+    """
+    hand_tracking.detect_landmarks(np.zeros(frame_shape, dtype=np.uint8), hand_detector, max_num_hands)
+
+def _worker_main(
+        shared_memory_name: str,
+        frame_shape: Tuple[int, ...],
+        slot_count: int,
+        max_num_hands: int,
+        detector_factory: Callable,
+        requests: mp.Queue,
+        results: mp.Queue,
+        inference_width: Optional[int] = None,
+        use_roi: bool = False,
+        model_settings: Optional[dict] = None
+    ) -> None:
+    """
+    Run inference on the frames written to the shared-memory slots until told to stop.
+
+    :param shared_memory_name: The name of the shared-memory block holding the frame slots.
+    :param frame_shape: The shape of one BGR frame.
+    :param slot_count: The number of frame slots.
+    :param max_num_hands: The maximum number of hands to detect.
+    :param detector_factory: Creates the hand detector from max_num_hands.
+    :param requests: Queue of (slot, frame_id, timestamp) requests, ("configure", model_settings,
+                     inference_width) requests to rebuild the detector, and None to stop.
+    :param results: Queue of (slot, frame_id, timestamp, landmarks, handedness, inference_time) results.
+    :param inference_width: The maximum width of the image given to the detector. (default: None, full resolution)
+    :param use_roi: Whether to crop around the hands of the previous frame. (default: False)
+    :param model_settings: Keyword arguments of the detector factory beyond max_num_hands. (default: None)
+    """
+    hand_detector = detector_factory(max_num_hands, **(model_settings or {}))
+    # The first inference initializes the graph: do it before reporting ready
+    warm_up(hand_detector, frame_shape, max_num_hands)
+    roi_tracker = None
+    if use_roi or inference_width is not None:
+        roi_tracker = RoiTracker(inference_width=inference_width, use_roi=use_roi)
+    shared_memory = SharedMemory(name=shared_memory_name)
+    frames = np.ndarray((slot_count,) + tuple(frame_shape), dtype=np.uint8, buffer=shared_memory.buf)
+    results.put(None)  # Ready
+
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            if request[0] == "configure":
+                _, model_settings, inference_width = request
+                close_hand_detector(hand_detector)
+                hand_detector = detector_factory(max_num_hands, **model_settings)
+                warm_up(hand_detector, frame_shape, max_num_hands)
+                if roi_tracker is not None:
+                    roi_tracker.inference_width = inference_width
+                elif inference_width is not None:
+                    roi_tracker = RoiTracker(inference_width=inference_width, use_roi=use_roi)
+                continue
+            slot, frame_id, timestamp = request
+            start = time.perf_counter()
+            landmarks, handedness = hand_tracking.detect_landmarks(frames[slot], hand_detector, max_num_hands, roi_tracker)
+            results.put((slot, frame_id, timestamp, landmarks, handedness, time.perf_counter() - start))
+    finally:
+        close_hand_detector(hand_detector)
+        del frames
+        shared_memory.close()
+
+
+class InferenceResult:
+    """The hands detected in one frame."""
+
+    def __init__(
+            self,
+            frame_id: int,
+            timestamp: float,
+            landmarks: np.ndarray,
+            handedness: List[str],
+            inference_time: float = 0.0
+        ) -> None:
+        """
+        Initialize an inference result.
+
+        :param frame_id: The ID given to the frame when it was submitted.
+        :param timestamp: The capture timestamp given with the frame.
+        :param landmarks: The normalized landmarks, of shape (hands, 21, 3).
+        :param handedness: The "Right"/"Left" label of each hand.
+        :param inference_time: The time the worker spent detecting the hands, in seconds. (default: 0)
+        """
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.landmarks = landmarks
+        self.handedness = handedness
+        self.inference_time = inference_time
+        self.received = time.perf_counter()
+
+
+class InferenceWorker:
+    """
+    Hand inference in a separate process, fed through shared memory.
+
+    The worker process owns the MediaPipe Hands instance. Frames are copied into a
+    small ring of shared-memory slots and only the slot index travels through the
+    request queue; the worker answers with compact landmark arrays. submit and poll
+    never block, so the caller keeps running on the last known hands while a frame
+    is being processed.
+    """
+
+    def __init__(
+            self,
+            frame_shape: Tuple[int, ...],
+            max_num_hands: int = 2,
+            slot_count: int = SLOT_COUNT,
+            max_in_flight: int = MAX_IN_FLIGHT,
+            detector_factory: Callable = create_hand_detector,
+            inference_width: Optional[int] = None,
+            use_roi: bool = False,
+            model_settings: Optional[dict] = None
+        ) -> None:
+        """
+        Initialize the worker, without starting it.
+
+        :param frame_shape: The shape of the BGR frames that will be submitted.
+        :param max_num_hands: The maximum number of hands to detect. (default: 2)
+        :param slot_count: The number of shared-memory frame slots. (default: 2)
+        :param max_in_flight: The maximum number of frames submitted and not answered yet. (default: 1)
+        :param detector_factory: A picklable callable creating the hand detector in the
+                                 worker from max_num_hands. (default: create_hand_detector)
+        :param inference_width: The maximum width of the image given to the detector. (default: None, full resolution)
+        :param use_roi: Whether to crop around the hands of the previous frame. (default: False)
+        :param model_settings: Keyword arguments of the detector factory beyond max_num_hands,
+                               such as model_complexity. (default: None)
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.max_num_hands = max_num_hands
+        self.slot_count = slot_count
+        self.max_in_flight = min(max_in_flight, slot_count)
+        self.detector_factory = detector_factory
+        self.inference_width = inference_width
+        self.use_roi = use_roi
+        self.model_settings = dict(model_settings or {})
+        self.ready = False
+        self.submitted_frames = 0
+        self.skipped_frames = 0
+        self._free_slots = list(range(slot_count))
+        self._context = mp.get_context("spawn")
+        self._shared_memory = None
+        self._frames = None
+        self._process = None
+        self._requests = None
+        self._results = None
+
+    def start(self) -> None:
+        """
+        Allocate the shared-memory slots and start the worker process.
+        """
+        frame_bytes = int(np.prod(self.frame_shape))
+        self._shared_memory = SharedMemory(create=True, size=frame_bytes * self.slot_count)
+        self._frames = np.ndarray((self.slot_count,) + self.frame_shape, dtype=np.uint8, buffer=self._shared_memory.buf)
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(
+                self._shared_memory.name, self.frame_shape, self.slot_count, self.max_num_hands,
+                self.detector_factory, self._requests, self._results,
+                self.inference_width, self.use_roi, self.model_settings
+            ),
+            name="hand-inference",
+            daemon=True
+        )
+        self._process.start()
+
+    @property
+    def in_flight(self) -> int:
+        """The number of frames submitted and not answered yet."""
+        return self.slot_count - len(self._free_slots)
+
+    @property
+    def accepting(self) -> bool:
+        """Whether submit would take a frame now."""
+        return self.ready and self.in_flight < self.max_in_flight
+
+    def submit(self, frame: np.ndarray, timestamp: float = 0.0) -> bool:
+        """
+        Hand a frame to the worker if it can take one now.
+
+        :param frame: The BGR frame, of the shape given at construction.
+        :param timestamp: The capture timestamp, returned with the result. (default: 0.0)
+        :return: True if the frame was submitted, False if it was skipped.
+        """
+        if not self.accepting:
+            self.skipped_frames += 1
+            return False
+        slot = self._free_slots.pop()
+        self._frames[slot] = frame
+        self._requests.put((slot, self.submitted_frames, timestamp))
+        self.submitted_frames += 1
+        return True
+
+    def configure(self, model_settings: dict, inference_width: Optional[int]) -> None:
+        """
+        Rebuild the detector of the running worker with other settings, without restarting it.
+
+        Frames submitted meanwhile wait for the new detector, which is warmed up first.
+
+        :param model_settings: Keyword arguments of the detector factory beyond max_num_hands.
+        :param inference_width: The maximum width of the image given to the detector, None for full resolution.
+        """
+        self.model_settings = dict(model_settings)
+        self.inference_width = inference_width
+        if self._process is not None:
+            self._requests.put(("configure", self.model_settings, inference_width))
+
+    def poll(self) -> Optional[InferenceResult]:
+        """
+        Collect the answers received so far.
+
+        :return: The newest result, or None if no answer arrived since the last poll.
+        """
+        newest = None
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                return newest
+            if message is None:
+                self.ready = True
+                continue
+            slot, frame_id, timestamp, landmarks, handedness, inference_time = message
+            self._free_slots.append(slot)
+            newest = InferenceResult(frame_id, timestamp, landmarks, handedness, inference_time)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Stop the worker process and free the shared memory.
+
+        :param timeout: How long to wait for the process to exit before terminating it. (default: 2.0)
+        """
+        if self._process is not None:
+            self._requests.put(None)
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._shared_memory is not None:
+            self._frames = None
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
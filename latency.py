@@ -0,0 +1,123 @@
+import json
+import time
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+WINDOW_SIZE = 1024
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyTracer:
+    """
+    Per-stage timing of the update loop with rolling percentiles.
+
+    A frame is stamped with begin_frame, then mark(stage) is called after each stage:
+    the time since the previous stamp is charged to that stage. Durations measured
+    elsewhere (in the audio thread, for instance) can be added with record. The
+    last window_size durations of every stage are kept in a ring buffer.
+
+    When the tracer is disabled every method returns immediately, so the calls can
+    stay in the hot loop.
+    """
+
+    def __init__(self, enabled: bool = False, window_size: int = WINDOW_SIZE) -> None:
+        """
+        Initialize the tracer.
+
+        :param enabled: Whether timings are recorded. (default: False)
+        :param window_size: The number of durations kept per stage. (default: 1024)
+        """
+        self.enabled = enabled
+        self.window_size = window_size
+        self.frame_start = 0.0
+        self._last_stamp = 0.0
+        self._durations: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+
+    def begin_frame(self, timestamp: Optional[float] = None) -> None:
+        """
+        Start timing a frame.
+
+        :param timestamp: The time.perf_counter() time the frame was captured at, if known.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.frame_start = timestamp if timestamp is not None else now
+        self._last_stamp = now
+
+    def set_capture_time(self, timestamp: float) -> None:
+        """
+        Date the current frame back to its capture, once it is known.
+
+        :param timestamp: The time.perf_counter() time the frame was captured at.
+        """
+        if not self.enabled:
+            return
+        self.frame_start = min(self.frame_start, timestamp)
+
+    def mark(self, stage: str) -> None:
+        """
+        Charge the time since the previous stamp to a stage.
+
+        :param stage: The name of the stage that just finished.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.record(stage, now - self._last_stamp)
+        self._last_stamp = now
+
+    def end_frame(self) -> None:
+        """
+        Record the total time since the frame was captured.
+        """
+        if not self.enabled:
+            return
+        self.record("frame_total", time.perf_counter() - self.frame_start)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Add a duration to a stage.
+
+        :param stage: The name of the stage.
+        :param seconds: The duration in seconds.
+        """
+        if not self.enabled:
+            return
+        durations = self._durations.get(stage)
+        if durations is None:
+            durations = self._durations[stage] = np.zeros(self.window_size)
+            self._counts[stage] = 0
+        durations[self._counts[stage] % self.window_size] = seconds
+        self._counts[stage] += 1
+
+    def summary(self, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """
+        Compute the statistics of every stage over the rolling window.
+
+        :param percentiles: The percentiles to compute. (default: 50, 95 and 99)
+        :return: For each stage, its count and its mean, max and percentiles in milliseconds.
+        """
+        summary = {}
+        for stage, durations in self._durations.items():
+            count = self._counts[stage]
+            window = durations[:min(count, self.window_size)] * 1000
+            stats = {"count": count, "mean_ms": float(window.mean()), "max_ms": float(window.max())}
+            for percentile, value in zip(percentiles, np.percentile(window, percentiles)):
+                stats[f"p{percentile:g}_ms"] = float(value)
+            summary[stage] = stats
+        return summary
+
+    def dump(self, path: str) -> None:
+        """
+        Write the summary of every stage to a JSON file.
+
+        :param path: The path of the file to write.
+        """
+        with open(path, "w") as dump_file:
+            json.dump(self.summary(), dump_file, indent=2)
+
+
+# Shared disabled tracer, the default wherever a tracer is optional
+NULL_TRACER = LatencyTracer(enabled=False)
@@ -1,23 +1,120 @@
-import cv2
-import tkinter as tk
-from PIL import ImageTk
 import time
-import PIL
-import tkinter
+
+# Cold-start times are measured from here, before the heavy imports
+MODULE_START = time.perf_counter()
+
+import argparse
+import json
+import sys
+import threading
+import cv2
+import numpy as np
 import hand_tracking
 import midi
-import mediapipe_utils
-from camera import Camera
+from frame_sources import open_frame_source
 import oscillator
-from smoothing import DataSmoother
-from gui import ThereminGUI
+import voices
+from latency import LatencyTracer
+from inference_worker import InferenceWorker
+from roi import RoiTracker
+from scheduler import Scheduler
+from frame_pool import FRAME_POOL, FramePool
+from smoothing import LandmarkFilter
+from motion_gate import MotionGate
+from pitch_detector import AudioRing, PitchDetector
+from effects import EFFECTS, create_effects_chain
+from control_output import open_control_output
+from profiles import PROFILES, ProfileTuner
+from session import SessionRecorder, SessionRecording, SessionReplayer
+import os
 from numpy import ndarray
-from typing import Tuple, Optional, Dict
+from typing import Tuple, Optional, Dict, List
 
 quit_flag = False
-# Create DataSmoother instances for frequency and volume
-frequency_smoother = DataSmoother()
-volume_smoother = DataSmoother()
+# Hand position to frequency mapping, switched by the pitch mapping and scale selectors
+pitch_map = midi.PitchMap()
+SCALE_LINE_COLOR = (90, 90, 90)
+SCALE_ROOT_COLOR = (170, 170, 170)
+# Where frames come from: a camera device ID, "synthetic", a video file, a directory
+# of images or a .npz landmark track
+source = os.environ.get("THEREMIN_SOURCE", "0")
+# Use the landmarks known by synthetic sources instead of running inference
+use_source_landmarks = True
+# Set THEREMIN_TRACE to a file path to record per-stage latencies and dump them there on exit
+trace_path = os.environ.get("THEREMIN_TRACE")
+tracer = LatencyTracer(enabled=trace_path is not None)
+# Number of simultaneous voices: 1 plays the classic right/left theremin, more
+# turns every right hand in frame into its own voice
+max_voices = 1
+# Run MediaPipe in a worker process fed through shared memory, so slow inference
+# frames do not freeze the GUI and the sound
+use_inference_worker = True
+# The MediaPipe model, confidences, inference width and display rate, bundled in a
+# profile of profiles.PROFILES, which can be switched while running. With
+# auto_tune_profile, the profile steps down or up to hold inference_target_fps
+performance_profile = os.environ.get("THEREMIN_PROFILE", "balanced")
+auto_tune_profile = False
+profile_tuner = None
+hand_detector = None
+pending_hand_detector = None
+# Crop inference around the hands of the previous frame, and cap the width of the
+# image given to MediaPipe (None for full resolution, set by the profile) to trade accuracy for FPS
+use_roi = True
+inference_width = PROFILES["balanced"].inference_width
+roi_tracker = None
+# Filter every landmark of every hand (One-Euro), and drive the sound from the hands
+# predicted at the time the next audio block is heard, between inference frames too
+use_landmark_filter = True
+landmark_filter = None
+# Only run inference when the hands (or, without hands, the frame) moved, forcing a
+# refresh after a few frames, and skip more on machines too slow for inference_target_fps
+use_motion_gate = True
+inference_target_fps = 30
+motion_gate = None
+# Show on the tuner the pitch detected in the sound actually played, rather than the
+# commanded frequency, analysed at tuner_rate
+use_output_pitch = True
+tuner_rate = 15
+output_ring = None
+pitch_detector = None
+# Set THEREMIN_OUTPUT to send frequency and volume to other software: "osc:host:port",
+# "midi-udp:host:port", "midi[:port name]" or "midi-virtual[:port name]"
+control_output_spec = os.environ.get("THEREMIN_OUTPUT")
+control_output_rate = 100
+control_output = None
+# Set THEREMIN_EFFECTS to the effects enabled at start, comma-separated among EFFECTS.
+# The right hand's x sets the vibrato depth and the left hand's x the tremolo depth,
+# both deeper as the hand moves outwards
+enabled_effects = tuple(name for name in os.environ.get("THEREMIN_EFFECTS", "").split(",") if name)
+effects_chain = None
+# Set THEREMIN_RECORD to a file path to record the session there (per frame: capture
+# time, hands, frequency and volume), and THEREMIN_REPLAY to a recording to play it
+# back instead of the camera, without MediaPipe
+record_path = os.environ.get("THEREMIN_RECORD")
+replay_path = os.environ.get("THEREMIN_REPLAY")
+session_recorder = None
+session_replayer = None
+inference_worker = None
+last_landmarks = None
+last_handedness = []
+# Rates of the scheduled tasks, in runs per second. Capture only polls for a new
+# frame, so it runs faster than the camera; the video is shown at the GUI's display_fps
+capture_rate = 120
+inference_poll_rate = 200
+control_rate = 100
+scheduler = None
+latest_frame = None
+frame_timestamp = 0.0
+# The capture time of the frame the current hands were detected in, sent with the control values
+hands_timestamp = 0.0
+frame_displayed = True
+hands_coord = {}
+hands_pending = False
+frequency = None
+previous_volume = 0
+previous_time = 0
+# Cold-start milestones, in seconds since the module started loading
+startup_times: Dict[str, float] = {}
 
 
 def on_closing() -> None:
@@ -25,78 +122,249 @@ def on_closing() -> None:
     Set the global quit_flag to True and destroy the theremin_gui root window.
 
     This function is typically used as a callback for handling the closing event
-    of the theremin_gui application window. It sets the global quit_flag to True
-    to signal the main update loop to exit, and then destroys the root window
-    of the theremin_gui, effectively closing the application.
+    of the theremin_gui application window. It sets the global quit_flag to True,
+    stops the scheduled update tasks, and then destroys the root window of the
+    theremin_gui, which ends its mainloop and closes the application.
     """
     global quit_flag
     quit_flag = True
+    if scheduler is not None:
+        scheduler.stop()
     theremin_gui.root.destroy()
-    
-def read_camera() -> ndarray:
+
+def mark_startup(milestone: str) -> None:
     """
-    Read a frame from the camera and flip it horizontally.
+    Record the time a cold-start milestone is first reached.
 
-    This function reads a frame from the camera, flips it horizontally, and
-    returns the modified frame. Flipping the frame horizontally is useful for
-    creating a mirror effect, which is often more intuitive for users when
-    interacting with applications that involve hand tracking and gesture recognition.
+    Args:
+        milestone (str): The name of the milestone, such as "audio" or "first_sound".
+    """
+    if milestone not in startup_times:
+        startup_times[milestone] = time.perf_counter() - MODULE_START
+
+def format_startup_times() -> str:
+    """
+    Describe the cold-start milestones reached, in the order they were reached.
 
     Returns:
-        frame (numpy.ndarray): The captured and horizontally flipped frame.
+        str: A line such as "Cold start: imports 180 ms, audio 240 ms, ...".
     """
-    success, frame = camera.read()
-    frame = camera.flip_horizontal(frame)
-    return frame
+    milestones = sorted(startup_times.items(), key=lambda item: item[1])
+    return "Cold start: " + ", ".join(f"{name.replace('_', ' ')} {seconds * 1000:.0f} ms" for name, seconds in milestones)
+
+def read_camera() -> Tuple[Optional[ndarray], float]:
+    """
+    Read the newest frame from the frame source, if there is one, and flip it horizontally.
+
+    This function takes the newest frame of the frame source (grabbed by the
+    camera's capture thread, or read from a file or synthetic source) without
+    waiting for it, so the event loop never blocks on the camera, flips it
+    horizontally, and returns the modified frame. Flipping the frame
+    horizontally is useful for creating a mirror effect, which is often more
+    intuitive for users when interacting with applications that involve hand
+    tracking and gesture recognition.
 
-def process_frame(frame: ndarray) -> Tuple[ndarray, dict]:
+    Returns:
+        Tuple[Optional[numpy.ndarray], float]: The captured and horizontally flipped frame,
+                                               or None if no new frame is ready, and
+                                               its capture timestamp.
+    """
+    success, frame, timestamp = frame_source.read_latest(timeout=0)
+    tracer.mark("camera_read")
+    if not success:
+        return None, 0.0
+    tracer.set_capture_time(timestamp)
+    # The flipped frame lives in a pooled buffer, overwritten by the next frame's flip
+    frame = frame_source.flip_horizontal(frame, dst=FRAME_POOL.get("flip", frame.shape))
+    tracer.mark("flip")
+    return frame, timestamp
+
+def process_frame(frame: ndarray, timestamp: float) -> Tuple[ndarray, dict]:
     """
-    Process the input frame using hand_tracking.process_image.
+    Detect hands in the input frame and draw their landmarks on it.
 
-    This function processes the input frame using the hand_tracking.process_image function.
-    It uses the hand_detector, drawing_utils, and connections_draw_spec objects to detect
-    and draw hand landmarks on the frame.
+    Without the inference worker, this function processes the input frame inline with
+    hand_tracking.process_image, using the hand_detector, drawing_utils, and
+    connections_draw_spec objects, or with hand_tracking.detect_landmarks when the
+    landmarks are filtered or gated. With it, the frame is handed to the worker process
+    if it is idle, and the hands of the newest answer collected by poll_inference (the
+    last known hands while a frame is in flight) are drawn with
+    hand_tracking.process_landmarks.
 
     Args:
         frame (numpy.ndarray): The input frame to be processed.
+        timestamp (float): The capture timestamp of the frame.
 
     Returns:
         Tuple[numpy.ndarray, dict]: A tuple containing the processed frame with drawn hand landmarks
                                     and a dictionary containing hand coordinates.
     """
-    return hand_tracking.process_image(frame, hand_detector, drawing_utils, connections_draw_spec)
+    global inference_worker, last_landmarks, last_handedness, hand_detector, pending_hand_detector, hands_timestamp
+    if use_source_landmarks and frame_source.landmarks is not None:
+        hands_timestamp = timestamp
+        # Synthetic sources know their hands: skip inference for deterministic runs
+        last_landmarks, last_handedness = filter_landmarks(frame_source.landmarks, frame_source.handedness, timestamp)
+        frame, hands_coord = hand_tracking.process_landmarks(frame, last_landmarks, last_handedness)
+        tracer.mark("landmark_drawing")
+        return frame, hands_coord
+
+    if not use_inference_worker:
+        hands_timestamp = timestamp
+        if pending_hand_detector is not None:
+            # A profile switch built and warmed up a new detector in the background
+            hand_detector.close()
+            hand_detector, pending_hand_detector = pending_hand_detector, None
+        if landmark_filter is None and motion_gate is None and not record_path:
+            start = time.perf_counter()
+            frame, hands_coord = hand_tracking.process_image(frame, hand_detector, drawing_utils, connections_draw_spec, tracer=tracer, roi_tracker=roi_tracker)
+            tune_profile(time.perf_counter() - start)
+            return frame, hands_coord
+        if motion_gate is None or motion_gate.should_infer(frame, last_landmarks):
+            start = time.perf_counter()
+            landmarks, handedness = hand_tracking.detect_landmarks(
+                frame, hand_detector, max_hands=max_num_hands, roi_tracker=roi_tracker, tracer=tracer
+            )
+            inference_time = time.perf_counter() - start
+            if motion_gate is not None:
+                motion_gate.record_inference(inference_time)
+            tune_profile(inference_time)
+            last_landmarks, last_handedness = filter_landmarks(landmarks, handedness, timestamp)
+        elif landmark_filter is not None:
+            # Nothing moved enough: follow the previous hands along their velocity
+            last_landmarks, last_handedness = landmark_filter.predict(timestamp)
+        tracer.mark("motion_gate")
+        frame, hands_coord = hand_tracking.process_landmarks(frame, last_landmarks, last_handedness)
+        tracer.mark("landmark_drawing")
+        return frame, hands_coord
+
+    if inference_worker is None or inference_worker.frame_shape != frame.shape:
+        # Started early when the source announces its frame size, otherwise sized from the first frame
+        start_inference_worker(frame.shape)
+    if inference_worker.accepting and (motion_gate is None or motion_gate.should_infer(frame, last_landmarks)):
+        inference_worker.submit(frame, timestamp)
+    tracer.mark("inference_submit")
+
+    if last_landmarks is None:
+        frame[:] = 0
+        return frame, {}
+    frame, hands_coord = hand_tracking.process_landmarks(frame, last_landmarks, last_handedness)
+    tracer.mark("landmark_drawing")
+    return frame, hands_coord
+
+def filter_landmarks(landmarks: ndarray, handedness: List[str], timestamp: float) -> Tuple[ndarray, List[str]]:
+    """
+    Filter the landmarks of a frame with the landmark filter, if it is enabled.
+
+    Args:
+        landmarks (numpy.ndarray): The normalized landmarks of the frame, of shape (hands, 21, 3).
+        handedness (List[str]): The "Right"/"Left" label of each hand.
+        timestamp (float): The capture timestamp of the frame.
+
+    Returns:
+        Tuple[numpy.ndarray, List[str]]: The filtered landmarks and their labels.
+    """
+    if landmark_filter is None:
+        return landmarks, handedness
+    landmarks = landmark_filter.update(landmarks, handedness, timestamp)
+    return landmarks, landmark_filter.handedness
+
+def poll_inference() -> None:
+    """
+    Collect the newest answer of the inference worker, if any.
+
+    Polling often frees the worker as soon as it answers, so the next captured frame
+    can be submitted right away instead of waiting for the following one.
+    """
+    global last_landmarks, last_handedness, hands_timestamp
+    if inference_worker is None:
+        return
+    result = inference_worker.poll()
+    if inference_worker.ready:
+        mark_startup("hand_tracking")
+    if result is not None:
+        tune_profile(result.inference_time)
+        last_landmarks, last_handedness = filter_landmarks(result.landmarks, result.handedness, result.timestamp)
+        hands_timestamp = result.timestamp
+        tracer.record("inference_round_trip", result.received - result.timestamp)
+
+def tune_profile(inference_time: float) -> None:
+    """
+    Give the duration of an inference to the profile auto-tuner, when it is enabled.
+
+    A switch decided by the tuner goes through the GUI's profile selection, which the
+    control task applies like a switch made by hand.
+
+    Args:
+        inference_time (float): The duration of the inference, in seconds.
+    """
+    if profile_tuner is None or not theremin_gui.auto_profile:
+        return
+    profile = profile_tuner.update(inference_time)
+    if profile is not None:
+        print(f"Performance profile: {profile} (inference took {profile_tuner.costs[performance_profile] * 1000:.1f} ms)")
+        theremin_gui.set_performance_profile(profile)
+
+def apply_profile(name: str) -> None:
+    """
+    Switch to a performance profile while running, without restarting anything.
 
-def update_smoothing_factors(smoothing_factor: Optional[float]) -> None:
+    The worker rebuilds its detector between two frames; inline, the new detector
+    is built and warmed up in a thread and swapped in by process_frame, so the loop
+    never waits for MediaPipe. The inference width and the display rate change at once.
+
+    Args:
+        name (str): The name of the profile in profiles.PROFILES.
+    """
+    global performance_profile, inference_width, roi_tracker
+    profile = PROFILES[name]
+    performance_profile, inference_width = name, profile.inference_width
+    if inference_worker is not None:
+        inference_worker.configure(profile.model_settings, profile.inference_width)
+    elif hand_detector is not None:
+        frame_shape = latest_frame.shape if latest_frame is not None else (480, 640, 3)
+        threading.Thread(target=rebuild_hand_detector, args=(frame_shape,), name="hand-detector-rebuild", daemon=True).start()
+        if roi_tracker is not None:
+            roi_tracker.inference_width = inference_width
+        elif inference_width is not None:
+            roi_tracker = RoiTracker(inference_width=inference_width, use_roi=use_roi)
+    if theremin_gui.canvas is not None:
+        theremin_gui.display_fps = profile.display_fps
+        scheduler.set_rate("display", profile.display_fps or capture_rate)
+    if profile_tuner is not None:
+        profile_tuner.select(name)
+
+def update_smoothing(smoothing_factor: Optional[float], change_limit: Optional[float]) -> None:
     """
-    Update the smoothing factors of the frequency_smoother and volume_smoother objects.
+    Map the smoothing factor and change limit onto the oscillator's audio-rate ramps.
 
-    This function updates the smoothing factors of the frequency_smoother and
-    volume_smoother objects if a valid smoothing_factor value is provided.
+    The GUI values are expressed per video frame at the reference frame rate; the
+    oscillator turns them into a time constant and a slew rate so that the sound
+    moves the same way whatever frame rate the camera actually delivers.
 
     Args:
-        smoothing_factor (Optional[float]): The new smoothing factor value to be set for both
-                                            frequency_smoother and volume_smoother objects.
-                                            If None, no update will be performed.
+        smoothing_factor (Optional[float]): The new smoothing factor value. If None, no update will be performed.
+        change_limit (Optional[float]): The new change limit value. If None, no update will be performed.
     """
-    if smoothing_factor is not None:
-        frequency_smoother.smoothing_factor = smoothing_factor
-        volume_smoother.smoothing_factor = smoothing_factor
+    if smoothing_factor is not None and change_limit is not None:
+        synth.set_smoothing(smoothing_factor, change_limit)
 
-def update_change_limits(change_limit: Optional[float]) -> None:
+def update_effects(hands_coord: Dict[str, Dict[str, float]]) -> None:
     """
-    Update the smoothing factors of the frequency_smoother and volume_smoother objects.
+    Follow the GUI's effect selection, and set the modulation depths from the hands.
 
-    This function updates the smoothing factors of the frequency_smoother and
-    volume_smoother objects if a valid smoothing_factor value is provided.
+    The depth of each modulation follows its hand horizontally, from none at the
+    middle of the frame (where both hands meet) to full depth at its side. A hand
+    out of view keeps its last depth.
 
     Args:
-        smoothing_factor (Optional[float]): The new smoothing factor value to be set for both
-                                            frequency_smoother and volume_smoother objects.
-                                            If None, no update will be performed.
+        hands_coord (Dict[str, Dict[str, float]]): A dictionary containing hand coordinates.
     """
-    if change_limit is not None:
-        frequency_smoother.change_limit = change_limit
-        volume_smoother.change_limit = change_limit
+    if theremin_gui.effects != effects_chain.enabled:
+        effects_chain.set_enabled(theremin_gui.effects)
+    if "Right" in hands_coord and "vibrato" in theremin_gui.effects:
+        effects_chain["vibrato"].set_depth((hands_coord["Right"]["x"] - 50) / 50)
+    if "Left" in hands_coord and "tremolo" in theremin_gui.effects:
+        effects_chain["tremolo"].set_depth((50 - hands_coord["Left"]["x"]) / 50)
 
 def update_hands_display(frame: ndarray, hands_coord: Dict[str, Dict[str, float]]) -> None:
     """
@@ -113,107 +381,109 @@ def update_hands_display(frame: ndarray, hands_coord: Dict[str, Dict[str, float]
                                                   and float values.
     """
     for hand, coords in hands_coord.items():
+        if hand not in ("Right", "Left"):
+            continue
         display_text(frame, f"{hand} X: {hands_coord[hand]['x']:.2f}", (7, 110 if hand == 'Right' else 170), font_scale=1.5)
         display_text(frame, f"{hand} Y: {hands_coord[hand]['y']:.2f}", (7, 140 if hand == 'Right' else 200), font_scale=1.5)
 
+def draw_scale_lines(frame: ndarray) -> None:
+    """
+    Draw a line on the frame at the height of every note of the selected scale.
+
+    The rows come from the pitch map's compiled table, so the lines match the notes
+    the right hand plays. Root notes are drawn brighter.
+
+    Args:
+        frame (numpy.ndarray): The frame to draw on.
+    """
+    width = frame.shape[1]
+    for row, name, is_root in pitch_map.scale_lines(frame.shape[0]):
+        color = SCALE_ROOT_COLOR if is_root else SCALE_LINE_COLOR
+        cv2.line(frame, (0, row), (width, row), color, 1)
+        cv2.putText(frame, name, (width - 40, row - 2), cv2.FONT_HERSHEY_PLAIN, 0.8, color, 1)
+
 def update_frequency_and_volume_labels(
         hands_coord: Dict[str, Dict[str, float]],
         previous_volume: float
-    ) -> Tuple[float, float]:
+    ) -> Tuple[Optional[float], float]:
     """
-    Update the frequency and volume labels based on the given hand coordinates.
+    Compute the frequency and volume targets from the hand coordinates and update the labels.
 
-    This function updates the frequency and volume labels based on the hand coordinates.
-    It calculates the frequency and volume values, smooths them using the frequency_smoother
-    and volume_smoother objects, and updates the corresponding labels.
+    This function calculates the target frequency from the right hand, through the
+    pitch map, and the target volume from the left hand. Smoothing no longer happens here, once per video frame:
+    the targets are smoothed per sample by the oscillator, and the labels show the
+    values the oscillator is currently playing.
 
     Args:
         hands_coord (Dict[str, Dict[str, float]]): A dictionary containing hand coordinates.
                                                   The keys are 'Right' and/or 'Left', and the
                                                   values are dictionaries with 'x' and 'y' keys
                                                   and float values.
-        previous_volume (float): The previous volume value.
+        previous_volume (float): The previous volume target, held while the left hand is not detected.
 
     Returns:
-        Tuple[float, float]: A tuple containing the smoothed frequency and volume values.
+        Tuple[Optional[float], float]: A tuple containing the target frequency (None without
+                                       a right hand) and the target volume.
     """
-    smooth_frequency = None
-    smooth_volume = None
-    
+    frequency = None
+    volume = previous_volume
+
     if "Right" in hands_coord:
-        frequency = midi.y_to_frequency(hands_coord["Right"]["y"])
-        smooth_frequency = frequency_smoother.smooth(frequency)
-        frequency_label.config(text=f"Freq : {smooth_frequency:.2f}")
+        frequency = pitch_map.frequency(hands_coord["Right"]["y"])
+        frequency_label.config(text=f"Freq : {synth.frequency:.2f}")
 
     if "Left" in hands_coord:
         volume = midi.y_to_volume(hands_coord["Left"]["y"])
-        smooth_volume = volume_smoother.smooth(volume)
-        volume_label.config(text=f"Vol : {smooth_volume:.0f}")
-    else:
-        smooth_volume = volume_smoother.smooth(previous_volume)
+        volume_label.config(text=f"Vol : {synth.volume:.0f}")
 
-    return smooth_frequency, smooth_volume
+    return frequency, volume
 
-def play_sound(
-        smooth_frequency: float, 
-        smooth_volume: float, 
-        previous_frequency: float, 
-        previous_volume: float
-    ) -> Tuple[float, float, float]:
+def play_sound(frequency: Optional[float], volume: Optional[float]) -> None:
     """
-    Play a sine wave sound based on the given smoothed frequency and volume values.
+    Drive the streaming oscillator with the given frequency and volume targets.
 
-    This function plays a sine wave sound if the difference between the current smoothed
-    frequency (smooth_frequency) and the previous frequency (previous_frequency) is greater
-    than 1, or if the difference between the current smoothed volume (smooth_volume) and
-    the previous volume (previous_volume) is greater than 1. If a sound was playing, it
-    stops the previous sound and plays a new sound with the current smoothed frequency
-    and volume. Finally, it updates the previous_frequency and previous_volume variables
-    with the new smoothed values.
+    This function sets the targets of the persistent streaming oscillator, which moves
+    towards them sample by sample from the next audio block on. When no frequency is
+    available (the right hand is not detected), the oscillator fades to silence
+    instead of holding the last note.
 
     Args:
-        smooth_frequency (float): The current smoothed frequency value.
-        smooth_volume (float): The current smoothed volume value.
-        previous_frequency (float): The previous frequency value.
-        previous_volume (float): The previous volume value.
-
-    Returns:
-        Tuple[float, float, float]: A tuple containing the sound object, the updated
-                                     previous_frequency, and the updated previous_volume.
+        frequency (Optional[float]): The target frequency value, if any.
+        volume (Optional[float]): The target volume value, if any.
     """
-    sound = None
-    if (smooth_frequency is None) or (previous_frequency is None) or (smooth_volume is None) or (previous_volume is None):
-        return None, None, None
-    
-    if abs(smooth_frequency - previous_frequency) > 1 or abs(smooth_volume - previous_volume) > 1:
-        if sound:
-            oscillator.stop_sound(sound)
-        sound = oscillator.play_sine_wave(smooth_frequency, 1, smooth_volume)
-        previous_frequency = smooth_frequency
-        previous_volume = smooth_volume
+    if frequency is None:
+        synth.set_target(None, 0)
+        return
 
-    return sound, previous_frequency, previous_volume
+    synth.set_target(frequency, volume)
 
-def update_canvas(frame: ndarray) -> None:
+def play_voices(hands_coord: Dict[str, Dict[str, float]], volume: float) -> None:
     """
-    Update the canvas with the given frame.
+    Drive one voice of the polyphonic oscillator per right hand in frame.
 
-    This function converts the input frame from BGR to RGB, creates a PhotoImage
-    object from the frame, and then updates the canvas with the new image.
+    This function matches every right hand ("Right", "Right 2", ...) to a voice with
+    a stable ID through the voice allocator, then sets the frequency of each voice
+    from its hand's y-coordinate. All voices share the volume of the left hand.
 
     Args:
-        frame (numpy.ndarray): The input frame to display on the canvas.
+        hands_coord (Dict[str, Dict[str, float]]): A dictionary containing hand coordinates.
+        volume (float): The volume target shared by all voices.
     """
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    photo = PIL.ImageTk.PhotoImage(image=PIL.Image.fromarray(frame))
-    canvas.create_image(0, 0, image=photo, anchor=tkinter.NW)
+    positions = [(coords["x"], coords["y"]) for hand, coords in hands_coord.items() if hand.startswith("Right")]
+    active_voices = voice_allocator.update(positions)
+    synth.set_voices(
+        {voice.slot: (pitch_map.frequency(voice.y), volume) for voice in active_voices},
+        {voice.slot: voice.voice_id for voice in active_voices}
+    )
 
 def update_framerate(previous_time: float) -> float:
     """
     Update the framerate label and calculate the new previous_time.
 
     This function calculates the current framerate, updates the framerate label
-    with the calculated framerate, and updates the previous_time variable.
+    with the calculated framerate (and the share of frames the motion gate kept from
+    inference), and updates the previous_time variable. The label is left untouched
+    on the first frame, when there is no previous time.
 
     Args:
         previous_time (float): The previous timestamp used to calculate the framerate.
@@ -221,12 +491,167 @@ def update_framerate(previous_time: float) -> float:
     Returns:
         float: The updated previous_time value.
     """
-    current_time = time.time()
-    framerate = 1 / (current_time - previous_time)
-    previous_time = current_time
-    framerate_label.config(text=f"FPS: {framerate:.0f}")
+    current_time = time.perf_counter()
+    if previous_time > 0 and current_time > previous_time:
+        framerate = 1 / (current_time - previous_time)
+        text = f"FPS: {framerate:.0f}"
+        if motion_gate is not None:
+            text += f" (inference skipped: {motion_gate.skip_ratio:.0%})"
+        framerate_label.config(text=text)
+
+    return current_time
+
+def capture_task() -> None:
+    """
+    Process the newest camera frame, if a new one is ready.
+
+    This task reads the frame, runs or submits hand detection, and keeps the frame
+    with its hands for the control and display tasks. When no new frame is ready
+    it returns at once. When a video file or an image directory is over, the hands
+    are released, and a headless run ends.
+    """
+    global latest_frame, frame_timestamp, frame_displayed, hands_coord, hands_pending, previous_time
+    tracer.begin_frame()
+    frame, timestamp = read_camera()
+    if frame is None:
+        if frame_source.ended and hands_coord:
+            hands_coord, hands_pending = {}, True
+        elif frame_source.ended and theremin_gui.canvas is None:
+            # Like a headless replay, once the hands were released
+            on_closing()
+        return
+    mark_startup("first_frame")
+    latest_frame, hands_coord = process_frame(frame, timestamp)
+    frame_timestamp = timestamp
+    frame_displayed = False
+    hands_pending = True
+    previous_time = update_framerate(previous_time)
+
+def replay_task() -> None:
+    """
+    Play back the newest recorded frame that is due, in place of capture and inference.
+
+    The recorded hands are drawn on a black frame of the recorded size and handed to
+    the control and display tasks like those of a camera frame, so the sound is
+    driven through the same mapping. The hands are released at the end of the recording.
+    """
+    global latest_frame, frame_timestamp, frame_displayed, hands_coord, hands_pending, previous_time, hands_timestamp
+    index = session_replayer.poll()
+    if index is None:
+        if session_replayer.finished and hands_coord:
+            hands_coord, hands_pending = {}, True
+        elif session_replayer.finished and theremin_gui.canvas is None:
+            # Headless replays end with the recording, once the hands were released
+            on_closing()
+        return
+    mark_startup("first_frame")
+    landmarks, handedness = session_replayer.recording.hands(index)
+    frame_shape = session_replayer.recording.frame_shape
+    frame = FRAME_POOL.get("replay", (frame_shape[0] or 480, frame_shape[1] or 640, 3))
+    latest_frame, hands_coord = hand_tracking.process_landmarks(frame, landmarks, handedness)
+    frame_timestamp = hands_timestamp = time.perf_counter()
+    frame_displayed = False
+    hands_pending = True
+    previous_time = update_framerate(previous_time)
+
+def control_task() -> None:
+    """
+    Turn the newest hands into oscillator targets, on a fixed control tick.
+
+    This task applies the GUI's smoothing and waveform settings, then sets the
+    frequency and volume targets from the hands of the newest frame. With the
+    landmark filter, the hands are extrapolated on every tick to the time the next
+    audio block is heard. Otherwise the oscillator smooths the targets per sample,
+    so nothing is done until new hands arrive.
+    """
+    global frequency, previous_volume, hands_pending
+    if theremin_gui.performance_profile != performance_profile:
+        apply_profile(theremin_gui.performance_profile)
+    update_smoothing(theremin_gui.smoothing_factor, theremin_gui.change_limit)
+    synth.set_waveform(theremin_gui.waveform)
+    pitch_map.configure(theremin_gui.pitch_mode, theremin_gui.scale, theremin_gui.scale_root)
+    new_frame = hands_pending
+    if landmark_filter is not None and (new_frame or landmark_filter.handedness):
+        landmarks, handedness = landmark_filter.predict(time.perf_counter() + synth.output_latency)
+        control_hands = hand_tracking.hands_from_landmarks(landmarks, handedness)
+    elif new_frame:
+        control_hands = hands_coord
+    else:
+        return
+    hands_pending = False
+
+    frequency, previous_volume = update_frequency_and_volume_labels(control_hands, previous_volume)
+    if effects_chain is not None:
+        update_effects(control_hands)
+    if frequency is not None:
+        mark_startup("first_sound")
+    if max_voices > 1:
+        play_voices(control_hands, previous_volume)
+    else:
+        play_sound(frequency, previous_volume)
+    if not new_frame:
+        return
+    if record_path and session_replayer is None:
+        record_frame()
+    tracer.mark("control")
+    if tracer.enabled:
+        # The new targets are heard at worst after the playing and the queued audio blocks
+        tracer.record("motion_to_sound", time.perf_counter() - frame_timestamp + synth.output_latency)
+    tracer.end_frame()
+
+def record_frame() -> None:
+    """
+    Append the hands of the newest frame and the values played to the session recording.
+
+    The recording is opened on the first frame, whose size it keeps to draw the hands on replay.
+    """
+    global session_recorder
+    if session_recorder is None:
+        session_recorder = SessionRecorder(record_path, max_hands=max_num_hands, frame_shape=latest_frame.shape[:2])
+    session_recorder.append(frame_timestamp, last_landmarks, last_handedness, synth.frequency, synth.volume)
+
+def display_task() -> None:
+    """
+    Show the newest frame with its hands at the display rate.
+
+    Frames already shown are not drawn again, so the display costs nothing while
+    the camera has nothing new.
+    """
+    global frame_displayed
+    if latest_frame is None or frame_displayed:
+        return
+    start = time.perf_counter()
+    draw_scale_lines(latest_frame)
+    update_hands_display(latest_frame, hands_coord)
+    frame_displayed = theremin_gui.update_canvas(latest_frame)
+    tracer.record("canvas_update", time.perf_counter() - start)
+
+def tuner_task() -> None:
+    """
+    Show the note being played on the tuner, at the tuner rate.
+
+    With output pitch analysis, the note is detected in the newest samples sent to
+    the sound card, so smoothing, fades and voice overlaps are taken into account,
+    and silence shows as no note. Otherwise the tuner shows the oscillator's
+    frequency while the right hand is detected.
+    """
+    start = time.perf_counter()
+    if pitch_detector is not None:
+        detected_frequency = pitch_detector.update(output_ring)
+        theremin_gui.update_tuner_canvas(detected_frequency or 0)
+    elif frequency is not None:
+        # theremin_gui.update_tuner_label(synth.frequency)
+        theremin_gui.update_tuner_canvas(synth.frequency)
+    tracer.record("tuner_update", time.perf_counter() - start)
+
+def output_task() -> None:
+    """
+    Hand the synthesizer's frequency and volume to the control output, which sends them from its own thread.
 
-    return previous_time
+    They are stamped with the capture time of the frame their hands came from, so a
+    receiver can measure the latency and jitter from the camera to its input.
+    """
+    control_output.update(synth.frequency if frequency is not None else 0, synth.volume, hands_timestamp or None)
 
 def update_loop(
         theremin_gui: "ThereminGUI", 
@@ -234,50 +659,38 @@ def update_loop(
         change_limit: Optional[float] = None
     ) -> None:
     """
-    Main loop for updating the theremin GUI, processing frames, and playing sounds.
+    Schedule the capture, inference, control, display and tuner tasks on the GUI's event loop.
 
-    This function reads frames from the camera, processes them to detect hands,
-    updates the theremin GUI, sets smoothing factors and change limits, updates
-    the hands display, calculates smoothed frequency and volume, plays sounds
-    based on the calculated values, updates the canvas, and updates the framerate.
+    Each stage runs as a timer of the Tk root at its own rate: capture polls for new
+    camera frames, inference collects the worker's answers, control turns hands into
+    sound on a fixed tick, the display follows the GUI's display rate, and the tuner
+    analyses the output at its own, slower rate. Between
+    the timers mainloop waits for events, so idle time goes back to the OS instead
+    of a busy loop. Without a window (HeadlessGUI), there is no display or tuner task.
+    The function returns once the tasks are scheduled.
 
     Args:
-        theremin_gui (ThereminGUI): The theremin GUI instance.
+        theremin_gui (ThereminGUI): The theremin GUI instance, or a HeadlessGUI.
         smoothing_factor (Optional[float]): The smoothing factor for frequency and volume, if any.
         change_limit (Optional[float]): The change limit for frequency and volume, if any.
     """
-    global hand_detector, drawing_utils, connections_draw_spec, canvas, hands_coord
-    previous_time = 0
-    previous_frequency = 0
-    previous_volume = 0
-
-    while True:
-        frame = read_camera()
-        frame, hands_coord = process_frame(frame)
-
-        if quit_flag:
-            break
-        
-        theremin_gui.root.update()
-        
-        update_smoothing_factors(smoothing_factor)
-        update_change_limits(change_limit)
-        update_hands_display(frame, hands_coord)
-        
-        smooth_frequency, smooth_volume = update_frequency_and_volume_labels(hands_coord, previous_volume)
-        if smooth_frequency is not None and smooth_volume is not None:
-            sound, previous_frequency, previous_volume = play_sound(smooth_frequency, smooth_volume, previous_frequency, previous_volume)
-            
-            if sound is not None and previous_frequency is not None and previous_volume is not None:
-                # update_canvas(frame)
-                theremin_gui.update_canvas(frame)
-                previous_time = update_framerate(previous_time)
-                
-                # theremin_gui.update_tuner_label(smooth_frequency)
-                theremin_gui.update_tuner_canvas(smooth_frequency)
-
-        if quit_flag:
-            break
+    global scheduler
+    update_smoothing(smoothing_factor, change_limit)
+
+    scheduler = Scheduler(theremin_gui.root)
+    if session_replayer is not None:
+        scheduler.add_task("replay", replay_task, capture_rate)
+    else:
+        scheduler.add_task("capture", capture_task, capture_rate)
+    if use_inference_worker and session_replayer is None:
+        scheduler.add_task("inference", poll_inference, inference_poll_rate)
+    scheduler.add_task("control", control_task, control_rate)
+    if theremin_gui.canvas is not None:
+        scheduler.add_task("display", display_task, theremin_gui.display_fps or capture_rate)
+        scheduler.add_task("tuner", tuner_task, tuner_rate)
+    if control_output is not None:
+        scheduler.add_task("output", output_task, control_output_rate)
+    scheduler.start()
 
 def display_text(
         image: ndarray, 
@@ -306,26 +719,233 @@ def display_text(
     cv2.putText(image, text, position, font, font_scale, color, thickness)
 
 
-camera = Camera()
-hand_detector, drawing_utils, connections_draw_spec = mediapipe_utils.init_mediapipe()
+def create_hand_detector(frame_shape: Tuple[int, ...]) -> tuple:
+    """
+    Create an inline hand detector with the settings of the current profile, and run a first inference on a blank frame.
 
-previous_time = 0
-current_time = 0
-hands_coord = {}
+    MediaPipe is imported here, as only inline inference needs it in this process.
+    The first inference initializes its graph, so doing it ahead keeps that cost off
+    the camera frames. It runs in a thread, while process_frame may be running the
+    previous detector, so it gets its own scratch buffers instead of the shared pool's.
+
+    Args:
+        frame_shape (Tuple[int, ...]): The shape of the frames, to warm up on.
+
+    Returns:
+        tuple: The hand detector, drawing utilities and connections drawing specification.
+    """
+    import mediapipe_utils
+
+    detector = mediapipe_utils.init_mediapipe(max_num_hands=max_num_hands, **PROFILES[performance_profile].model_settings)
+    hand_tracking.detect_landmarks(
+        np.zeros(frame_shape, dtype=np.uint8), detector[0], max_hands=max_num_hands, frame_pool=FramePool()
+    )
+    return detector
 
-# Create an instance of ThereminGUI
-theremin_gui = ThereminGUI(update_loop, on_closing)
-canvas = theremin_gui.canvas
-frequency_label = theremin_gui.frequency_label
-volume_label = theremin_gui.volume_label
-framerate_label = theremin_gui.framerate_label
+def rebuild_hand_detector(frame_shape: Tuple[int, ...]) -> None:
+    """
+    Build the inline hand detector of a new profile, for process_frame to swap in.
+
+    Args:
+        frame_shape (Tuple[int, ...]): The shape of the frames, to warm up on.
+    """
+    global pending_hand_detector
+    pending_hand_detector = create_hand_detector(frame_shape)[0]
+
+def init_hand_tracking(frame_shape: Tuple[int, ...]) -> None:
+    """
+    Create the inline hand detector, while the GUI is being built.
+
+    Args:
+        frame_shape (Tuple[int, ...]): The shape of the frames, to warm up on.
+    """
+    global hand_detector, drawing_utils, connections_draw_spec, roi_tracker
+    hand_detector, drawing_utils, connections_draw_spec = create_hand_detector(frame_shape)
+    if use_roi or inference_width is not None:
+        roi_tracker = RoiTracker(inference_width=inference_width, use_roi=use_roi)
+    mark_startup("hand_tracking")
+
+def start_inference_worker(frame_shape: Tuple[int, ...]) -> None:
+    """
+    Start the inference worker process for frames of the given shape, replacing the current one if any.
+
+    The worker loads MediaPipe and warms it up in its own process, so starting it
+    before the GUI is built overlaps both.
+
+    Args:
+        frame_shape (Tuple[int, ...]): The shape of the frames, which sizes the shared-memory slots.
+    """
+    global inference_worker
+    if inference_worker is not None:
+        inference_worker.stop()
+    inference_worker = InferenceWorker(
+        frame_shape, max_num_hands=max_num_hands, inference_width=inference_width, use_roi=use_roi,
+        model_settings=PROFILES[performance_profile].model_settings
+    )
+    inference_worker.start()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line, whose defaults come from the THEREMIN_* environment variables.
+
+    Args:
+        argv (Optional[List[str]]): The arguments, sys.argv[1:] if None.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Play a theremin with your hands in front of a webcam.")
+    parser.add_argument("--source", default=source,
+                        help="camera device ID, \"synthetic\", video file, image directory or .npz landmark track (default: %(default)s)")
+    parser.add_argument("--no-gui", action="store_true",
+                        help="run without a window, with the default settings (no tkinter or PIL)")
+    parser.add_argument("--no-audio", action="store_true",
+                        help="render the sound in real time without a sound card (no pygame)")
+    parser.add_argument("--profile", choices=PROFILES, default=performance_profile,
+                        help="hand tracking and display settings (default: %(default)s)")
+    parser.add_argument("--auto-profile", action="store_true", default=auto_tune_profile,
+                        help="step between profiles to hold the target inference rate")
+    parser.add_argument("--record", metavar="PATH", default=record_path, help="record the session to PATH")
+    parser.add_argument("--replay", metavar="PATH", default=replay_path,
+                        help="play a recorded session back instead of the source, without MediaPipe")
+    parser.add_argument("--output", metavar="SPEC", default=control_output_spec,
+                        help="send frequency and volume to osc:HOST:PORT, midi-udp:HOST:PORT, midi[:PORT] or midi-virtual[:PORT]")
+    parser.add_argument("--effects", metavar="NAMES", default=",".join(enabled_effects),
+                        help=f"comma-separated effects enabled at start, among {', '.join(EFFECTS)}")
+    parser.add_argument("--bench", metavar="SECONDS", type=float,
+                        help="run for SECONDS, then print the cold-start, task and stage timings as JSON")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the theremin from the command line until the window is closed, the process interrupted or the benchmark over.
 
-# # Start the update loop
-# update_loop(theremin_gui.root)
-update_loop(theremin_gui)
-theremin_gui.start()
+    Subsystems are imported and started only when selected: tkinter and PIL for the
+    window, pygame for the sound card, MediaPipe for inline inference (the worker
+    process imports its own). MediaPipe is loaded and warmed up, in the worker
+    process or in a thread, while the audio and the GUI start.
 
-# Start the ThereminGUI
-theremin_gui.start()
+    Args:
+        argv (Optional[List[str]]): The arguments, sys.argv[1:] if None.
 
-camera.release()
+    Returns:
+        int: The exit status.
+    """
+    global source, record_path, replay_path, control_output_spec, frame_source, synth, voice_allocator
+    global output_ring, pitch_detector, max_num_hands, landmark_filter, motion_gate, control_output
+    global session_replayer, theremin_gui, canvas, frequency_label, volume_label, framerate_label
+    global performance_profile, inference_width, profile_tuner, enabled_effects, effects_chain
+    args = parse_args(argv)
+    enabled_effects = tuple(name for name in args.effects.split(",") if name)
+    source, record_path, replay_path, control_output_spec = args.source, args.record, args.replay, args.output
+    performance_profile = args.profile
+    inference_width = PROFILES[performance_profile].inference_width
+    if args.bench is not None:
+        tracer.enabled = True
+    mark_startup("imports")
+
+    max_num_hands = max(2, max_voices + 1)
+    frame_source = None
+    if replay_path:
+        session_replayer = SessionReplayer(SessionRecording(replay_path))
+    else:
+        frame_source = open_frame_source(source)
+        mark_startup("source")
+
+    # MediaPipe loads in the background while the audio and the GUI start
+    warm_up = None
+    if session_replayer is None:
+        frame_shape = frame_source.frame_shape
+        if not use_inference_worker:
+            warm_up = threading.Thread(
+                target=init_hand_tracking, args=(frame_shape or (480, 640, 3),), name="hand-tracking-warm-up", daemon=True
+            )
+            warm_up.start()
+        elif frame_shape is not None and not (use_source_landmarks and frame_source.provides_landmarks):
+            start_inference_worker(frame_shape)
+
+    if max_voices > 1:
+        synth = voices.PolyphonicOscillator(max_voices=max_voices)
+        voice_allocator = voices.VoiceAllocator(max_voices=max_voices)
+    else:
+        synth = oscillator.StreamingOscillator()
+    synth.tracer = tracer if tracer.enabled else None
+    synth.start(silent=args.no_audio)
+    mark_startup("audio")
+    if use_output_pitch and not args.no_gui:
+        # After start, which adopts the mixer's sample rate if it differs
+        output_ring = AudioRing()
+        synth.output_tap = output_ring
+        pitch_detector = PitchDetector(synth.sample_rate)
+    effects_chain = create_effects_chain(
+        enabled_effects, synth.sample_rate, synth.block_size, tracer=tracer if tracer.enabled else None
+    )
+    synth.effects = effects_chain
+    # Recorded hands were filtered already, and need no inference
+    if use_landmark_filter and session_replayer is None:
+        landmark_filter = LandmarkFilter(max_hands=max_num_hands)
+    if use_motion_gate and session_replayer is None:
+        motion_gate = MotionGate(target_fps=inference_target_fps)
+    if session_replayer is None:
+        profile_tuner = ProfileTuner(target_fps=inference_target_fps, initial=performance_profile)
+    if control_output_spec:
+        control_output = open_control_output(control_output_spec, max_rate=control_output_rate)
+        control_output.start()
+
+    if args.no_gui:
+        from headless import HeadlessGUI
+        theremin_gui = HeadlessGUI(update_loop, on_closing, performance_profile, args.auto_profile, enabled_effects)
+    else:
+        # Imported here so that headless runs do not load tkinter and PIL
+        from gui import ThereminGUI
+        theremin_gui = ThereminGUI(
+            update_loop, on_closing, PROFILES[performance_profile].display_fps, performance_profile, args.auto_profile,
+            enabled_effects
+        )
+    mark_startup("gui")
+    canvas = theremin_gui.canvas
+    frequency_label = theremin_gui.frequency_label
+    volume_label = theremin_gui.volume_label
+    framerate_label = theremin_gui.framerate_label
+    if warm_up is not None:
+        warm_up.join()
+    if args.bench is not None:
+        theremin_gui.root.after(int(args.bench * 1000), on_closing)
+
+    # Start the GUI, which schedules the update loop and runs until the window closes
+    theremin_gui.start()
+
+    synth.stop()
+    if inference_worker is not None:
+        inference_worker.stop()
+    if frame_source is not None:
+        frame_source.release()
+    if session_recorder is not None:
+        session_recorder.close()
+        print(f"Recorded {session_recorder.records} frames to {record_path}")
+    if control_output is not None:
+        control_output.stop()
+        send_delays = control_output.tracer.summary()
+        if "update_to_send" in send_delays:
+            update_delay, capture_delay = send_delays["update_to_send"], send_delays["source_to_send"]
+            print(f"Control output: {control_output.sends} sends, update to send p50 "
+                  f"{update_delay['p50_ms']:.2f} ms, p99 {update_delay['p99_ms']:.2f} ms, capture to send p50 "
+                  f"{capture_delay['p50_ms']:.2f} ms, p99 {capture_delay['p99_ms']:.2f} ms")
+
+    if motion_gate is not None:
+        print(f"Inference skipped on {motion_gate.skip_ratio:.0%} of {motion_gate.checked_frames} frames")
+    print(format_startup_times())
+    if args.bench is not None:
+        print(json.dumps({
+            "startup_ms": {name: seconds * 1000 for name, seconds in startup_times.items()},
+            "tasks": scheduler.summary() if scheduler is not None else {},
+            "stages": tracer.summary(),
+        }, indent=2))
+    if trace_path:
+        tracer.dump(trace_path)
+    return 0
+
+
+# The worker process imports this module, so nothing may start at import time
+if __name__ == "__main__":
+    sys.exit(main())
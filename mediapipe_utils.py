@@ -5,14 +5,28 @@ from mediapipe.python.solutions.drawing_utils import DrawingSpec
 
 # TODO check missing types
 
-def init_mediapipe():
+def init_mediapipe(
+        max_num_hands: int = 2,
+        model_complexity: int = 1,
+        min_detection_confidence: float = 0.5,
+        min_tracking_confidence: float = 0.5
+    ):
     """
     Initialize Mediapipe Hand detector and drawing utilities.
 
+    :param max_num_hands: The maximum number of hands to detect. (default: 2)
+    :param model_complexity: The hand landmark model, 0 for the light one or 1 for the full one. (default: 1)
+    :param min_detection_confidence: The confidence from which a hand is detected. (default: 0.5)
+    :param min_tracking_confidence: The confidence below which a tracked hand is detected again. (default: 0.5)
     :return: A tuple containing the hand detector, drawing utilities, and connections drawing specifications.
     """
     media_pipe_hands = mp.solutions.hands
-    hand_detector = media_pipe_hands.Hands()
+    hand_detector = media_pipe_hands.Hands(
+        max_num_hands=max_num_hands,
+        model_complexity=model_complexity,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence
+    )
     drawing_utils = mp.solutions.drawing_utils
     connections_draw_spec = drawing_utils.DrawingSpec(color=(198, 189, 10), thickness=2, circle_radius=1)
 
@@ -1,3 +1,23 @@
+import math
+import numpy as np
+from typing import Dict, List, Sequence, Tuple, Union
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+# Semitones of each scale above its root
+SCALES = {
+    "chromatic": (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11),
+    "major": (0, 2, 4, 5, 7, 9, 11),
+    "minor": (0, 2, 3, 5, 7, 8, 10),
+    "major pentatonic": (0, 2, 4, 7, 9),
+    "minor pentatonic": (0, 3, 5, 7, 10),
+    "blues": (0, 3, 5, 6, 7, 10),
+}
+# linear: in Hz, like y_to_frequency; exponential: the same distance per semitone;
+# snap: held on the notes of the scale; soft: pulled towards them
+PITCH_MODES = ("linear", "exponential", "snap", "soft")
+LUT_SIZE = 4096
+SNAP_STRENGTH = 0.8
+
 def note_to_frequency(note: int) -> float:
     """
     Convert a MIDI note number to its corresponding frequency.
@@ -22,6 +42,67 @@ def y_to_frequency(y: float, min_note: int = 24, max_note: int = 84) -> float:
     frequency = min_frequency + ((y/100) * (max_frequency - min_frequency))
     return frequency
 
+def frequency_to_note(frequency: float) -> float:
+    """
+    Convert a frequency to its fractional MIDI note number.
+
+    :param frequency: The frequency in Hz, positive.
+    :return: The MIDI note number, with the fraction of a semitone above it.
+    """
+    return 69 + 12 * math.log2(frequency / 440)
+
+def pitch_bend_value(semitones: float, bend_range: float = 2) -> int:
+    """
+    Convert a pitch offset to a 14-bit MIDI pitch bend value.
+
+    :param semitones: The offset from the note, in semitones.
+    :param bend_range: The offset of a full bend, as set on the receiving synth. (default: 2)
+    :return: The pitch bend value, from 0 to 16383, 8192 meaning no bend.
+    """
+    return max(0, min(16383, round(8192 + semitones / bend_range * 8192)))
+
+def note_on(note: int, velocity: int = 100, channel: int = 0) -> bytes:
+    """
+    Encode a MIDI note on message.
+
+    :param note: The MIDI note number.
+    :param velocity: The velocity, from 1 to 127. (default: 100)
+    :param channel: The MIDI channel, from 0 to 15. (default: 0)
+    :return: The 3 bytes of the message.
+    """
+    return bytes((0x90 | channel, note & 0x7F, velocity & 0x7F))
+
+def note_off(note: int, channel: int = 0) -> bytes:
+    """
+    Encode a MIDI note off message.
+
+    :param note: The MIDI note number.
+    :param channel: The MIDI channel, from 0 to 15. (default: 0)
+    :return: The 3 bytes of the message.
+    """
+    return bytes((0x80 | channel, note & 0x7F, 0))
+
+def pitch_bend(value: int, channel: int = 0) -> bytes:
+    """
+    Encode a MIDI pitch bend message.
+
+    :param value: The 14-bit pitch bend value, 8192 meaning no bend.
+    :param channel: The MIDI channel, from 0 to 15. (default: 0)
+    :return: The 3 bytes of the message.
+    """
+    return bytes((0xE0 | channel, value & 0x7F, (value >> 7) & 0x7F))
+
+def control_change(controller: int, value: int, channel: int = 0) -> bytes:
+    """
+    Encode a MIDI control change message.
+
+    :param controller: The controller number, 7 for channel volume.
+    :param value: The value, from 0 to 127.
+    :param channel: The MIDI channel, from 0 to 15. (default: 0)
+    :return: The 3 bytes of the message.
+    """
+    return bytes((0xB0 | channel, controller & 0x7F, value & 0x7F))
+
 def y_to_volume(y: float, min: int = 0, max: int = 100) -> float:
     """
     Convert a y-coordinate to a volume level within a specified range.
@@ -32,4 +113,182 @@ def y_to_volume(y: float, min: int = 0, max: int = 100) -> float:
     :return: The corresponding volume level.
     """
     volume = min +((y/100) * max - min)
-    return volume
\ No newline at end of file
+    return volume
+
+
+class PitchMap:
+    """
+    Hand position to frequency mapping, compiled into a lookup table.
+
+    The curve from position (0 to 100) to pitch is evaluated once per setting, at
+    lut_size + 1 positions, and positions are then mapped by linear interpolation in
+    the table, for single values or whole arrays. Tables are kept per setting, so
+    switching back and forth between scales does not compile them again.
+
+    The positions of the notes of the scale (for the lines drawn on the video) come
+    from the same compilation: they are where the unsnapped curve crosses each note,
+    which is the middle of that note's step when snapping.
+    """
+
+    def __init__(
+            self,
+            min_note: int = 24,
+            max_note: int = 84,
+            mode: str = "exponential",
+            scale: str = "chromatic",
+            root: int = 0,
+            snap_strength: float = SNAP_STRENGTH,
+            lut_size: int = LUT_SIZE
+        ) -> None:
+        """
+        Initialize the pitch map.
+
+        :param min_note: The MIDI note at position 0. (default: 24, C1)
+        :param max_note: The MIDI note at position 100. (default: 84, C6)
+        :param mode: One of PITCH_MODES. (default: "exponential")
+        :param scale: One of SCALES, used by the snap and soft modes and by the scale lines. (default: "chromatic")
+        :param root: The pitch class of the root of the scale, 0 for C to 11 for B. (default: 0)
+        :param snap_strength: How strongly the soft mode pulls towards the notes, from 0 to 1. (default: 0.8)
+        :param lut_size: The number of intervals of the lookup table. (default: 4096)
+        """
+        self.min_note = min_note
+        self.max_note = max_note
+        self.snap_strength = snap_strength
+        self.lut_size = lut_size
+        self._positions = np.linspace(0, 100, lut_size + 1)
+        self._scale_factor = lut_size / 100
+        self._compiled: Dict[Tuple[str, str, int], Tuple[np.ndarray, np.ndarray, List[float]]] = {}
+        self._lines: Dict[Tuple[str, str, int, int], List[Tuple[int, str, bool]]] = {}
+        self.key = None
+        self.configure(mode, scale, root)
+
+    def configure(self, mode: str = None, scale: str = None, root: int = None) -> None:
+        """
+        Switch to another mode, scale or root, compiling its table on first use only.
+
+        :param mode: One of PITCH_MODES, None to keep the current one.
+        :param scale: One of SCALES, None to keep the current one.
+        :param root: The pitch class of the root, None to keep the current one.
+        """
+        current_mode, current_scale, current_root = self.key or (None, None, None)
+        key = (
+            mode if mode is not None else current_mode,
+            scale if scale is not None else current_scale,
+            root % 12 if root is not None else current_root,
+        )
+        if key == self.key:
+            return
+        if key[0] not in PITCH_MODES:
+            raise ValueError(f"Unknown pitch mode {key[0]!r}, expected one of {PITCH_MODES}")
+        if key[1] not in SCALES:
+            raise ValueError(f"Unknown scale {key[1]!r}, expected one of {tuple(SCALES)}")
+        if key not in self._compiled:
+            notes, table = self._compile(*key)
+            self._compiled[key] = (notes, table, table.tolist())
+        self.key = key
+        self._notes, self._table, self._table_list = self._compiled[key]
+
+    @property
+    def mode(self) -> str:
+        """The current mode."""
+        return self.key[0]
+
+    @property
+    def scale(self) -> str:
+        """The current scale."""
+        return self.key[1]
+
+    @property
+    def root(self) -> int:
+        """The pitch class of the current root."""
+        return self.key[2]
+
+    def scale_notes(self, scale: str = None, root: int = None) -> np.ndarray:
+        """
+        List the MIDI notes of a scale around the range of the map.
+
+        :param scale: One of SCALES, None for the current one.
+        :param root: The pitch class of the root, None for the current one.
+        :return: The sorted MIDI note numbers, from an octave below min_note to an octave above max_note.
+        """
+        scale = scale if scale is not None else self.scale
+        root = root if root is not None else self.root
+        notes = np.arange(self.min_note - 12, self.max_note + 13)
+        return notes[np.isin((notes - root) % 12, SCALES[scale])]
+
+    def _compile(self, mode: str, scale: str, root: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate a curve at every position of the table.
+
+        :param mode: One of PITCH_MODES.
+        :param scale: One of SCALES.
+        :param root: The pitch class of the root.
+        :return: A tuple (notes, frequencies) of the unsnapped fractional MIDI notes
+                 and the frequencies of the curve, one per table position.
+        """
+        fraction = self._positions / 100
+        if mode == "linear":
+            min_frequency = note_to_frequency(self.min_note)
+            frequencies = min_frequency + fraction * (note_to_frequency(self.max_note) - min_frequency)
+            return 69 + 12 * np.log2(frequencies / 440), frequencies
+
+        notes = self.min_note + fraction * (self.max_note - self.min_note)
+        if mode == "exponential":
+            return notes, note_to_frequency(notes)
+
+        scale_notes = self.scale_notes(scale, root)
+        upper = np.searchsorted(scale_notes, notes, side="right")
+        low, high = scale_notes[upper - 1], scale_notes[upper]
+        position = (notes - low) / (high - low)
+        if mode == "snap":
+            snapped = np.where(position < 0.5, low, high)
+        else:
+            # Flat on the notes, steeper in between, still increasing
+            strength = self.snap_strength
+            snapped = low + (high - low) * (position - strength * np.sin(2 * np.pi * position) / (2 * np.pi))
+        return notes, note_to_frequency(snapped)
+
+    def frequency(self, y: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Map positions to frequencies by interpolation in the table.
+
+        :param y: The y-coordinate as a percentage (0 to 100), or an array of them.
+        :return: The frequency in Hz, or an array of them.
+        """
+        if isinstance(y, (int, float)):
+            # Single positions (the hot path) skip the NumPy call overhead
+            position = min(max(y * self._scale_factor, 0.0), self.lut_size)
+            index = min(int(position), self.lut_size - 1)
+            low = self._table_list[index]
+            return low + (position - index) * (self._table_list[index + 1] - low)
+        position = np.clip(np.multiply(y, self._scale_factor), 0, self.lut_size)
+        index = np.minimum(position.astype(np.intp), self.lut_size - 1)
+        fraction = position - index
+        low = self._table[index]
+        frequency = low + fraction * (self._table[index + 1] - low)
+        return float(frequency) if np.ndim(frequency) == 0 else frequency
+
+    def scale_lines(self, height: int) -> List[Tuple[int, str, bool]]:
+        """
+        Locate the notes of the scale on an image, for drawing.
+
+        Every note of the scale in range is listed, except for the chromatic scale
+        where only the roots are, so the lines stay readable.
+
+        :param height: The height of the image in pixels, position 100 being the top row.
+        :return: A list of (row, note name, is root) tuples.
+        """
+        key = self.key + (height,)
+        lines = self._lines.get(key)
+        if lines is None:
+            notes = self.scale_notes()
+            notes = notes[(notes >= self._notes[0]) & (notes <= self._notes[-1])]
+            if self.scale == "chromatic":
+                notes = notes[(notes - self.root) % 12 == 0]
+            positions = np.interp(notes, self._notes, self._positions)
+            rows = np.rint((1 - positions / 100) * (height - 1)).astype(int)
+            lines = self._lines[key] = [
+                (int(row), f"{NOTE_NAMES[note % 12]}{note // 12 - 1}", bool((note - self.root) % 12 == 0))
+                for row, note in zip(rows, notes)
+            ]
+        return lines
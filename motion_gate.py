@@ -0,0 +1,163 @@
+import math
+import cv2
+import numpy as np
+from typing import Optional
+from roi import ROI_MARGIN
+
+GATE_WIDTH = 160
+PIXEL_THRESHOLD = 15
+MOTION_THRESHOLD = 0.01
+MAX_SKIPPED_FRAMES = 5
+COST_SMOOTHING = 0.1
+
+
+class MotionGate:
+    """
+    Decide per frame whether hand inference is worth running.
+
+    The frame is downscaled to gate_width and converted to grey, then compared with
+    the last frame given to inference, inside the regions of the last known hands
+    (enlarged by a margin), or over the whole frame when no hand is known. Inference
+    runs when enough pixels changed; otherwise the previous landmarks can be reused
+    or extrapolated. After max_skipped frames without inference a refresh is forced,
+    so slow drifts and new hands are still picked up.
+
+    With a target frame rate, the measured cost of inference also sets how many
+    frames must pass between two inferences for the loop to keep that rate.
+    """
+
+    def __init__(
+            self,
+            gate_width: int = GATE_WIDTH,
+            pixel_threshold: int = PIXEL_THRESHOLD,
+            motion_threshold: float = MOTION_THRESHOLD,
+            max_skipped: int = MAX_SKIPPED_FRAMES,
+            margin: float = ROI_MARGIN,
+            target_fps: Optional[float] = None
+        ) -> None:
+        """
+        Initialize the gate.
+
+        :param gate_width: The width of the grey image frames are compared at. (default: 160)
+        :param pixel_threshold: The grey level difference from which a pixel counts as changed. (default: 15)
+        :param motion_threshold: The fraction of changed pixels from which inference runs. (default: 0.01)
+        :param max_skipped: The maximum number of frames skipped in a row. (default: 5)
+        :param margin: The margin added around the hands, as a fraction of their bounding box size. (default: 0.5)
+        :param target_fps: The frame rate to keep by skipping inference on slow machines, None for no budget. (default: None)
+        """
+        self.gate_width = gate_width
+        self.pixel_threshold = pixel_threshold
+        self.motion_threshold = motion_threshold
+        self.max_skipped = max_skipped
+        self.margin = margin
+        self.target_fps = target_fps
+        self.motion = 0.0
+        self.inference_time = 0.0
+        self.checked_frames = 0
+        self.skipped_frames = 0
+        self.forced_frames = 0
+        self._frames_since_inference = 0
+        self._small = None
+        self._grey = None
+        self._reference = None
+        self._difference = None
+        self._has_reference = False
+
+    @property
+    def skip_ratio(self) -> float:
+        """
+        The fraction of the checked frames that were not given to inference.
+        """
+        return self.skipped_frames / self.checked_frames if self.checked_frames else 0.0
+
+    @property
+    def min_interval(self) -> int:
+        """
+        The number of frames from one inference to the next that the frame rate budget allows.
+        """
+        if not self.target_fps:
+            return 1
+        return max(1, math.ceil(self.inference_time * self.target_fps))
+
+    def _prepare(self, frame: np.ndarray) -> None:
+        """
+        Downscale a frame to the grey comparison image.
+
+        :param frame: The BGR camera frame.
+        """
+        height, width = frame.shape[:2]
+        size = (min(self.gate_width, width), max(1, round(height * min(self.gate_width, width) / width)))
+        if self._grey is None or self._grey.shape != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._grey = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._reference = np.empty_like(self._grey)
+            self._difference = np.empty_like(self._grey)
+            self._has_reference = False
+        # Bilinear is several times cheaper than area averaging, and the pixel threshold absorbs its noise
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._grey)
+
+    def _measure_motion(self, landmarks: Optional[np.ndarray]) -> float:
+        """
+        Compute the fraction of changed pixels since the reference frame, in the busiest hand region.
+
+        :param landmarks: The normalized landmarks of the last known hands, of shape (hands, 21, 3).
+        :return: The fraction of changed pixels.
+        """
+        cv2.absdiff(self._grey, self._reference, dst=self._difference)
+        height, width = self._difference.shape
+        if landmarks is None or len(landmarks) == 0:
+            return np.count_nonzero(self._difference > self.pixel_threshold) / self._difference.size
+
+        motion = 0.0
+        for hand in landmarks:
+            low = hand[:, :2].min(axis=0)
+            high = hand[:, :2].max(axis=0)
+            pad = (high - low) * self.margin
+            x0, y0 = np.clip(low - pad, 0, 1) * (width, height)
+            x1, y1 = np.clip(high + pad, 0, 1) * (width, height)
+            region = self._difference[int(y0):max(int(y0) + 1, math.ceil(y1)), int(x0):max(int(x0) + 1, math.ceil(x1))]
+            motion = max(motion, np.count_nonzero(region > self.pixel_threshold) / region.size)
+        return motion
+
+    def should_infer(self, frame: np.ndarray, landmarks: Optional[np.ndarray] = None) -> bool:
+        """
+        Decide whether to run inference on a frame, and remember it as the reference if so.
+
+        :param frame: The BGR camera frame.
+        :param landmarks: The normalized landmarks of the last known hands, None if unknown. (default: None)
+        :return: True to run inference, False to reuse or extrapolate the previous landmarks.
+        """
+        self.checked_frames += 1
+        self._frames_since_inference += 1
+        self._prepare(frame)
+
+        if not self._has_reference:
+            infer = True
+        elif self._frames_since_inference < self.min_interval:
+            infer = False
+        elif self._frames_since_inference > self.max_skipped:
+            infer = True
+            self.forced_frames += 1
+        else:
+            self.motion = self._measure_motion(landmarks)
+            infer = self.motion >= self.motion_threshold
+
+        if not infer:
+            self.skipped_frames += 1
+            return False
+        self._grey, self._reference = self._reference, self._grey
+        self._has_reference = True
+        self._frames_since_inference = 0
+        return True
+
+    def record_inference(self, seconds: float) -> None:
+        """
+        Add the duration of an inference to the cost estimate used by the frame rate budget.
+
+        :param seconds: The duration of the inference.
+        """
+        if self.inference_time == 0:
+            self.inference_time = seconds
+        else:
+            self.inference_time += COST_SMOOTHING * (seconds - self.inference_time)
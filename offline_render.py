@@ -0,0 +1,195 @@
+import argparse
+import csv
+import os
+import time
+import wave
+import numpy as np
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from oscillator import StreamingOscillator, SAMPLE_RATE, BLOCK_SIZE
+from effects import EFFECTS, create_effects_chain
+
+ControlTrack = Tuple[np.ndarray, np.ndarray, np.ndarray]
+# Effects whose depth follows the hands live, fixed for a whole offline render
+MODULATED_EFFECTS = ("vibrato", "tremolo")
+MODULATION_DEPTH = 0.5
+
+
+def load_control_track(path: str) -> ControlTrack:
+    """
+    Load a time-stamped control track from a CSV file.
+
+    The file has a header row and the columns time (seconds), frequency (Hz) and
+    volume (0 to 100). An empty frequency means the right hand was not detected.
+
+    :param path: The path of the CSV file.
+    :return: A tuple (times, frequencies, volumes) of NumPy arrays, NaN marking missing values.
+    """
+    times, frequencies, volumes = [], [], []
+    with open(path, newline="") as track_file:
+        for row in csv.DictReader(track_file):
+            times.append(float(row["time"]))
+            frequencies.append(float(row["frequency"]) if row["frequency"] else np.nan)
+            volumes.append(float(row["volume"]) if row["volume"] else np.nan)
+    return np.array(times), np.array(frequencies), np.array(volumes)
+
+def save_control_track(path: str, rows: Iterable[Tuple[float, Optional[float], Optional[float]]]) -> None:
+    """
+    Save (time, frequency, volume) rows as a control track CSV file.
+
+    :param path: The path of the CSV file.
+    :param rows: The rows to write, None marking missing values.
+    """
+    with open(path, "w", newline="") as track_file:
+        writer = csv.writer(track_file)
+        writer.writerow(["time", "frequency", "volume"])
+        for timestamp, frequency, volume in rows:
+            writer.writerow([
+                f"{timestamp:.6f}",
+                "" if frequency is None else f"{frequency:.4f}",
+                "" if volume is None else f"{volume:.4f}",
+            ])
+
+def render_control_track(
+        track: ControlTrack,
+        sample_rate: int = SAMPLE_RATE,
+        block_size: int = BLOCK_SIZE,
+        waveform: str = "sine",
+        smoothing_factor: Optional[float] = None,
+        change_limit: float = 50,
+        tail: float = 0.5,
+        effects: Sequence[str] = (),
+        modulation_depth: float = MODULATION_DEPTH
+    ) -> np.ndarray:
+    """
+    Render a control track with the streaming oscillator, without a sound card.
+
+    Control events are applied at the first block boundary following their
+    timestamp, exactly as the live stream would pick them up, and smoothed per
+    sample by the oscillator's ramps. Every block then goes through the effects
+    chain and is clipped, like the live output. The track holds no hand positions,
+    so vibrato and tremolo play at modulation_depth throughout.
+
+    :param track: The (times, frequencies, volumes) control track.
+    :param sample_rate: The sample rate of the rendered audio. (default: 44100)
+    :param block_size: The number of samples per block. (default: 512)
+    :param waveform: The waveform to render with. (default: "sine")
+    :param smoothing_factor: The GUI smoothing factor, or None to keep the default glide. (default: None)
+    :param change_limit: The GUI change limit used with smoothing_factor. (default: 50)
+    :param tail: Extra seconds rendered after the last event. (default: 0.5)
+    :param effects: The names of the effects applied, among effects.EFFECTS. (default: none, dry)
+    :param modulation_depth: The depth of the vibrato and the tremolo, from 0 to 1. (default: 0.5)
+    :return: The rendered samples, scaled to the int16 range.
+    """
+    times, frequencies, volumes = track
+    synth = StreamingOscillator(sample_rate=sample_rate, block_size=block_size, waveform=waveform)
+    effects_chain = create_effects_chain(effects, sample_rate, block_size) if effects else None
+    if effects_chain is not None:
+        for name in MODULATED_EFFECTS:
+            effects_chain[name].set_depth(modulation_depth)
+    if smoothing_factor is not None:
+        synth.set_smoothing(smoothing_factor, change_limit)
+    duration = (times[-1] if times.size else 0) + tail
+    block_count = int(np.ceil(duration * sample_rate / block_size))
+    output = np.empty(block_count * block_size, dtype=np.float64)
+
+    block_starts = np.arange(block_count) * block_size / sample_rate
+    # Index of the first event after each block start: events before it are due
+    due = np.searchsorted(times, block_starts, side="right")
+    applied = 0
+
+    for block in range(block_count):
+        for index in range(applied, due[block]):
+            if np.isnan(frequencies[index]):
+                synth.set_target(None, 0)
+            else:
+                volume = None if np.isnan(volumes[index]) else volumes[index]
+                synth.set_target(frequencies[index], volume)
+        applied = due[block]
+        samples = synth.render_block(output[block * block_size:(block + 1) * block_size])
+        if effects_chain is not None:
+            effects_chain.process(samples)
+            np.clip(samples, -32767, 32767, out=samples)
+
+    return output
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    Write samples to a mono 16-bit WAV file.
+
+    :param path: The path of the WAV file.
+    :param samples: The samples, scaled to the int16 range.
+    :param sample_rate: The sample rate of the samples. (default: 44100)
+    """
+    data = np.clip(samples, -32768, 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(data.tobytes())
+
+def render_to_wav(
+        track_path: str,
+        wav_path: str,
+        sample_rate: int = SAMPLE_RATE,
+        block_size: int = BLOCK_SIZE,
+        waveform: str = "sine",
+        smoothing_factor: Optional[float] = None,
+        change_limit: float = 50,
+        effects: Sequence[str] = (),
+        modulation_depth: float = MODULATION_DEPTH
+    ) -> Dict[str, float]:
+    """
+    Render a control track file to a WAV file and measure the render speed.
+
+    :param track_path: The path of the control track CSV file.
+    :param wav_path: The path of the WAV file to write.
+    :param sample_rate: The sample rate of the rendered audio. (default: 44100)
+    :param block_size: The number of samples per block. (default: 512)
+    :param waveform: The waveform to render with. (default: "sine")
+    :param smoothing_factor: The GUI smoothing factor, or None to keep the default glide. (default: None)
+    :param change_limit: The GUI change limit used with smoothing_factor. (default: 50)
+    :param effects: The names of the effects applied, among effects.EFFECTS. (default: none, dry)
+    :param modulation_depth: The depth of the vibrato and the tremolo, from 0 to 1. (default: 0.5)
+    :return: A dictionary with the audio duration, the render time and the speed factor.
+    """
+    track = load_control_track(track_path)
+
+    start = time.perf_counter()
+    samples = render_control_track(
+        track, sample_rate, block_size, waveform, smoothing_factor, change_limit,
+        effects=effects, modulation_depth=modulation_depth
+    )
+    render_time = time.perf_counter() - start
+    write_wav(wav_path, samples, sample_rate)
+
+    duration = samples.size / sample_rate
+    return {
+        "duration": duration,
+        "render_time": render_time,
+        "speed_factor": duration / render_time if render_time > 0 else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a theremin control track to a WAV file.")
+    parser.add_argument("track", help="CSV control track with time, frequency and volume columns")
+    parser.add_argument("output", help="WAV file to write")
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--waveform", default="sine")
+    parser.add_argument("--smoothing-factor", type=float, default=None, help="GUI smoothing factor applied per sample")
+    parser.add_argument("--change-limit", type=float, default=50)
+    parser.add_argument("--effects", metavar="NAMES", default=os.environ.get("THEREMIN_EFFECTS", ""),
+                        help=f"comma-separated effects applied like the live output, among {', '.join(EFFECTS)} "
+                             "(default: THEREMIN_EFFECTS, or none)")
+    parser.add_argument("--modulation-depth", type=float, default=MODULATION_DEPTH,
+                        help="depth of the vibrato and the tremolo, from 0 to 1, which follow the hands live "
+                             "(default: %(default)s)")
+    args = parser.parse_args()
+
+    stats = render_to_wav(
+        args.track, args.output, args.sample_rate, args.block_size,
+        args.waveform, args.smoothing_factor, args.change_limit,
+        effects=[name for name in args.effects.split(",") if name], modulation_depth=args.modulation_depth
+    )
+    print(f"Rendered {stats['duration']:.2f} s in {stats['render_time']:.3f} s ({stats['speed_factor']:.0f}x real time)")
@@ -1,10 +1,16 @@
-import pygame
+import threading
+import time
 import numpy as np
-from typing import Tuple
+from typing import Optional
+from wavetable import WavetableBank
+from smoothing import ParameterRamp
 
 SAMPLE_RATE = 44100
 FADE_DURATION = 0.1
 AMPLITUDE = 4096
+BLOCK_SIZE = 512
+RING_SIZE = 4
+GLIDE_TIME = 0.02
 
 def create_sine_wave(frequency: float, duration: float, volume: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
     """
@@ -37,7 +43,7 @@ def apply_fade(sine_wave: np.ndarray, fade_duration: float, sample_rate: int) ->
     sine_wave[-fade_length:] *= fade_out
     return sine_wave
 
-def play_sine_wave(frequency: float, duration: float, volume: float) -> pygame.mixer.Sound:
+def play_sine_wave(frequency: float, duration: float, volume: float) -> "pygame.mixer.Sound":
     """
     Play a sine wave with the given frequency, duration, and volume.
 
@@ -46,7 +52,10 @@ def play_sine_wave(frequency: float, duration: float, volume: float) -> pygame.m
     :param volume: The volume of the sine wave.
     :return: The pygame Sound object playing the sine wave.
     """
-    pygame.mixer.init()
+    import pygame
+
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
     t = np.linspace(0, duration, int(SAMPLE_RATE * duration), False)
 
     normalized_volume = volume / 100  # Normalizes the voume
@@ -60,10 +69,284 @@ def play_sine_wave(frequency: float, duration: float, volume: float) -> pygame.m
     sound.play()
     return sound
 
-def stop_sound(sound: pygame.mixer.Sound) -> None:
+def stop_sound(sound: "pygame.mixer.Sound") -> None:
     """
     Stop the playback of the given pygame Sound object.
 
     :param sound: The pygame Sound object to stop.
     """
     sound.stop()
+
+
+class StreamingOscillator:
+    """
+    A persistent oscillator streaming fixed-size blocks to a single mixer channel.
+
+    Instead of allocating a new Sound for every change, the oscillator owns a small
+    ring of Sound blocks whose sample buffers are rewritten in place and queued one
+    after the other on the same channel. The phase is kept across blocks, and the
+    frequency and volume follow their targets sample by sample through ParameterRamp
+    objects, so changes are heard one block later without clicks or fade gaps. Samples are read from a
+    band-limited WavetableBank, so the waveform can be switched while playing.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int = SAMPLE_RATE,
+            block_size: int = BLOCK_SIZE,
+            ring_size: int = RING_SIZE,
+            glide_time: float = GLIDE_TIME,
+            waveform: str = "sine",
+            wavetables: Optional[WavetableBank] = None
+        ) -> None:
+        """
+        Initialize the streaming oscillator.
+
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param block_size: The number of samples rendered per block. (default: 512)
+        :param ring_size: The number of Sound blocks in the ring, at least 3. (default: 4)
+        :param glide_time: The default time constant of the frequency and volume ramps in seconds. (default: 0.02)
+        :param waveform: The name of the initial waveform. (default: "sine")
+        :param wavetables: The wavetable bank to read from, built for sample_rate if not given.
+        """
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.ring_size = max(3, ring_size)
+
+        self.phase = 0.0  # In cycles, kept in [0, 1)
+        self.frequency_ramp = ParameterRamp(glide_time, sample_rate=sample_rate)
+        self.volume_ramp = ParameterRamp(glide_time, sample_rate=sample_rate, value=0.0)
+
+        self.wavetables = wavetables if wavetables is not None else WavetableBank(sample_rate)
+        self.waveform = waveform
+        self._tables = self.wavetables.get_tables(waveform)
+
+        # Scratch buffers reused by every render_block call
+        self._increments = np.empty(block_size, dtype=np.float64)
+        self._phases = np.empty(block_size, dtype=np.float64)
+        self._gains = np.empty(block_size, dtype=np.float64)
+        self._block = np.empty(block_size, dtype=np.float64)
+
+        self._sounds = []
+        self._views = []
+        self._channel = None
+        self._thread = None
+        self._running = threading.Event()
+        self.tracer = None
+        self.silent = False
+        # Ring the rendered blocks are copied to for analysis, such as a pitch_detector.AudioRing
+        self.output_tap = None
+        # effects.EffectsChain applied to every block, built for the sample rate adopted by start
+        self.effects = None
+
+    @property
+    def block_duration(self) -> float:
+        """The duration of one block in seconds."""
+        return self.block_size / self.sample_rate
+
+    @property
+    def output_latency(self) -> float:
+        """The worst-case delay between a target change and its output: the playing and the queued block."""
+        return 2 * self.block_duration
+
+    @property
+    def frequency(self) -> float:
+        """The frequency at the end of the last rendered block, in Hz."""
+        return self.frequency_ramp.value or 0.0
+
+    @frequency.setter
+    def frequency(self, value: float) -> None:
+        self.frequency_ramp.value = float(value)
+
+    @property
+    def volume(self) -> float:
+        """The volume at the end of the last rendered block (0 to 100)."""
+        return self.volume_ramp.value
+
+    @volume.setter
+    def volume(self, value: float) -> None:
+        self.volume_ramp.value = float(value)
+
+    @property
+    def target_frequency(self) -> float:
+        """The frequency the oscillator moves towards, in Hz."""
+        return self.frequency_ramp.target or 0.0
+
+    @property
+    def target_volume(self) -> float:
+        """The volume the oscillator moves towards (0 to 100)."""
+        return self.volume_ramp.target
+
+    def set_target(self, frequency: Optional[float], volume: Optional[float]) -> None:
+        """
+        Set the frequency and volume the oscillator moves towards.
+
+        :param frequency: The target frequency in Hz, or None to keep the current one.
+        :param volume: The target volume (0 to 100), or None to keep the current one.
+        """
+        if frequency is not None:
+            self.frequency_ramp.set_target(frequency)
+        if volume is not None:
+            self.volume_ramp.set_target(volume)
+
+    def set_smoothing(self, smoothing_factor: float, change_limit: float) -> None:
+        """
+        Map the GUI smoothing factor and change limit onto the audio-rate ramps.
+
+        :param smoothing_factor: The per-frame smoothing factor (0 to 1).
+        :param change_limit: The maximum change per frame.
+        """
+        self.frequency_ramp.configure_from_frame_parameters(smoothing_factor, change_limit)
+        self.volume_ramp.configure_from_frame_parameters(smoothing_factor, change_limit)
+
+    def set_waveform(self, waveform: str) -> None:
+        """
+        Switch to another waveform of the wavetable bank.
+
+        The tables are fetched (and built if needed) in the calling thread, then swapped
+        in with a single assignment, so the audio thread never waits for them.
+
+        :param waveform: The name of the waveform.
+        """
+        if waveform == self.waveform:
+            return
+        self._tables = self.wavetables.get_tables(waveform)
+        self.waveform = waveform
+
+    def render_block(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Render the next block of samples.
+
+        :param out: An optional float array of block_size samples to render into.
+        :return: The rendered block, scaled to the int16 range.
+        """
+        if out is None:
+            out = self._block
+
+        start_frequency = self.frequency
+        self.frequency_ramp.render(self._increments)
+        end_frequency = self.frequency
+        self.volume_ramp.render(self._gains)
+
+        # Phase accumulator: phase of sample n is the sum of the increments before it
+        self._increments /= self.sample_rate
+        np.cumsum(self._increments, out=self._phases)
+        next_phase = self.phase + self._phases[-1]
+        self._phases -= self._increments
+        self._phases += self.phase
+        self.phase = next_phase % 1.0
+
+        self.wavetables.render(self._tables, self._phases, max(start_frequency, end_frequency), out)
+
+        self._gains *= AMPLITUDE / 100
+        out *= self._gains
+        return out
+
+    def _render_output(self) -> np.ndarray:
+        """
+        Render the next block through the effects, and copy it to the output tap.
+
+        :return: The block as it is played, scaled to the int16 range.
+        """
+        block = self.render_block()
+        if self.effects is not None:
+            self.effects.process(block)
+            # Echoes and reverb tails add up over the dry sound
+            np.clip(block, -32767, 32767, out=block)
+        if self.output_tap is not None:
+            self.output_tap.write(block)
+        return block
+
+    def _write_block(self, view: np.ndarray) -> None:
+        """
+        Render the next block directly into a Sound sample buffer.
+
+        :param view: The sample array of the Sound, mono or multi-channel.
+        """
+        block = self._render_output()
+        if view.ndim == 2:
+            view[:] = block[:, np.newaxis]
+        else:
+            view[:] = block
+
+    def start(self, silent: bool = False) -> None:
+        """
+        Open the mixer stream and start feeding it from a background thread.
+
+        :param silent: Whether to render the blocks in real time without a sound card
+                       or pygame, so the ramps, output tap and control outputs still
+                       follow the targets. (default: False)
+        """
+        if self._running.is_set():
+            return
+        self.silent = silent
+        if silent:
+            self._running.set()
+            self._thread = threading.Thread(target=self._feed_silent, name="oscillator-silent", daemon=True)
+            self._thread.start()
+            return
+
+        # Imported here so that rendering without a sound card does not load the mixer
+        import pygame
+
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=self.sample_rate, size=-16, channels=2, buffer=self.block_size)
+        mixer_frequency, _, mixer_channels = pygame.mixer.get_init()
+        if mixer_frequency != self.sample_rate:
+            self.sample_rate = mixer_frequency
+            self.frequency_ramp.sample_rate = self.volume_ramp.sample_rate = mixer_frequency
+            self.wavetables = WavetableBank(mixer_frequency)
+            self._tables = self.wavetables.get_tables(self.waveform)
+
+        shape = (self.block_size, mixer_channels) if mixer_channels > 1 else (self.block_size,)
+        self._sounds = [pygame.sndarray.make_sound(np.zeros(shape, dtype=np.int16)) for _ in range(self.ring_size)]
+        self._views = [pygame.sndarray.samples(sound) for sound in self._sounds]
+        self._channel = pygame.mixer.find_channel(True)
+
+        self._running.set()
+        self._thread = threading.Thread(target=self._feed, name="oscillator-stream", daemon=True)
+        self._thread.start()
+
+    def _feed(self) -> None:
+        """
+        Keep one block queued behind the playing one until the stream is stopped.
+        """
+        index = 0
+        poll_interval = self.block_duration / 4
+        while self._running.is_set():
+            if self._channel.get_queue() is None:
+                if self.tracer is not None:
+                    start = time.perf_counter()
+                    self._write_block(self._views[index])
+                    self.tracer.record("synthesis", time.perf_counter() - start)
+                else:
+                    self._write_block(self._views[index])
+                self._channel.queue(self._sounds[index])
+                index = (index + 1) % self.ring_size
+            else:
+                time.sleep(poll_interval)
+
+    def _feed_silent(self) -> None:
+        """
+        Render one block per block duration, on a fixed grid, until the stream is stopped.
+        """
+        next_block = time.perf_counter()
+        while self._running.is_set():
+            self._render_output()
+            next_block += self.block_duration
+            wait = next_block - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                next_block = time.perf_counter()
+
+    def stop(self) -> None:
+        """
+        Stop feeding the stream and silence the channel.
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._channel is not None:
+            self._channel.stop()
@@ -0,0 +1,179 @@
+import numpy as np
+from typing import Optional
+
+FRAME_SIZE = 4096
+MIN_FREQUENCY = 30.0
+MAX_FREQUENCY = 2000.0
+YIN_THRESHOLD = 0.15
+SILENCE_LEVEL = 10.0
+
+
+class AudioRing:
+    """
+    The most recent output samples, written by the audio thread and read by the GUI.
+
+    The writer only copies its block and advances a counter: it never takes a lock
+    or waits, so reading can never delay the audio. A reader copies the newest
+    samples and then checks the counter; if the writer may have overwritten them
+    during the copy, the read is reported as failed instead of returning torn data.
+    """
+
+    def __init__(self, capacity: int = 4 * FRAME_SIZE) -> None:
+        """
+        Initialize the ring.
+
+        :param capacity: The number of samples kept. (default: 16384)
+        """
+        self.capacity = capacity
+        self.written = 0
+        self._samples = np.zeros(capacity, dtype=np.float32)
+        self._max_block = 0
+
+    def write(self, block: np.ndarray) -> None:
+        """
+        Append a block of samples, overwriting the oldest ones.
+
+        :param block: The samples, shorter than the capacity.
+        """
+        size = len(block)
+        self._max_block = max(self._max_block, size)
+        start = self.written % self.capacity
+        first = min(size, self.capacity - start)
+        self._samples[start:start + first] = block[:first]
+        self._samples[:size - first] = block[first:]
+        self.written += size
+
+    def read_latest(self, out: np.ndarray) -> bool:
+        """
+        Copy the newest samples, oldest first.
+
+        :param out: The array to fill, its length being the number of samples read.
+        :return: True if out holds the newest samples, False if not enough were written
+                 yet or the writer overtook the read.
+        """
+        size = len(out)
+        end = self.written
+        if end < size:
+            return False
+        start = end - size
+        offset = start % self.capacity
+        first = min(size, self.capacity - offset)
+        out[:first] = self._samples[offset:offset + first]
+        out[first:] = self._samples[:size - first]
+        # A block being written may already cover the oldest samples copied
+        return self.written + self._max_block - start <= self.capacity
+
+
+class PitchDetector:
+    """
+    YIN pitch detection on a stream of output samples.
+
+    The difference function of YIN is computed through an FFT autocorrelation, so a
+    frame costs O(n log n) whatever the pitch range. NumPy's FFT returns new arrays,
+    but every other buffer (frame, energies, difference and normalized difference)
+    is allocated once. update only analyses a ring when new samples arrived since
+    the last call, so calling it at a fixed rate bounds the CPU it takes.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int = 44100,
+            frame_size: int = FRAME_SIZE,
+            min_frequency: float = MIN_FREQUENCY,
+            max_frequency: float = MAX_FREQUENCY,
+            threshold: float = YIN_THRESHOLD,
+            silence_level: float = SILENCE_LEVEL
+        ) -> None:
+        """
+        Initialize the detector.
+
+        :param sample_rate: The sample rate of the stream. (default: 44100)
+        :param frame_size: The number of samples analysed per frame, twice the longest period searched. (default: 4096)
+        :param min_frequency: The lowest frequency detected, in Hz. (default: 30)
+        :param max_frequency: The highest frequency detected, in Hz. (default: 2000)
+        :param threshold: The YIN threshold on the normalized difference, lower is stricter. (default: 0.15)
+        :param silence_level: The RMS level below which no pitch is reported. (default: 10, in int16 units)
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.window = frame_size // 2
+        self.threshold = threshold
+        self.silence_level = silence_level
+        self.min_lag = max(2, int(sample_rate / max_frequency))
+        self.max_lag = min(self.window - 1, int(np.ceil(sample_rate / min_frequency)))
+        self.frequency: Optional[float] = None
+
+        self._frame = np.zeros(frame_size, dtype=np.float32)
+        self._samples = np.zeros(frame_size, dtype=np.float64)
+        self._squares = np.zeros(frame_size + 1, dtype=np.float64)
+        self._difference = np.zeros(self.window, dtype=np.float64)
+        self._normalized = np.zeros(self.window, dtype=np.float64)
+        self._weighted = np.zeros(self.window, dtype=np.float64)
+        self._lags = np.arange(self.window, dtype=np.float64)
+        self._last_written = -1
+
+    def detect(self, samples: np.ndarray) -> Optional[float]:
+        """
+        Detect the pitch of a frame.
+
+        :param samples: frame_size samples.
+        :return: The frequency in Hz, or None for silence or an unpitched frame.
+        """
+        x = self._samples
+        x[:] = samples
+        x -= x.mean()
+        window = self.window
+        np.square(x, out=self._squares[1:])
+        if np.sqrt(self._squares[1:].mean()) < self.silence_level:
+            return None
+
+        # Correlation of the first half with every lag of the frame: no wrap-around below the window
+        spectrum = np.fft.rfft(x)
+        spectrum *= np.conj(np.fft.rfft(x[:window], self.frame_size))
+        correlation = np.fft.irfft(spectrum, self.frame_size)[:window]
+
+        energies = np.cumsum(self._squares, out=self._squares)
+        difference = self._difference
+        np.subtract(energies[window:window + window], energies[:window], out=difference)
+        difference += energies[window]
+        correlation *= 2
+        difference -= correlation
+        np.maximum(difference, 0, out=difference)
+
+        # Cumulative mean normalized difference
+        normalized = self._normalized
+        np.cumsum(difference[1:], out=normalized[1:])
+        np.multiply(difference[1:], self._lags[1:], out=self._weighted[1:])
+        np.divide(self._weighted[1:], normalized[1:], out=normalized[1:], where=normalized[1:] > 0)
+        normalized[0] = 1
+
+        search = normalized[self.min_lag:self.max_lag + 1]
+        below = np.flatnonzero(search < self.threshold)
+        if len(below) == 0:
+            return None
+        lag = self.min_lag + below[0]
+        while lag + 1 <= self.max_lag and normalized[lag + 1] < normalized[lag]:
+            lag += 1
+
+        # Parabolic interpolation around the minimum
+        if self.min_lag < lag < self.max_lag:
+            left, center, right = difference[lag - 1], difference[lag], difference[lag + 1]
+            curvature = left - 2 * center + right
+            if curvature > 0:
+                return float(self.sample_rate / (lag + 0.5 * (left - right) / curvature))
+        return float(self.sample_rate / lag)
+
+    def update(self, ring: AudioRing) -> Optional[float]:
+        """
+        Analyse the newest frame of a ring, if new samples arrived since the last call.
+
+        :param ring: The ring of output samples.
+        :return: The current frequency in Hz, or None for silence or an unpitched frame.
+        """
+        if ring.written == self._last_written:
+            return self.frequency
+        written = ring.written
+        if ring.read_latest(self._frame):
+            self.frequency = self.detect(self._frame)
+            self._last_written = written
+        return self.frequency
@@ -0,0 +1,156 @@
+from typing import Dict, List, Optional, Sequence
+
+# The share of the frame budget inference may take before stepping to a cheaper profile,
+# and the share below which a more expensive profile is tried
+STEP_DOWN_LOAD = 1.0
+STEP_UP_LOAD = 0.5
+COST_SMOOTHING = 0.1
+SETTLE_INFERENCES = 30
+
+
+class PerformanceProfile:
+    """A named bundle of hand tracking and display settings."""
+
+    def __init__(
+            self,
+            name: str,
+            model_complexity: int = 1,
+            min_detection_confidence: float = 0.5,
+            min_tracking_confidence: float = 0.5,
+            inference_width: Optional[int] = None,
+            display_fps: Optional[float] = 30
+        ) -> None:
+        """
+        Initialize the profile.
+
+        :param name: The name of the profile.
+        :param model_complexity: The MediaPipe Hands model, 0 for the light one or 1 for the full one. (default: 1)
+        :param min_detection_confidence: The confidence from which a hand is detected. (default: 0.5)
+        :param min_tracking_confidence: The confidence below which a tracked hand is detected again. (default: 0.5)
+        :param inference_width: The maximum width of the image given to MediaPipe, None for full resolution. (default: None)
+        :param display_fps: The maximum rate of video canvas updates, None for no cap. (default: 30)
+        """
+        self.name = name
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.inference_width = inference_width
+        self.display_fps = display_fps
+
+    @property
+    def model_settings(self) -> Dict[str, float]:
+        """
+        The keyword arguments of mediapipe_utils.init_mediapipe for this profile.
+        """
+        return {
+            "model_complexity": self.model_complexity,
+            "min_detection_confidence": self.min_detection_confidence,
+            "min_tracking_confidence": self.min_tracking_confidence,
+        }
+
+
+# From the cheapest to the most accurate. A low tracking confidence keeps following a
+# hand instead of running the palm detector again, which is where low-power saves most
+PROFILES: Dict[str, PerformanceProfile] = {
+    profile.name: profile for profile in (
+        PerformanceProfile("low-power", model_complexity=0, min_detection_confidence=0.6,
+                           min_tracking_confidence=0.3, inference_width=256, display_fps=15),
+        # MediaPipe's default full model, as before profiles existed, on a smaller image
+        PerformanceProfile("balanced", model_complexity=1, inference_width=320, display_fps=30),
+        PerformanceProfile("high-accuracy", model_complexity=1, min_tracking_confidence=0.6,
+                           inference_width=None, display_fps=30),
+    )
+}
+
+
+class ProfileTuner:
+    """
+    Step between profiles to hold a target frame rate.
+
+    The tuner is given the measured duration of each inference, and keeps a smoothed
+    estimate of it. When inference takes more than the frame budget (1 / target_fps),
+    it steps to the next cheaper profile; when it takes less than half of it, it tries
+    the next more accurate one, unless that profile was already measured too slow.
+    After a switch, the first settle inferences are ignored while the new model warms
+    up, and the estimate starts over.
+    """
+
+    def __init__(
+            self,
+            target_fps: float = 30,
+            order: Sequence[str] = tuple(PROFILES),
+            initial: str = "balanced",
+            settle: int = SETTLE_INFERENCES
+        ) -> None:
+        """
+        Initialize the tuner.
+
+        :param target_fps: The frame rate to hold. (default: 30)
+        :param order: The profile names, from the cheapest to the most accurate. (default: all profiles)
+        :param initial: The name of the profile in use. (default: "balanced")
+        :param settle: The number of inferences ignored, then averaged, after a switch. (default: 30)
+        """
+        self.target_fps = target_fps
+        self.order: List[str] = list(order)
+        self.index = self.order.index(initial)
+        self.settle = settle
+        self.cost = 0.0
+        self.switches = 0
+        # The settled cost last measured with each profile
+        self.costs: Dict[str, float] = {}
+        self._samples = 0
+
+    @property
+    def profile(self) -> str:
+        """
+        The name of the current profile.
+        """
+        return self.order[self.index]
+
+    @property
+    def load(self) -> float:
+        """
+        The share of the frame budget inference takes with the current profile.
+        """
+        return self.cost * self.target_fps
+
+    def select(self, name: str) -> None:
+        """
+        Switch to a profile chosen outside the tuner, such as from the GUI.
+
+        :param name: The name of the profile.
+        """
+        self.index = self.order.index(name)
+        self.cost = 0.0
+        self._samples = 0
+
+    def update(self, seconds: float) -> Optional[str]:
+        """
+        Add the duration of an inference and decide whether to switch profile.
+
+        :param seconds: The duration of the inference.
+        :return: The name of the profile to switch to, or None to keep the current one.
+        """
+        self._samples += 1
+        if self._samples <= self.settle:
+            return None
+        if self._samples == self.settle + 1:
+            self.cost = seconds
+        else:
+            self.cost += COST_SMOOTHING * (seconds - self.cost)
+        if self._samples < 2 * self.settle:
+            return None
+
+        step = 0
+        if self.load > STEP_DOWN_LOAD and self.index > 0:
+            step = -1
+        elif self.load < STEP_UP_LOAD and self.index < len(self.order) - 1:
+            known_cost = self.costs.get(self.order[self.index + 1])
+            if known_cost is None or known_cost * self.target_fps <= STEP_DOWN_LOAD:
+                step = 1
+        if step == 0:
+            return None
+        self.costs[self.profile] = self.cost
+        self.select(self.order[self.index + step])
+        self.switches += 1
+        return self.profile
@@ -0,0 +1,134 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+from frame_pool import FramePool, FRAME_POOL
+
+ROI_MARGIN = 0.5
+MIN_ROI_SIZE = 0.25
+REDETECT_INTERVAL = 30
+
+Roi = Tuple[float, float, float, float]
+FULL_FRAME: Roi = (0.0, 0.0, 1.0, 1.0)
+
+
+class RoiTracker:
+    """
+    Region-of-interest and reduced-resolution input for hand inference.
+
+    The frame is cropped around the bounding box of the hands found in the previous
+    frame, enlarged by a margin, and downscaled so that its width is at most
+    inference_width before inference. Landmarks found in the crop are mapped back to
+    full-frame normalized coordinates. The whole (downscaled) frame is searched again
+    when a hand is lost, and every redetect_interval frames to pick up new hands.
+
+    The region only moves when the hands get close to its border, so the detector's
+    own frame-to-frame tracking keeps seeing a stable image.
+    """
+
+    def __init__(
+            self,
+            inference_width: Optional[int] = None,
+            margin: float = ROI_MARGIN,
+            min_size: float = MIN_ROI_SIZE,
+            redetect_interval: int = REDETECT_INTERVAL,
+            use_roi: bool = True
+        ) -> None:
+        """
+        Initialize the tracker.
+
+        :param inference_width: The maximum width of the image given to the detector, None for full resolution. (default: None)
+        :param margin: The margin added around the hands, as a fraction of their bounding box size. (default: 0.5)
+        :param min_size: The minimum width and height of the region, as a fraction of the frame. (default: 0.25)
+        :param redetect_interval: The number of frames between full-frame searches. (default: 30)
+        :param use_roi: Whether to crop around the hands, or only downscale the frame. (default: True)
+        """
+        self.inference_width = inference_width
+        self.margin = margin
+        self.min_size = min_size
+        self.redetect_interval = redetect_interval
+        self.use_roi = use_roi
+        self.roi = FULL_FRAME
+        self.hand_count = 0
+        self.frames_since_search = 0
+
+    def prepare(self, frame: np.ndarray, frame_pool: FramePool = FRAME_POOL) -> Tuple[np.ndarray, Roi]:
+        """
+        Crop and downscale a frame for inference.
+
+        :param frame: The full camera frame.
+        :param frame_pool: The pool the downscaled image is written to. (default: the shared pool)
+        :return: A tuple (image, roi) of the image to give to the detector and the
+                 normalized (x0, y0, x1, y1) region it was taken from.
+        """
+        roi = self.roi
+        if not self.use_roi or self.hand_count == 0 or self.frames_since_search >= self.redetect_interval:
+            roi = FULL_FRAME
+        height, width = frame.shape[:2]
+        x0, y0 = int(roi[0] * width), int(roi[1] * height)
+        x1, y1 = max(x0 + 1, int(roi[2] * width)), max(y0 + 1, int(roi[3] * height))
+        image = frame[y0:y1, x0:x1]
+        # Snap the region to the pixels actually cropped, for an exact mapping back
+        roi = (x0 / width, y0 / height, x1 / width, y1 / height)
+
+        if self.inference_width is not None and image.shape[1] > self.inference_width:
+            scale = self.inference_width / image.shape[1]
+            size = (self.inference_width, max(1, round(image.shape[0] * scale)))
+            dst = frame_pool.get("roi", (size[1], size[0]) + image.shape[2:], image.dtype)
+            image = cv2.resize(image, size, dst=dst, interpolation=cv2.INTER_AREA)
+        return image, roi
+
+    @staticmethod
+    def map_back(landmarks: np.ndarray, roi: Roi) -> np.ndarray:
+        """
+        Map landmarks found in a region to full-frame normalized coordinates, in place.
+
+        :param landmarks: The landmarks normalized to the region, of shape (hands, 21, 3).
+        :param roi: The normalized (x0, y0, x1, y1) region.
+        :return: The mapped landmarks.
+        """
+        if roi == FULL_FRAME:
+            return landmarks
+        x0, y0, x1, y1 = roi
+        landmarks[..., 0] *= x1 - x0
+        landmarks[..., 0] += x0
+        landmarks[..., 1] *= y1 - y0
+        landmarks[..., 1] += y0
+        # MediaPipe scales z like x
+        landmarks[..., 2] *= x1 - x0
+        return landmarks
+
+    def update(self, landmarks: np.ndarray, roi: Roi) -> None:
+        """
+        Choose the region of the next frame from the full-frame landmarks of this one.
+
+        :param landmarks: The full-frame normalized landmarks, of shape (hands, 21, 3).
+        :param roi: The region these landmarks were found in.
+        """
+        if roi == FULL_FRAME:
+            self.frames_since_search = 0
+        else:
+            self.frames_since_search += 1
+
+        if len(landmarks) < self.hand_count and roi != FULL_FRAME:
+            # A hand was lost: search the whole frame next time
+            self.hand_count = 0
+            return
+        self.hand_count = len(landmarks)
+        if self.hand_count == 0:
+            return
+
+        low = landmarks[..., :2].reshape(-1, 2).min(axis=0)
+        high = landmarks[..., :2].reshape(-1, 2).max(axis=0)
+        center = (low + high) / 2
+        size = np.maximum((high - low) * (1 + 2 * self.margin), self.min_size)
+        inner = np.concatenate([low, high])
+
+        current = np.array(self.roi)
+        guard = (current[2:] - current[:2]) * self.margin / (1 + 2 * self.margin) / 2
+        fits = np.all(inner[:2] >= current[:2] + guard) and np.all(inner[2:] <= current[2:] - guard)
+        if self.roi != FULL_FRAME and fits:
+            return
+
+        new_low = np.clip(center - size / 2, 0, 1)
+        new_high = np.clip(center + size / 2, 0, 1)
+        self.roi = (float(new_low[0]), float(new_low[1]), float(new_high[0]), float(new_high[1]))
@@ -0,0 +1,217 @@
+import heapq
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ScheduledTask:
+    """A callback run by the scheduler at a fixed rate."""
+
+    def __init__(self, name: str, callback: Callable[[], Any], rate: float) -> None:
+        """
+        Initialize the task.
+
+        :param name: The name of the task, used in the statistics.
+        :param callback: The function to call, without arguments.
+        :param rate: The number of calls per second.
+        """
+        self.name = name
+        self.callback = callback
+        self.interval = 1 / rate
+        self.next_run = 0.0
+        self.runs = 0
+        self.late_runs = 0
+        self.busy_time = 0.0
+        self.after_id: Optional[str] = None
+
+
+class Scheduler:
+    """
+    Rate-controlled tasks run from the Tk event loop.
+
+    Every task is a timer of the Tk root: between two deadlines mainloop sleeps in
+    the OS waiting for events, instead of spinning. Deadlines are kept on a fixed
+    grid, so a task does not drift when its callback takes time; a task that falls
+    more than a period behind skips the missed runs rather than bursting to catch up.
+    """
+
+    def __init__(self, root: Any, clock: Callable[[], float] = time.perf_counter) -> None:
+        """
+        Initialize the scheduler.
+
+        :param root: The object whose after and after_cancel methods run the timers, usually the Tk root.
+        :param clock: The clock deadlines are measured with, in seconds. (default: time.perf_counter)
+        """
+        self.root = root
+        self.clock = clock
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self.running = False
+
+    def add_task(self, name: str, callback: Callable[[], Any], rate: float) -> ScheduledTask:
+        """
+        Add a task, started at once if the scheduler is running.
+
+        :param name: The name of the task.
+        :param callback: The function to call, without arguments.
+        :param rate: The number of calls per second.
+        :return: The task.
+        """
+        if rate <= 0:
+            raise ValueError(f"The rate of task {name!r} must be positive, got {rate}")
+        task = ScheduledTask(name, callback, rate)
+        self.tasks[name] = task
+        if self.running:
+            task.next_run = self.clock()
+            self._schedule(task)
+        return task
+
+    def set_rate(self, name: str, rate: float) -> None:
+        """
+        Change the rate of a task, from its next run on.
+
+        :param name: The name of the task.
+        :param rate: The number of calls per second.
+        """
+        if rate <= 0:
+            raise ValueError(f"The rate of task {name!r} must be positive, got {rate}")
+        self.tasks[name].interval = 1 / rate
+
+    def start(self) -> None:
+        """
+        Start running every task, the first runs being due immediately.
+        """
+        if self.running:
+            return
+        self.running = True
+        now = self.clock()
+        for task in self.tasks.values():
+            task.next_run = now
+            self._schedule(task)
+
+    def stop(self) -> None:
+        """
+        Stop running the tasks and cancel their pending timers.
+        """
+        self.running = False
+        for task in self.tasks.values():
+            if task.after_id is not None:
+                self.root.after_cancel(task.after_id)
+                task.after_id = None
+
+    def _schedule(self, task: ScheduledTask) -> None:
+        """
+        Set the timer of a task for its next deadline.
+
+        :param task: The task.
+        """
+        # Tk timers count whole milliseconds: rounding up never runs a task early, and
+        # waiting at least 1 ms lets pending events and the OS have the time
+        delay_ms = max(1, math.ceil((task.next_run - self.clock()) * 1000))
+        task.after_id = self.root.after(delay_ms, self._run, task)
+
+    def _run(self, task: ScheduledTask) -> None:
+        """
+        Run a task and schedule its next run.
+
+        :param task: The task.
+        """
+        task.after_id = None
+        if not self.running:
+            return
+        start = self.clock()
+        try:
+            task.callback()
+        finally:
+            end = self.clock()
+            task.runs += 1
+            task.busy_time += end - start
+            task.next_run += task.interval
+            if task.next_run < end:
+                task.late_runs += 1
+                task.next_run += math.ceil((end - task.next_run) / task.interval) * task.interval
+            if self.running:
+                self._schedule(task)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the runs of every task.
+
+        :return: A dictionary per task with the number of runs, of late runs, and the mean run time in milliseconds.
+        """
+        return {
+            name: {
+                "runs": task.runs,
+                "late_runs": task.late_runs,
+                "mean_ms": task.busy_time / task.runs * 1000 if task.runs else 0.0,
+            }
+            for name, task in self.tasks.items()
+        }
+
+
+class HeadlessLoop:
+    """
+    The timers of a Tk root without a window, to run a Scheduler headless.
+
+    mainloop sleeps until the earliest timer is due and runs it, until destroy is
+    called or no timer is left. Timers due at the same time run in the order they
+    were set, like Tk's.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter, sleep: Callable[[float], Any] = time.sleep) -> None:
+        """
+        Initialize the loop.
+
+        :param clock: The clock timers are measured with, in seconds. (default: time.perf_counter)
+        :param sleep: The function waiting for a number of seconds. (default: time.sleep)
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.running = False
+        self._timers: List[Tuple[float, int, Callable, tuple]] = []
+        self._cancelled = set()
+        self._next_id = 0
+
+    def after(self, delay_ms: int, callback: Callable, *args) -> int:
+        """
+        Call a function after a delay.
+
+        :param delay_ms: The delay in milliseconds.
+        :param callback: The function to call.
+        :param args: The arguments of the call.
+        :return: The ID of the timer, for after_cancel.
+        """
+        self._next_id += 1
+        heapq.heappush(self._timers, (self.clock() + delay_ms / 1000, self._next_id, callback, args))
+        return self._next_id
+
+    def after_cancel(self, after_id: int) -> None:
+        """
+        Cancel a timer that has not run yet.
+
+        :param after_id: The ID returned by after.
+        """
+        self._cancelled.add(after_id)
+
+    def mainloop(self) -> None:
+        """
+        Run the timers as they fall due, until destroy is called or no timer is left.
+        """
+        self.running = True
+        while self.running and self._timers:
+            due, after_id, callback, args = self._timers[0]
+            wait = due - self.clock()
+            if wait > 0:
+                self.sleep(wait)
+                continue
+            heapq.heappop(self._timers)
+            if after_id in self._cancelled:
+                self._cancelled.discard(after_id)
+                continue
+            callback(*args)
+        self.running = False
+
+    def destroy(self) -> None:
+        """
+        Make mainloop return once the running timer is done.
+        """
+        self.running = False
@@ -0,0 +1,269 @@
+import os
+import time
+import numpy as np
+from typing import Callable, List, Optional, Sequence, Tuple
+
+LANDMARK_COUNT = 21
+SESSION_MAGIC = b"THRSESS1"
+MAX_HANDS = 2
+# x and y are stored as uint16 over [-0.5, 1.5] (hands partly out of frame are
+# slightly outside [0, 1]), z as int8 over [-0.5, 0.5]: steps far below MediaPipe's jitter
+XY_OFFSET = 0.5
+XY_SCALE = 65535 / 2.0
+Z_SCALE = 127 / 0.5
+WRITE_BUFFER_RECORDS = 64
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("max_hands", "<u2"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("reserved", "<u2"),
+])
+
+
+def record_dtype(max_hands: int = MAX_HANDS) -> np.dtype:
+    """
+    Build the fixed-width record of one frame.
+
+    :param max_hands: The number of hands a record holds. (default: 2)
+    :return: The packed structured dtype, of 18 + 105 * max_hands bytes.
+    """
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("frequency", "<f4"),
+        ("volume", "<f4"),
+        ("hand_count", "u1"),
+        ("right_hands", "u1"),
+        ("xy", "<u2", (max_hands, LANDMARK_COUNT, 2)),
+        ("z", "i1", (max_hands, LANDMARK_COUNT)),
+    ])
+
+
+def quantize_landmarks(landmarks: np.ndarray, xy: np.ndarray, z: np.ndarray) -> None:
+    """
+    Quantize normalized landmarks into the xy and z fields of a record.
+
+    :param landmarks: The normalized landmarks, of shape (hands, 21, 3).
+    :param xy: The uint16 array of shape (hands, 21, 2) to write x and y to.
+    :param z: The int8 array of shape (hands, 21) to write z to.
+    """
+    xy[:] = np.clip(np.rint((landmarks[..., :2] + XY_OFFSET) * XY_SCALE), 0, 65535)
+    z[:] = np.clip(np.rint(landmarks[..., 2] * Z_SCALE), -127, 127)
+
+
+def dequantize_landmarks(xy: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """
+    Rebuild normalized landmarks from the xy and z fields of a record.
+
+    :param xy: The uint16 x and y, of shape (hands, 21, 2).
+    :param z: The int8 z, of shape (hands, 21).
+    :return: The normalized landmarks, of shape (hands, 21, 3).
+    """
+    landmarks = np.empty(xy.shape[:-1] + (3,), dtype=np.float32)
+    np.multiply(xy, 1 / XY_SCALE, out=landmarks[..., :2], casting="unsafe")
+    landmarks[..., :2] -= XY_OFFSET
+    np.multiply(z, 1 / Z_SCALE, out=landmarks[..., 2], casting="unsafe")
+    return landmarks
+
+
+class SessionRecorder:
+    """
+    Recording of a session to a new file: per frame, the timestamp, the hands and the control values.
+
+    Records have a fixed width, so the file is a header followed by a plain array
+    that a reader maps without parsing. Records are filled in a preallocated buffer
+    and written by chunks of buffer_records; a session interrupted by a crash loses
+    at most one chunk, and a truncated last record is ignored when the file is read.
+    Timestamps are time.perf_counter() times, whose origin changes with every
+    process, so a session is never appended to the recording of another one.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_hands: int = MAX_HANDS,
+            frame_shape: Tuple[int, int] = (0, 0),
+            buffer_records: int = WRITE_BUFFER_RECORDS
+        ) -> None:
+        """
+        Create the file, replacing any file at that path.
+
+        :param path: The path of the recording.
+        :param max_hands: The number of hands recorded per frame, further ones being dropped. (default: 2)
+        :param frame_shape: The (height, width) of the camera frames, used to draw the hands on replay. (default: unknown)
+        :param buffer_records: The number of records written at once. (default: 64)
+        """
+        if not 0 < max_hands <= 8:
+            raise ValueError(f"A recording holds 1 to 8 hands per frame, got {max_hands}")
+        self.path = path
+        self.max_hands = max_hands
+        self.dtype = record_dtype(max_hands)
+        self.records = 0
+        self._buffer = np.zeros(buffer_records, dtype=self.dtype)
+        self._buffered = 0
+
+        self._file = open(path, "wb")
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = SESSION_MAGIC
+        header["max_hands"] = max_hands
+        header["height"], header["width"] = frame_shape
+        self._file.write(header.tobytes())
+
+    def append(
+            self,
+            timestamp: float,
+            landmarks: Optional[np.ndarray],
+            handedness: Sequence[str],
+            frequency: float,
+            volume: float
+        ) -> None:
+        """
+        Add the record of a frame.
+
+        :param timestamp: The capture time of the frame, in seconds.
+        :param landmarks: The normalized landmarks of the hands, of shape (hands, 21, 3), None for no hand.
+        :param handedness: The "Right"/"Left" label of each hand.
+        :param frequency: The frequency played, 0 for silence.
+        :param volume: The volume played, from 0 to 100.
+        """
+        record = self._buffer[self._buffered]
+        count = 0 if landmarks is None else min(len(landmarks), len(handedness), self.max_hands)
+        record["timestamp"] = timestamp
+        record["frequency"] = frequency
+        record["volume"] = volume
+        record["hand_count"] = count
+        record["right_hands"] = sum(1 << hand for hand in range(count) if handedness[hand] == "Right")
+        if count:
+            quantize_landmarks(landmarks[:count], record["xy"][:count], record["z"][:count])
+        self._buffered += 1
+        self.records += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered records to the file.
+        """
+        if self._buffered:
+            self._file.write(memoryview(self._buffer[:self._buffered]).cast("B"))
+            self._file.flush()
+            self._buffered = 0
+
+    def close(self) -> None:
+        """
+        Write the buffered records and close the file.
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+class SessionRecording:
+    """
+    A recorded session, memory-mapped: opening costs the same for a minute or an hour.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Map a recording.
+
+        :param path: The path of the recording.
+        """
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header[0]["magic"] != SESSION_MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        self.path = path
+        self.max_hands = int(header[0]["max_hands"])
+        self.frame_shape = (int(header[0]["height"]), int(header[0]["width"]))
+        self.dtype = record_dtype(self.max_hands)
+        count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        The capture time of every frame, in seconds.
+        """
+        return self.records["timestamp"]
+
+    @property
+    def duration(self) -> float:
+        """
+        The time from the first frame to the last, in seconds.
+        """
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0
+
+    def hands(self, index: int) -> Tuple[np.ndarray, List[str]]:
+        """
+        Decode the hands of a frame.
+
+        :param index: The frame index.
+        :return: A tuple (landmarks, handedness) of the normalized landmarks, of shape
+                 (hands, 21, 3), and their "Right"/"Left" labels.
+        """
+        record = self.records[index]
+        count = int(record["hand_count"])
+        handedness = ["Right" if record["right_hands"] >> hand & 1 else "Left" for hand in range(count)]
+        return dequantize_landmarks(record["xy"][:count], record["z"][:count]), handedness
+
+    def controls(self, index: int) -> Tuple[float, float]:
+        """
+        Read the control values of a frame.
+
+        :param index: The frame index.
+        :return: A tuple (frequency, volume).
+        """
+        record = self.records[index]
+        return float(record["frequency"]), float(record["volume"])
+
+
+class SessionReplayer:
+    """
+    Replay of a recording at the pace it was recorded, polled from a timer.
+    """
+
+    def __init__(self, recording: SessionRecording, speed: float = 1.0, clock: Callable[[], float] = time.perf_counter) -> None:
+        """
+        Initialize the replay.
+
+        :param recording: The recording to replay.
+        :param speed: How many times faster than recorded the session is replayed. (default: 1)
+        :param clock: The clock the replay is paced with, in seconds. (default: time.perf_counter)
+        """
+        self.recording = recording
+        self.speed = speed
+        self.clock = clock
+        self.index = -1
+        self._start = None
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the last frame was replayed.
+        """
+        return self.index >= len(self.recording) - 1
+
+    def poll(self) -> Optional[int]:
+        """
+        Find the newest frame due, skipping those missed since the last call.
+
+        :return: The index of the frame, or None when no new frame is due.
+        """
+        if self.finished:
+            return None
+        timestamps = self.recording.timestamps
+        if self._start is None:
+            self._start = self.clock()
+        elapsed = (self.clock() - self._start) * self.speed
+        due = int(np.searchsorted(timestamps, timestamps[0] + elapsed, side="right")) - 1
+        if due <= self.index:
+            return None
+        self.index = due
+        return due
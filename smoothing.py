@@ -1,4 +1,5 @@
 import numpy as np
+from typing import List, Optional, Sequence, Tuple, Union
 
 class DataSmoother:
     
@@ -28,4 +29,271 @@ class DataSmoother:
         limited_value = np.clip(smooth_value, self.previous_value - self.change_limit, self.previous_value + self.change_limit)
         self.previous_value = limited_value
 
-        return limited_value
\ No newline at end of file
+        return limited_value
+
+REFERENCE_FRAME_RATE = 30.0
+LANDMARK_MIN_CUTOFF = 1.0
+LANDMARK_BETA = 20.0
+LANDMARK_DERIVATIVE_CUTOFF = 1.0
+MAX_PREDICTION = 0.1
+
+class ParameterRamp:
+    """
+    Audio-rate smoothing of a control value towards a sparse target.
+
+    Targets arrive at the video frame rate, but the value is rendered for every sample
+    of an audio block: it approaches the target exponentially with a time constant in
+    seconds and is slew limited in units per second, so the result does not depend on
+    how often targets are set. Each block is computed in closed form with NumPy.
+
+    The value may also be an array of independent values (one per voice, say), in
+    which case each block is rendered for all of them in one batch.
+    """
+
+    def __init__(
+            self,
+            time_constant: float = 0.05,
+            slew_rate: float = np.inf,
+            sample_rate: int = 44100,
+            value: Optional[Union[float, np.ndarray]] = None
+        ) -> None:
+        """
+        Initialize a ParameterRamp object.
+
+        :param time_constant: The time to cover 63% of the distance to the target, in seconds. (default: 0.05)
+        :param slew_rate: The maximum change per second. (default: unlimited)
+        :param sample_rate: The number of values rendered per second. (default: 44100)
+        :param value: The initial value or array of values, or None to jump to the first target. (default: None)
+        """
+        self.time_constant = time_constant
+        self.slew_rate = slew_rate
+        self.sample_rate = sample_rate
+        self.value = value
+        self.target = np.copy(value) if isinstance(value, np.ndarray) else value
+        self._curve_key = None
+        self._approach = None
+        self._limit = None
+        self._negative_limit = None
+
+    def configure_from_frame_parameters(
+            self,
+            smoothing_factor: float,
+            change_limit: float,
+            frame_rate: float = REFERENCE_FRAME_RATE
+        ) -> None:
+        """
+        Set the time constant and slew rate matching DataSmoother parameters at a frame rate.
+
+        A DataSmoother called frame_rate times per second with these parameters moves like
+        this ramp, which keeps doing so whatever the actual frame rate is.
+
+        :param smoothing_factor: The DataSmoother smoothing factor (0 to 1).
+        :param change_limit: The DataSmoother maximum change per call.
+        :param frame_rate: The frame rate the parameters were tuned at. (default: 30)
+        """
+        smoothing_factor = float(np.clip(smoothing_factor, 0, 1))
+        if smoothing_factor >= 1:
+            self.time_constant = 0.0
+        elif smoothing_factor <= 0:
+            self.time_constant = np.inf
+        else:
+            self.time_constant = -1 / (frame_rate * np.log(1 - smoothing_factor))
+        self.slew_rate = change_limit * frame_rate
+
+    def set_target(self, target: float) -> None:
+        """
+        Set the value to move towards.
+
+        :param target: The new target, or array of targets for an array ramp.
+        """
+        if isinstance(self.value, np.ndarray):
+            self.target[...] = target
+            return
+        self.target = float(target)
+        if self.value is None:
+            self.value = self.target
+
+    def _prepare(self, size: int) -> None:
+        """
+        Cache the approach curve and slew steps for a block size and the current parameters.
+
+        :param size: The number of values per block.
+        """
+        key = (size, self.time_constant, self.sample_rate)
+        if key == self._curve_key:
+            return
+        steps = np.arange(1, size + 1, dtype=np.float64)
+        if self.time_constant <= 0:
+            self._approach = np.ones(size)
+        else:
+            self._approach = -np.expm1(-steps / (self.time_constant * self.sample_rate))
+        self._steps = steps / self.sample_rate
+        self._limit = np.empty(size)
+        self._negative_limit = np.empty(size)
+        self._curve_key = key
+
+    def render(self, out: np.ndarray) -> np.ndarray:
+        """
+        Render the values of the next block.
+
+        :param out: The float array to render into, one value per sample, with a
+                    leading axis per value when the ramp holds an array.
+        :return: The rendered values.
+        """
+        if self.value is None:
+            out.fill(0)
+            return out
+        start = np.expand_dims(self.value, -1)
+        delta = np.subtract(self.target, self.value)
+        if not np.any(delta):
+            out[...] = start
+            return out
+
+        self._prepare(out.shape[-1])
+        np.multiply(np.expand_dims(delta, -1), self._approach, out=out)
+        if np.isfinite(self.slew_rate):
+            np.multiply(self._steps, self.slew_rate, out=self._limit)
+            np.negative(self._limit, out=self._negative_limit)
+            np.minimum(out, self._limit, out=out)
+            np.maximum(out, self._negative_limit, out=out)
+        out += start
+        if isinstance(self.value, np.ndarray):
+            self.value[:] = out[..., -1]
+        else:
+            self.value = float(out[-1])
+        return out
+
+
+class LandmarkFilter:
+    """
+    One-Euro filtering and prediction of whole hands.
+
+    Every landmark of every hand is filtered at once as NumPy arrays. The cutoff
+    frequency of each landmark rises with its speed: still hands are smoothed
+    heavily (no jitter) and moving hands lightly (little lag). The filtered
+    velocity lets predict extrapolate the hands to any time after the last frame,
+    such as the time the next audio block is heard.
+
+    Hands are tracked by handedness label, in the order they are given, so the
+    second right hand of a frame continues the second right hand of the previous
+    one. A hand missing from a frame is forgotten.
+    """
+
+    def __init__(
+            self,
+            max_hands: int = 4,
+            min_cutoff: float = LANDMARK_MIN_CUTOFF,
+            beta: float = LANDMARK_BETA,
+            derivative_cutoff: float = LANDMARK_DERIVATIVE_CUTOFF,
+            max_prediction: float = MAX_PREDICTION,
+            landmark_count: int = 21
+        ) -> None:
+        """
+        Initialize a LandmarkFilter object.
+
+        :param max_hands: The maximum number of hands tracked, further hands are ignored. (default: 4)
+        :param min_cutoff: The cutoff frequency of still landmarks, in Hz. (default: 1.0)
+        :param beta: The increase of the cutoff frequency per unit of speed (normalized coordinates per second). (default: 20.0)
+        :param derivative_cutoff: The cutoff frequency of the velocity filter, in Hz. (default: 1.0)
+        :param max_prediction: The longest extrapolation predict performs, in seconds. (default: 0.1)
+        :param landmark_count: The number of landmarks per hand. (default: 21)
+        """
+        self.max_hands = max_hands
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self.max_prediction = max_prediction
+        self.labels: List[Optional[str]] = [None] * max_hands
+        self._position = np.zeros((max_hands, landmark_count, 3), dtype=np.float32)
+        self._velocity = np.zeros((max_hands, landmark_count, 3), dtype=np.float32)
+        self._time = np.zeros(max_hands)
+        self._order: List[int] = []
+
+    @staticmethod
+    def _smoothing_factor(elapsed: np.ndarray, cutoff: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Compute the exponential smoothing factor of a low-pass filter.
+
+        :param elapsed: The time since the previous sample, in seconds.
+        :param cutoff: The cutoff frequency, in Hz.
+        :return: The smoothing factor, between 0 and 1.
+        """
+        time_constant = 1 / (2 * np.pi * cutoff)
+        return 1 / (1 + time_constant / elapsed)
+
+    def update(self, landmarks: np.ndarray, handedness: Sequence[str], timestamp: float) -> np.ndarray:
+        """
+        Filter the hands of a new frame.
+
+        :param landmarks: The normalized landmarks of the frame, of shape (hands, 21, 3).
+        :param handedness: The "Right"/"Left" label of each hand.
+        :param timestamp: The capture time of the frame, in seconds.
+        :return: The filtered landmarks, of shape (hands, 21, 3), at most max_hands hands.
+        """
+        count = min(len(handedness), self.max_hands)
+        # "Right", "Right 2"... so that several hands of a side keep their own state
+        labels = []
+        for label in handedness[:count]:
+            same_side = sum(previous.split(" ")[0] == label for previous in labels)
+            labels.append(label if same_side == 0 else f"{label} {same_side + 1}")
+
+        slots = {label: slot for slot, label in enumerate(self.labels) if label in labels}
+        free = [slot for slot in range(self.max_hands) if slot not in slots.values()]
+        self.labels = [self.labels[slot] if slot in slots.values() else None for slot in range(self.max_hands)]
+        tracked, new = [], []
+        for hand, label in enumerate(labels):
+            if label in slots:
+                tracked.append((hand, slots[label]))
+            else:
+                slot = free.pop(0)
+                self.labels[slot] = label
+                new.append((hand, slot))
+        self._order = [slot for _, slot in sorted(tracked + new)]
+
+        if new:
+            hands, new_slots = np.array(new).T
+            self._position[new_slots] = landmarks[hands]
+            self._velocity[new_slots] = 0
+            self._time[new_slots] = timestamp
+        if tracked:
+            hands, tracked_slots = np.array(tracked).T
+            elapsed = np.maximum(timestamp - self._time[tracked_slots], 1e-6)[:, None, None]
+            previous = self._position[tracked_slots]
+            velocity = (landmarks[hands] - previous) / elapsed
+            velocity_factor = self._smoothing_factor(elapsed, self.derivative_cutoff)
+            velocity = self._velocity[tracked_slots] + velocity_factor * (velocity - self._velocity[tracked_slots])
+            # The speed of each landmark in the image plane sets its cutoff
+            speed = np.hypot(velocity[..., 0], velocity[..., 1])[..., None]
+            factor = self._smoothing_factor(elapsed, self.min_cutoff + self.beta * speed)
+            self._position[tracked_slots] = previous + factor * (landmarks[hands] - previous)
+            self._velocity[tracked_slots] = velocity
+            self._time[tracked_slots] = timestamp
+        return self._position[self._order]
+
+    @property
+    def handedness(self) -> List[str]:
+        """
+        The "Right"/"Left" label of each tracked hand, in the order of the last frame.
+        """
+        return [self.labels[slot].split(" ")[0] for slot in self._order]
+
+    def predict(self, timestamp: float) -> Tuple[np.ndarray, List[str]]:
+        """
+        Extrapolate the tracked hands to a time after the last frame.
+
+        :param timestamp: The time to predict the hands at, in seconds. The extrapolation
+                          is limited to max_prediction after the last frame.
+        :return: A tuple (landmarks, handedness) of the predicted normalized landmarks,
+                 of shape (hands, 21, 3), and their "Right"/"Left" labels.
+        """
+        if not self._order:
+            return self._position[:0], []
+        ahead = np.clip(timestamp - self._time[self._order], 0, self.max_prediction)[:, None, None]
+        return self._position[self._order] + self._velocity[self._order] * ahead, self.handedness
+
+    def reset(self) -> None:
+        """
+        Forget every hand.
+        """
+        self.labels = [None] * self.max_hands
+        self._order = []
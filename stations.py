@@ -0,0 +1,374 @@
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import hand_tracking
+import midi
+from frame_pool import FramePool
+from frame_sources import FrameSource
+from inference_worker import InferenceWorker, create_hand_detector
+from latency import LatencyTracer
+from profiles import PROFILES
+from smoothing import LandmarkFilter
+
+CAPTURE_RATE = 120
+POLL_RATE = 200
+CONTROL_RATE = 100
+REPORT_INTERVAL = 5.0
+
+
+class Station:
+    """
+    One performer: a frame source, the inference worker tracking its hands, and its voice.
+
+    Every station has its own worker process, with its own MediaPipe Hands instance:
+    Hands keeps tracking state from one frame to the next, so the frames of a camera
+    must always go to the same instance. The right hand sets the pitch of the voice
+    and the left hand its volume, which is held while the left hand is not seen.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            frame_source: FrameSource,
+            slot: int,
+            max_num_hands: int = 2,
+            detector_factory: Callable = create_hand_detector,
+            model_settings: Optional[dict] = None,
+            inference_width: Optional[int] = None,
+            use_roi: bool = True,
+            use_landmark_filter: bool = True,
+            volume: float = 0.0
+        ) -> None:
+        """
+        Initialize the station, without starting its worker.
+
+        :param name: The name of the station, used in the reports.
+        :param frame_source: The frame source of the performer.
+        :param slot: The voice slot of the station in the host's polyphonic oscillator.
+        :param max_num_hands: The maximum number of hands to detect. (default: 2)
+        :param detector_factory: A picklable callable creating the hand detector in the worker. (default: create_hand_detector)
+        :param model_settings: Keyword arguments of the detector factory beyond max_num_hands. (default: None)
+        :param inference_width: The maximum width of the image given to the detector. (default: None, full resolution)
+        :param use_roi: Whether to crop around the hands of the previous frame. (default: True)
+        :param use_landmark_filter: Whether the landmarks are One-Euro filtered. (default: True)
+        :param volume: The volume held until the left hand is first seen, from 0 to 100. (default: 0)
+        """
+        self.name = name
+        self.frame_source = frame_source
+        self.slot = slot
+        self.max_num_hands = max_num_hands
+        self.detector_factory = detector_factory
+        self.model_settings = dict(model_settings or {})
+        self.inference_width = inference_width
+        self.use_roi = use_roi
+        self.landmark_filter = LandmarkFilter(max_hands=max_num_hands) if use_landmark_filter else None
+        self.volume = volume
+        self.worker: Optional[InferenceWorker] = None
+        self.hands_coord: Dict[str, Dict[str, float]] = {}
+        self.captured_frames = 0
+        self.tracked_frames = 0
+        # Frames not submitted because the worker was busy, over every worker of the station
+        self.dropped_frames = 0
+        # Timings since the last report, replaced by StationHost.report
+        self.tracer = LatencyTracer(enabled=True)
+        # The flip buffer of this station only: it is overwritten by its own next frame
+        self._frame_pool = FramePool()
+
+    def _start_worker(self, frame_shape: Tuple[int, ...]) -> None:
+        """
+        Start a worker for frames of a given shape, replacing the current one.
+
+        :param frame_shape: The shape of the BGR frames.
+        """
+        if self.worker is not None:
+            self.worker.stop()
+        self.worker = InferenceWorker(
+            frame_shape, max_num_hands=self.max_num_hands, detector_factory=self.detector_factory,
+            inference_width=self.inference_width, use_roi=self.use_roi, model_settings=self.model_settings
+        )
+        self.worker.start()
+
+    def start(self) -> None:
+        """
+        Start the worker now if the source announces its frame size, so the model loads
+        while the other stations start; otherwise it starts with the first frame.
+        """
+        if self.frame_source.frame_shape is not None:
+            self._start_worker(self.frame_source.frame_shape)
+
+    def capture(self) -> bool:
+        """
+        Read the newest frame of the source, if one is ready, and submit it if the worker is idle.
+
+        :return: True if a new frame was read.
+        """
+        success, frame, timestamp = self.frame_source.read_latest(timeout=0)
+        if not success:
+            return False
+        self.captured_frames += 1
+        frame = self.frame_source.flip_horizontal(frame, dst=self._frame_pool.get("flip", frame.shape))
+        if self.worker is None or self.worker.frame_shape != frame.shape:
+            self._start_worker(frame.shape)
+        if not self.worker.submit(frame, timestamp):
+            self.dropped_frames += 1
+        return True
+
+    def poll(self) -> bool:
+        """
+        Collect the newest answer of the worker and update the hands.
+
+        :return: True if new hands arrived.
+        """
+        if self.worker is None:
+            return False
+        result = self.worker.poll()
+        if result is None:
+            return False
+        landmarks, handedness = result.landmarks, result.handedness
+        if self.landmark_filter is not None:
+            landmarks = self.landmark_filter.update(landmarks, handedness, result.timestamp)
+            handedness = self.landmark_filter.handedness
+        self.hands_coord = hand_tracking.hands_from_landmarks(landmarks, handedness)
+        self.tracked_frames += 1
+        self.tracer.record("inference", result.inference_time)
+        self.tracer.record("capture_to_hands", result.received - result.timestamp)
+        return True
+
+    def voice(self, pitch_map: midi.PitchMap) -> Optional[Tuple[float, float]]:
+        """
+        Map the hands to the voice of the station.
+
+        :param pitch_map: The mapping from the right hand's height to a frequency.
+        :return: The (frequency, volume) of the voice, or None without a right hand or once the source ended.
+        """
+        if self.frame_source.ended:
+            return None
+        if "Left" in self.hands_coord:
+            self.volume = midi.y_to_volume(self.hands_coord["Left"]["y"])
+        if "Right" not in self.hands_coord:
+            return None
+        return pitch_map.frequency(self.hands_coord["Right"]["y"]), self.volume
+
+    def stop(self) -> None:
+        """
+        Stop the worker and release the source.
+        """
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+        self.frame_source.release()
+
+
+class StationHost:
+    """
+    Several stations run by one process, their voices mixed into one audio output.
+
+    The host only reads frames, moves them to the workers through shared memory and
+    maps hands to voices; inference, the expensive part, runs in one process per
+    station, so the stations use as many cores as there are stations. All voices are
+    slots of one PolyphonicOscillator, mixed in a single audio stream, each scaled by
+    mix_gain so that every performer at full volume does not clip.
+    """
+
+    def __init__(
+            self,
+            stations: Sequence[Station],
+            synth,
+            pitch_map: Optional[midi.PitchMap] = None,
+            mix_gain: Optional[float] = None,
+            clock: Callable[[], float] = time.perf_counter
+        ) -> None:
+        """
+        Initialize the host.
+
+        :param stations: The stations, whose slots are voice slots of synth.
+        :param synth: The PolyphonicOscillator playing the voices.
+        :param pitch_map: The mapping from hand height to frequency, shared by all stations. (default: chromatic, exponential)
+        :param mix_gain: The factor applied to the volume of every voice. (default: 1 / number of stations)
+        :param clock: The clock the reports are measured with, in seconds. (default: time.perf_counter)
+        """
+        self.stations: List[Station] = list(stations)
+        self.synth = synth
+        self.pitch_map = pitch_map if pitch_map is not None else midi.PitchMap()
+        self.mix_gain = mix_gain if mix_gain is not None else 1 / max(1, len(self.stations))
+        self.clock = clock
+        self._report_time = clock()
+        self._report_counts = {station.name: (0, 0, 0) for station in self.stations}
+
+    def start(self) -> None:
+        """
+        Start the workers whose frame size is known, all at once so their models load in parallel.
+        """
+        for station in self.stations:
+            station.start()
+
+    @property
+    def ended(self) -> bool:
+        """
+        Whether the sources of all stations ended, which never happens with a camera.
+        """
+        return all(station.frame_source.ended for station in self.stations)
+
+    def capture_task(self) -> None:
+        """
+        Read and submit the newest frame of every station.
+        """
+        for station in self.stations:
+            station.capture()
+
+    def poll_task(self) -> None:
+        """
+        Collect the newest hands of every station.
+        """
+        for station in self.stations:
+            station.poll()
+
+    def control_task(self) -> None:
+        """
+        Set the voice of every station, releasing those without a right hand.
+        """
+        voices = {}
+        for station in self.stations:
+            voice = station.voice(self.pitch_map)
+            if voice is not None:
+                voices[station.slot] = (voice[0], voice[1] * self.mix_gain)
+        self.synth.set_voices(voices)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Measure every station since the previous report, and start the next window.
+
+        :return: For each station, its capture and tracking rates in frames per second, the
+                 number of frames dropped because its worker was busy, and the milliseconds
+                 of inference and from capture to hands (mean and percentiles), all over the
+                 time since the previous report.
+        """
+        now = self.clock()
+        elapsed = max(now - self._report_time, 1e-9)
+        self._report_time = now
+        report = {}
+        for station in self.stations:
+            captured, tracked, dropped = self._report_counts[station.name]
+            self._report_counts[station.name] = (station.captured_frames, station.tracked_frames, station.dropped_frames)
+            stats = {
+                "capture_fps": (station.captured_frames - captured) / elapsed,
+                "tracking_fps": (station.tracked_frames - tracked) / elapsed,
+                "dropped_frames": station.dropped_frames - dropped,
+            }
+            summary = station.tracer.summary()
+            station.tracer = LatencyTracer(enabled=True)
+            for stage in ("inference", "capture_to_hands"):
+                if stage in summary:
+                    for key in ("mean_ms", "p50_ms", "p95_ms"):
+                        stats[f"{stage}_{key}"] = summary[stage][key]
+            report[station.name] = stats
+        return report
+
+    def print_report(self) -> None:
+        """
+        Print one line per station with its rates and latencies since the previous report.
+        """
+        for name, stats in self.report().items():
+            print(
+                f"{name}: {stats['capture_fps']:.1f} fps captured, {stats['tracking_fps']:.1f} fps tracked, "
+                f"capture to hands p50 {stats.get('capture_to_hands_p50_ms', float('nan')):.1f} ms "
+                f"p95 {stats.get('capture_to_hands_p95_ms', float('nan')):.1f} ms, "
+                f"{stats['dropped_frames']} dropped",
+                flush=True
+            )
+
+    def schedule(self, scheduler, report_interval: Optional[float] = REPORT_INTERVAL) -> None:
+        """
+        Add the tasks of the host to a scheduler.
+
+        :param scheduler: The Scheduler to run the tasks.
+        :param report_interval: The seconds between two printed reports, None for no report. (default: 5)
+        """
+        scheduler.add_task("capture", self.capture_task, CAPTURE_RATE)
+        scheduler.add_task("poll", self.poll_task, POLL_RATE)
+        scheduler.add_task("control", self.control_task, CONTROL_RATE)
+        if report_interval:
+            scheduler.add_task("report", self.print_report, 1 / report_interval)
+
+    def stop(self) -> None:
+        """
+        Release every voice and stop every station.
+        """
+        self.synth.set_voices({})
+        for station in self.stations:
+            station.stop()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line of the multi-station host.
+
+    :param argv: The arguments, sys.argv[1:] if None.
+    :return: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Play one theremin voice per camera, all mixed in one audio output.")
+    parser.add_argument("--source", action="append", required=True,
+                        help="a station's camera device ID, \"synthetic\", video file, image directory or .npz "
+                             "landmark track; repeat for every station")
+    parser.add_argument("--no-audio", action="store_true",
+                        help="render the sound in real time without a sound card (no pygame)")
+    parser.add_argument("--profile", choices=PROFILES, default="balanced",
+                        help="hand tracking settings of every station (default: %(default)s)")
+    parser.add_argument("--report-interval", metavar="SECONDS", type=float, default=REPORT_INTERVAL,
+                        help="seconds between two per-station reports, 0 for none (default: %(default)s)")
+    parser.add_argument("--duration", metavar="SECONDS", type=float,
+                        help="run for SECONDS, then print the per-station report of the whole run as JSON")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run one station per source until the process is interrupted, the duration is over or every source ended.
+
+    :param argv: The arguments, sys.argv[1:] if None.
+    :return: The exit status.
+    """
+    from frame_sources import open_frame_source
+    from scheduler import HeadlessLoop, Scheduler
+    from voices import PolyphonicOscillator
+
+    args = parse_args(argv)
+    profile = PROFILES[args.profile]
+    stations = [
+        Station(f"{index}:{spec}", open_frame_source(spec), index,
+                model_settings=profile.model_settings, inference_width=profile.inference_width)
+        for index, spec in enumerate(args.source)
+    ]
+    synth = PolyphonicOscillator(max_voices=len(stations))
+    host = StationHost(stations, synth)
+    loop = HeadlessLoop()
+    scheduler = Scheduler(loop)
+    host.start()
+    synth.start(silent=args.no_audio)
+    host.schedule(scheduler, args.report_interval if args.duration is None else None)
+
+    def stop_at_end():
+        # Video files, image directories and landmark tracks end; cameras never do
+        if host.ended:
+            loop.destroy()
+
+    scheduler.add_task("end", stop_at_end, CONTROL_RATE / 10)
+    if args.duration is not None:
+        loop.after(int(args.duration * 1000), loop.destroy)
+    scheduler.start()
+    try:
+        loop.mainloop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        if args.duration is not None:
+            print(json.dumps(host.report(), indent=2))
+        host.stop()
+        synth.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""Stand-ins for the results of MediaPipe Hands, for detectors faked in tests."""
+
+
+class FakeLandmark:
+    def __init__(self, x, y, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+class FakeHand:
+    def __init__(self, x, y):
+        self.landmark = [FakeLandmark(x, y) for _ in range(21)]
+
+class FakeClassification:
+    def __init__(self, label):
+        self.classification = [type("Category", (), {"label": label})()]
+
+class FakeResults:
+    def __init__(self, hands, labels):
+        self.multi_hand_landmarks = hands
+        self.multi_handedness = [FakeClassification(label) for label in labels]
@@ -3,6 +3,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import time
 import cv2
 import pytest
 from camera import Camera
@@ -46,4 +47,36 @@ import numpy as np
 #     """
 #     camera = Camera()
 #     camera.release()
-#     assert not camera.video_capture.isOpened()
\ No newline at end of file
+#     assert not camera.video_capture.isOpened()
+
+def write_test_video(path, frame_count=30):
+    """
+    Write a small MJPG video whose frames have increasing brightness.
+    """
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for index in range(frame_count):
+        writer.write(np.full((48, 64, 3), index * 8, dtype=np.uint8))
+    writer.release()
+
+def test_threaded_camera_returns_newest_frame_and_counts_drops(tmp_path):
+    """
+    Test that the threaded mode hands over the newest frame and counts the frames it dropped.
+    """
+    video_path = tmp_path / "frames.avi"
+    write_test_video(video_path)
+    camera = Camera(str(video_path), threaded=True)
+    ret, image, timestamp = camera.read_latest()
+    assert ret
+    assert image.shape == (48, 64, 3)
+    assert timestamp > 0
+
+    # The file decodes much faster than it is consumed: all frames but the read ones are dropped
+    deadline = time.time() + 5
+    while camera.captured_frames < 30 and time.time() < deadline:
+        time.sleep(0.01)
+    ret, last_image, _ = camera.read_latest(timeout=0)
+    assert ret
+    assert last_image.mean() > image.mean()
+    assert camera.dropped_frames == camera.captured_frames - 2
+    assert camera.read_latest(timeout=0)[0] is False
+    camera.release()
@@ -0,0 +1,107 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socket
+import time
+import midi
+from control_output import MidiOutput, OscOutput, UdpTransport, decode_osc_message, open_control_output
+
+
+class RecordingTransport:
+    """Stand-in for a MIDI port, keeping the messages sent."""
+
+    def __init__(self):
+        self.messages = []
+        self.closed = False
+
+    def send(self, data):
+        self.messages.append(bytes(data))
+
+    def close(self):
+        self.closed = True
+
+
+def test_osc_output_to_udp_listener():
+    """
+    Test that OSC messages reach a local UDP listener, coalesced to the newest values.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.settimeout(2)
+    output = OscOutput(UdpTransport(*listener.getsockname()), max_rate=20)
+    output.start()
+    try:
+        # The timestamp given with the values, such as their capture time, travels with them
+        output.update(440.0, 50, timestamp=12.5)
+        address, (frequency, volume, timestamp) = decode_osc_message(listener.recv(1024))
+        assert address == "/theremin/control"
+        assert frequency == 440 and volume == 0.5 and timestamp == 12.5
+
+        # A burst of updates within one send interval only sends the newest values
+        for step in range(50):
+            output.update(300.0 + step, 80)
+        received = []
+        listener.settimeout(0.3)
+        try:
+            while True:
+                received.append(decode_osc_message(listener.recv(1024))[1][0])
+        except socket.timeout:
+            pass
+        assert received[-1] == 349 and len(received) <= 2
+    finally:
+        output.stop()
+        listener.close()
+    summary = output.tracer.summary()
+    assert summary["update_to_send"]["count"] == summary["source_to_send"]["count"] == output.sends
+    assert summary["source_to_send"]["max_ms"] > summary["update_to_send"]["max_ms"]
+
+
+def test_midi_output_note_bend_and_volume():
+    """
+    Test that frequencies become notes with pitch bends, and silence ends the note.
+    """
+    transport = RecordingTransport()
+    output = MidiOutput(transport, channel=1)
+    output.flush(440.0, 100, 0.0)
+    assert transport.messages == [
+        midi.control_change(7, 127, 1), midi.pitch_bend(8192, 1), midi.note_on(69, 100, 1)
+    ]
+    # Within the bend range, only the bend changes
+    transport.messages.clear()
+    output.flush(midi.note_to_frequency(70), 100, 0.0)
+    assert transport.messages == [midi.pitch_bend(8192 + 4096, 1)]
+    # Further away, a new note starts
+    transport.messages.clear()
+    output.flush(midi.note_to_frequency(75.5), 100, 0.0)
+    assert transport.messages[-2:] == [midi.note_off(69, 1), midi.note_on(76, 100, 1)]
+    transport.messages.clear()
+    output.flush(440.0, 0, 0.0)
+    assert transport.messages == [midi.note_off(76, 1)]
+    output.stop()
+    assert transport.closed
+
+
+def test_stop_sends_pending_values():
+    """
+    Test that values updated but not sent yet are sent when the output stops, before the note ends.
+    """
+    transport = RecordingTransport()
+    output = MidiOutput(transport, channel=1)
+    output.flush(440.0, 100, 0.0)
+    transport.messages.clear()
+    output.update(440.0, 0)
+    output.stop()
+    assert transport.messages == [midi.note_off(69, 1)]
+    assert output.sends == 2
+
+
+def test_open_control_output():
+    """
+    Test the specification strings of control outputs.
+    """
+    output = open_control_output("osc:127.0.0.1:9000")
+    assert isinstance(output, OscOutput) and output.transport.address == ("127.0.0.1", 9000)
+    output.stop()
+    assert isinstance(open_control_output("midi-udp::9001"), MidiOutput)
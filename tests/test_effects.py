@@ -0,0 +1,114 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from effects import (
+    EFFECTS, FeedbackDelay, LowPassFilter, Reverb, Tremolo, Vibrato, create_effects_chain
+)
+from latency import LatencyTracer
+from oscillator import StreamingOscillator
+from pitch_detector import PitchDetector
+
+SAMPLE_RATE = 44100
+
+
+def sine(frequency, seconds, amplitude=4096):
+    return amplitude * np.sin(2 * np.pi * frequency * np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE)
+
+def process_in_blocks(effect, signal, block_size):
+    signal = signal.copy()
+    for start in range(0, len(signal), block_size):
+        effect.process(signal[start:start + block_size])
+    return signal
+
+
+@pytest.mark.parametrize("create_effect", [
+    lambda block_size: Vibrato(depth=0.7, block_size=block_size),
+    lambda block_size: Tremolo(depth=0.7, block_size=block_size),
+    lambda block_size: FeedbackDelay(delay_time=0.005, feedback=0.6, block_size=block_size),
+    lambda block_size: LowPassFilter(cutoff=800, kind="one-pole", block_size=block_size),
+    lambda block_size: LowPassFilter(cutoff=800, q=2.0, block_size=block_size),
+    lambda block_size: Reverb(block_size=block_size),
+])
+def test_effects_keep_their_state_across_blocks(create_effect):
+    """
+    Test that processing a signal block by block gives the same result as processing it in one go.
+    """
+    signal = sine(330, 0.2) + sine(5000, 0.2, 1000)
+    whole = create_effect(len(signal)).process(signal.copy())
+    blocks = process_in_blocks(create_effect(512), signal, 512)
+    assert np.allclose(blocks, whole, atol=1e-6)
+    assert not np.allclose(whole, signal)
+
+
+def test_delay_echoes_and_low_pass_responses():
+    """
+    Test the echo gains of the delay, the step response of the one-pole filter and the gains of the biquad.
+    """
+    impulse = np.zeros(2048)
+    impulse[0] = 1
+    echoes = process_in_blocks(FeedbackDelay(delay_time=100 / SAMPLE_RATE, feedback=0.5, mix=0.8), impulse, 512)
+    assert np.flatnonzero(echoes)[:4].tolist() == [0, 100, 200, 300]
+    assert np.allclose(echoes[[100, 200, 300]], [0.8, 0.4, 0.2])
+
+    step = process_in_blocks(LowPassFilter(cutoff=1000, kind="one-pole"), np.ones(1024), 512)
+    alpha = 1 - np.exp(-2 * np.pi * 1000 / SAMPLE_RATE)
+    assert np.allclose(step, 1 - (1 - alpha) ** np.arange(1, 1025))
+
+    biquad = LowPassFilter(cutoff=1000)
+    low = process_in_blocks(biquad, sine(100, 0.5), 512)[-4410:]
+    biquad.reset()
+    high = process_in_blocks(biquad, sine(10000, 0.5), 512)[-4410:]
+    assert np.max(np.abs(low)) == pytest.approx(4096, rel=0.01)
+    assert np.max(np.abs(high)) < 4096 / 100  # Over 40 dB down, 3.3 octaves above the cutoff
+
+
+def test_vibrato_follows_depth():
+    """
+    Test that the vibrato leaves the signal untouched at depth 0, and sweeps its pitch around the original at full depth.
+    """
+    signal = sine(440, 1.0)
+    vibrato = Vibrato(rate=5.0)
+    assert np.array_equal(process_in_blocks(vibrato, signal, 512), signal)
+
+    vibrato.set_depth(1.0)
+    modulated = process_in_blocks(vibrato, signal, 512)
+    detector = PitchDetector(SAMPLE_RATE)
+    pitches = np.array([detector.detect(modulated[start:start + detector.frame_size])
+                        for start in range(SAMPLE_RATE // 10, len(signal) - detector.frame_size, 512)])
+    assert pitches.min() < 430 and pitches.max() > 450
+    assert np.mean(pitches) == pytest.approx(440, rel=0.01)
+
+
+def test_effects_chain_enables_times_and_clips():
+    """
+    Test that the chain only runs the enabled effects, records the cost of each, and that the oscillator clips its output.
+    """
+    tracer = LatencyTracer(enabled=True)
+    chain = create_effects_chain(("delay", "reverb"), tracer=tracer)
+    assert chain.enabled == ("delay", "reverb")
+    with pytest.raises(ValueError):
+        create_effects_chain(("chorus",))
+
+    oscillator = StreamingOscillator()
+    oscillator.effects = chain
+    chain["delay"].feedback = 0.95
+    chain["delay"].mix = 1.0
+    oscillator.set_target(220, 100)
+    oscillator.volume = 100
+    for _ in range(200):
+        block = oscillator._render_output()
+    assert np.max(np.abs(block)) <= 32767
+    assert chain.costs["delay"] > 0 and chain.costs["reverb"] > 0 and chain.costs["vibrato"] == 0
+    assert 0 < chain.load < 1
+    assert tracer.summary()["effect_delay"]["count"] == 200
+    assert "effect_vibrato" not in tracer.summary()
+
+    # An effect enabled again starts from silence
+    chain.set_enabled(())
+    chain.set_enabled(("delay",))
+    assert not chain["delay"].line.buffer.any()
+    assert set(chain.enabled) <= set(EFFECTS)
@@ -0,0 +1,46 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from frame_pool import FramePool
+from frame_sources import SyntheticSource
+from hand_tracking import process_landmarks
+from roi import RoiTracker
+
+
+def test_pool_reuses_buffers():
+    """
+    Test that a purpose gets the same memory back, and only grows for larger frames.
+    """
+    pool = FramePool()
+    first = pool.get("flip", (480, 640, 3))
+    assert first.shape == (480, 640, 3) and first.flags.c_contiguous
+    assert np.shares_memory(first, pool.get("flip", (480, 640, 3)))
+    # Smaller frames are views of the same buffer
+    assert np.shares_memory(first, pool.get("flip", (100, 50, 3)))
+    assert not np.shares_memory(first, pool.get("rgb", (480, 640, 3)))
+    assert pool.get("flip", (960, 1280, 3)).shape == (960, 1280, 3)
+    assert pool.nbytes == 960 * 1280 * 3 + 480 * 640 * 3
+
+
+def test_frame_stages_write_in_place():
+    """
+    Test that flipping, downscaling and drawing write into the pooled buffers.
+    """
+    pool = FramePool()
+    source = SyntheticSource(realtime=False)
+    _, frame = source.read()
+    dst = pool.get("flip", frame.shape)
+    flipped = source.flip_horizontal(frame, dst=dst)
+    assert flipped is dst or np.shares_memory(flipped, dst)
+    assert np.array_equal(flipped, frame[:, ::-1])
+
+    image, _ = RoiTracker(inference_width=320, use_roi=False).prepare(flipped, frame_pool=pool)
+    assert image.shape == (240, 320, 3)
+    assert np.shares_memory(image, pool.get("roi", image.shape))
+
+    drawn, hands_coord = process_landmarks(flipped, source.landmarks, source.handedness)
+    assert drawn is flipped
+    assert set(hands_coord) == {"Right", "Left"}
@@ -0,0 +1,101 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import cv2
+import numpy as np
+from camera import Camera
+from frame_sources import FrameSource, SyntheticSource, ImageDirectorySource, VideoFileSource, open_frame_source
+
+
+def test_camera_is_a_frame_source():
+    """
+    Test that Camera implements the frame source interface.
+    """
+    assert issubclass(Camera, FrameSource)
+
+
+def test_synthetic_source_is_deterministic():
+    """
+    Test that two synthetic sources produce the same frames and landmarks.
+    """
+    first, second = SyntheticSource(realtime=False, frame_count=5), SyntheticSource(realtime=False, frame_count=5)
+    for _ in range(5):
+        ret_a, frame_a = first.read()
+        ret_b, frame_b = second.read()
+        assert ret_a and ret_b
+        assert np.array_equal(frame_a, frame_b)
+        assert np.array_equal(first.landmarks, second.landmarks)
+    assert not first.ended
+    assert first.read() == (False, None)
+    assert first.ended
+
+
+def test_synthetic_landmarks_follow_the_flip():
+    """
+    Test that flipped frames come with landmarks in mirrored image coordinates.
+    """
+    track = np.zeros((1, 1, 21, 3), dtype=np.float32)
+    track[..., 0], track[..., 1] = 0.75, 0.5
+    source = SyntheticSource(realtime=False, landmark_track=track, handedness=["Right"])
+    ret, frame = source.read()
+    assert np.allclose(source.landmarks[..., 0], 0.25)
+    frame = source.flip_horizontal(frame)
+    assert np.allclose(source.landmarks[..., 0], 0.75)
+    assert source.handedness == ["Right"]
+    assert frame[240, 480].tolist() != frame[240, 160].tolist()
+
+
+def test_realtime_pacing():
+    """
+    Test that a real-time source does not deliver frames faster than its frame rate.
+    """
+    source = SyntheticSource(fps=100, realtime=True)
+    start = time.perf_counter()
+    for _ in range(6):
+        source.read()
+    assert time.perf_counter() - start >= 0.045
+
+
+def test_read_latest_does_not_wait_without_timeout():
+    """
+    Test that read_latest with a zero timeout returns at once when no frame is due.
+    """
+    source = SyntheticSource(fps=10, realtime=True)
+    assert source.read_latest(timeout=0)[0]
+    start = time.perf_counter()
+    assert not source.read_latest(timeout=0)[0]
+    assert time.perf_counter() - start < 0.05
+    assert source.read_latest()[0]
+
+
+def test_file_sources(tmp_path):
+    """
+    Test that image directories and video files are read in order, and end unless they loop.
+    """
+    for index in range(3):
+        cv2.imwrite(str(tmp_path / f"{index:03d}.png"), np.full((48, 64, 3), index * 50, dtype=np.uint8))
+    source = open_frame_source(str(tmp_path), realtime=False)
+    assert isinstance(source, ImageDirectorySource)
+    assert [source.read()[1][0, 0, 0] for _ in range(3)] == [0, 50, 100]
+    assert not source.ended
+    assert source.read()[0] is False
+    assert source.ended
+
+    video_path = str(tmp_path / "video.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for index in range(4):
+        writer.write(np.full((48, 64, 3), index * 50, dtype=np.uint8))
+    writer.release()
+    source = open_frame_source(video_path, realtime=False, loop=True)
+    assert isinstance(source, VideoFileSource)
+    assert source.fps == 25
+    assert all(source.read()[0] for _ in range(6))
+    assert not source.ended
+    source.release()
+    source = open_frame_source(video_path, realtime=False)
+    assert [source.read()[0] for _ in range(5)] == [True] * 4 + [False]
+    assert source.ended
+    source.release()
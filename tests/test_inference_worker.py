@@ -0,0 +1,114 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queue
+import time
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from inference_worker import InferenceWorker, _worker_main
+from fake_hands import FakeHand, FakeResults
+
+
+class BrightnessDetector:
+    """Detects one right hand whose x is the mean red level of the frame, times a gain."""
+
+    def __init__(self, gain=1.0):
+        self.gain = gain
+
+    def process(self, image_rgb):
+        return FakeResults([FakeHand(self.gain * image_rgb[..., 0].mean() / 255, 0.5)], ["Right"])
+
+def create_brightness_detector(max_num_hands, **model_settings):
+    return BrightnessDetector(**model_settings)
+
+class ClosingDetector(BrightnessDetector):
+    """Records how many of its instances were closed."""
+
+    closed = 0
+
+    def close(self):
+        ClosingDetector.closed += 1
+
+def create_closing_detector(max_num_hands, **model_settings):
+    return ClosingDetector(**model_settings)
+
+
+def test_inference_worker_round_trip():
+    """
+    Test that frames go through shared memory and come back as landmark arrays.
+    """
+    worker = InferenceWorker((48, 64, 3), detector_factory=create_brightness_detector)
+    worker.start()
+    try:
+        deadline = time.time() + 30
+        while not worker.ready and time.time() < deadline:
+            worker.poll()
+            time.sleep(0.01)
+        assert worker.ready
+
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[..., 2] = 51  # Red in BGR
+        assert worker.submit(frame, timestamp=1.5)
+        assert not worker.submit(frame)  # One frame in flight at most
+
+        result = None
+        while result is None and time.time() < deadline:
+            result = worker.poll()
+            time.sleep(0.01)
+        assert result.frame_id == 0 and result.timestamp == 1.5
+        assert result.landmarks.shape == (1, 21, 3)
+        assert abs(result.landmarks[0, 8, 0] - 0.2) < 1e-6
+        assert result.handedness == ["Right"]
+        assert worker.in_flight == 0
+    finally:
+        worker.stop()
+
+
+def test_inference_worker_configure_rebuilds_detector():
+    """
+    Test that configure swaps the detector of the running worker, in order with the frames.
+    """
+    worker = InferenceWorker((48, 64, 3), detector_factory=create_brightness_detector, model_settings={"gain": 1.0})
+    worker.start()
+    try:
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[..., 2] = 102
+        deadline = time.time() + 30
+        answers = []
+        for gain in (1.0, 0.5):
+            worker.configure({"gain": gain}, inference_width=None)
+            while not worker.accepting and time.time() < deadline:
+                worker.poll()
+                time.sleep(0.01)
+            assert worker.submit(frame)
+            result = None
+            while result is None and time.time() < deadline:
+                result = worker.poll()
+                time.sleep(0.01)
+            answers.append(result.landmarks[0, 0, 0])
+        assert np.allclose(answers, [0.4, 0.2], atol=1e-3)
+        assert worker.model_settings == {"gain": 0.5}
+    finally:
+        worker.stop()
+
+
+def test_worker_closes_replaced_and_last_detectors():
+    """
+    Test that the worker closes the detector a configure request replaces, and its last one when it stops.
+    """
+    shape = (48, 64, 3)
+    shared_memory = SharedMemory(create=True, size=int(np.prod(shape)))
+    requests, results = queue.Queue(), queue.Queue()
+    for gain in (0.5, 2.0):
+        requests.put(("configure", {"gain": gain}, None))
+    requests.put(None)
+    ClosingDetector.closed = 0
+    try:
+        _worker_main(shared_memory.name, shape, 1, 2, create_closing_detector, requests, results)
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
+    assert results.get_nowait() is None  # Ready
+    assert ClosingDetector.closed == 3
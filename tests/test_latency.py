@@ -0,0 +1,37 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from latency import LatencyTracer
+
+
+def test_tracer_percentiles_and_dump(tmp_path):
+    """
+    Test that recorded durations are summarized per stage and dumped as JSON.
+    """
+    tracer = LatencyTracer(enabled=True, window_size=100)
+    for milliseconds in range(1, 201):
+        tracer.record("stage", milliseconds / 1000)
+    summary = tracer.summary()
+    assert summary["stage"]["count"] == 200
+    # Only the last 100 durations (101 to 200 ms) are kept
+    assert abs(summary["stage"]["p50_ms"] - 150.5) < 1e-6
+    assert summary["stage"]["max_ms"] == 200
+
+    path = tmp_path / "trace.json"
+    tracer.dump(str(path))
+    assert json.loads(path.read_text())["stage"]["count"] == 200
+
+
+def test_disabled_tracer_records_nothing():
+    """
+    Test that a disabled tracer ignores every call.
+    """
+    tracer = LatencyTracer()
+    tracer.begin_frame()
+    tracer.mark("stage")
+    tracer.record("other", 1)
+    tracer.end_frame()
+    assert tracer.summary() == {}
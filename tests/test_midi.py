@@ -0,0 +1,58 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from midi import PitchMap, note_to_frequency, y_to_frequency
+
+
+def test_linear_and_exponential_modes():
+    """
+    Test that the linear mode matches y_to_frequency and the exponential one is even per semitone.
+    """
+    positions = np.linspace(0, 100, 37)
+    linear = PitchMap(mode="linear")
+    assert np.allclose(linear.frequency(positions), [y_to_frequency(y) for y in positions])
+
+    exponential = PitchMap(mode="exponential")
+    assert abs(exponential.frequency(0) - note_to_frequency(24)) < 1e-9
+    assert abs(exponential.frequency(50) - note_to_frequency(54)) < 1e-6
+    assert abs(exponential.frequency(100) - note_to_frequency(84)) < 1e-9
+    # Out of range positions are clamped
+    assert exponential.frequency(120) == exponential.frequency(100)
+
+
+def test_snap_modes_follow_the_scale():
+    """
+    Test that snapping only plays notes of the scale, and soft snapping stays monotonic.
+    """
+    pitch_map = PitchMap(mode="snap", scale="major", root=2)
+    notes = 69 + 12 * np.log2(pitch_map.frequency(np.linspace(0, 100, 1001)) / 440)
+    # Only the table intervals across a step boundary are in between notes
+    on_notes = np.isclose(notes, np.round(notes), atol=1e-6)
+    assert np.mean(on_notes) > 0.98
+    assert set(np.round(notes[on_notes]).astype(int) % 12) <= {2, 4, 6, 7, 9, 11, 1}
+
+    pitch_map.configure(mode="soft")
+    frequencies = pitch_map.frequency(np.linspace(0, 100, 1001))
+    assert np.all(np.diff(frequencies) >= 0)
+    with pytest.raises(ValueError):
+        pitch_map.configure(scale="unknown")
+
+
+def test_scale_lines():
+    """
+    Test that scale lines sit on the positions of the scale notes, root notes marked.
+    """
+    pitch_map = PitchMap(mode="exponential", scale="minor pentatonic", root=9)
+    lines = pitch_map.scale_lines(601)
+    names = [name for _, name, _ in lines]
+    assert "A2" in names and "C3" in names and "F3" not in names
+    row, _, is_root = lines[names.index("A2")]
+    # A2 is MIDI note 45, 21 semitones above the bottom of the 60 semitone range
+    assert is_root and row == round((1 - 21 / 60) * 600)
+    # The chromatic scale only marks the roots
+    pitch_map.configure(scale="chromatic", root=0)
+    assert [name for _, name, _ in pitch_map.scale_lines(480)] == ["C1", "C2", "C3", "C4", "C5", "C6"]
@@ -0,0 +1,66 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from motion_gate import MotionGate
+
+
+def make_frame(square_x=None):
+    """
+    Create a grey frame, with a white square at square_x if given.
+    """
+    frame = np.full((480, 640, 3), 80, dtype=np.uint8)
+    if square_x is not None:
+        frame[200:280, square_x:square_x + 80] = 255
+    return frame
+
+
+def hand_at(x, y):
+    """
+    Create the landmarks of a small hand centered on normalized (x, y).
+    """
+    landmarks = np.zeros((1, 21, 3), dtype=np.float32)
+    landmarks[0, :, 0] = np.linspace(x - 0.1, x + 0.1, 21)
+    landmarks[0, :, 1] = np.linspace(y - 0.1, y + 0.1, 21)
+    return landmarks
+
+
+def test_still_frames_are_skipped_until_refresh():
+    """
+    Test that still frames skip inference, with a forced refresh every max_skipped frames.
+    """
+    gate = MotionGate(max_skipped=3)
+    frame = make_frame(100)
+    decisions = [gate.should_infer(frame) for _ in range(9)]
+    assert decisions == [True, False, False, False, True, False, False, False, True]
+    assert gate.forced_frames == 2
+    assert abs(gate.skip_ratio - 6 / 9) < 1e-9
+
+
+def test_motion_inside_hand_regions_triggers_inference():
+    """
+    Test that motion near the hands runs inference, and motion elsewhere does not.
+    """
+    gate = MotionGate(max_skipped=100)
+    assert gate.should_infer(make_frame(100))
+    hand = hand_at(0.2, 0.5)
+    # The square moves near the hand
+    assert gate.should_infer(make_frame(110), hand)
+    # Far from the hand, at x = 0.8, motion is ignored
+    far_hand = hand_at(0.8, 0.5)
+    assert not gate.should_infer(make_frame(130), far_hand)
+    # Without hands, the whole frame is watched
+    assert gate.should_infer(make_frame(130))
+
+
+def test_frame_rate_budget_spaces_inferences():
+    """
+    Test that a slow inference is run only as often as the target frame rate allows.
+    """
+    gate = MotionGate(target_fps=30)
+    gate.record_inference(0.08)  # 2.4 frame periods at 30 fps
+    assert gate.min_interval == 3
+    decisions = [gate.should_infer(make_frame(100 + 20 * i)) for i in range(7)]
+    assert decisions == [True, False, False, True, False, False, True]
@@ -0,0 +1,80 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wave
+import numpy as np
+from offline_render import render_control_track, render_to_wav, save_control_track, load_control_track
+
+
+def test_render_to_wav(tmp_path):
+    """
+    Test that a control track renders to a WAV file faster than real time.
+    """
+    track_path = str(tmp_path / "track.csv")
+    wav_path = str(tmp_path / "out.wav")
+    rows = [(i / 30, 220 + i, 60) for i in range(60)] + [(2.0, None, None)]
+    save_control_track(track_path, rows)
+
+    stats = render_to_wav(track_path, wav_path, sample_rate=22050)
+
+    with wave.open(wav_path, "rb") as wav_file:
+        assert wav_file.getframerate() == 22050
+        assert wav_file.getnchannels() == 1
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+    assert samples.size / 22050 == stats["duration"]
+    assert stats["duration"] >= 2.5
+    assert stats["speed_factor"] > 1
+    # The missing frequency at the end fades to silence
+    assert np.max(np.abs(samples[-2000:])) < 50
+    assert np.max(np.abs(samples[22050:44100])) > 1000
+
+
+def test_control_track_round_trip(tmp_path):
+    """
+    Test that missing values survive a save and load as NaN.
+    """
+    track_path = str(tmp_path / "track.csv")
+    save_control_track(track_path, [(0.0, 440.0, 50.0), (0.1, None, 20.0)])
+    times, frequencies, volumes = load_control_track(track_path)
+    assert np.allclose(times, [0.0, 0.1])
+    assert frequencies[0] == 440 and np.isnan(frequencies[1])
+    assert np.allclose(volumes, [50, 20])
+
+
+def test_render_to_wav_applies_effects(tmp_path):
+    """
+    Test that the effects are applied to the offline render like the live output, and that it stays in the int16 range.
+    """
+    track_path = str(tmp_path / "track.csv")
+    save_control_track(track_path, [(0.0, 220.0, 100.0), (0.5, None, None)])
+
+    def render(effects):
+        wav_path = str(tmp_path / f"{'-'.join(effects) or 'dry'}.wav")
+        render_to_wav(track_path, wav_path, sample_rate=22050, effects=effects)
+        with wave.open(wav_path, "rb") as wav_file:
+            return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+
+    dry = render(())
+    wet = render(("delay", "reverb"))
+    assert dry.size == wet.size
+    assert not np.array_equal(dry, wet)
+    # The echoes and the reverb tail ring on after the dry signal has faded out
+    assert np.max(np.abs(dry[-2000:])) < 50
+    assert np.max(np.abs(wet[-2000:])) > 50
+
+
+def test_modulation_depth_of_offline_renders():
+    """
+    Test that the tremolo of an offline render plays at the given depth, and that depth 0 leaves it dry.
+    """
+    times, frequencies, volumes = np.array([0.0, 1.0]), np.array([220.0, 220.0]), np.array([100.0, 100.0])
+    track = (times, frequencies, volumes)
+    dry = render_control_track(track, sample_rate=22050, tail=0)
+    assert np.array_equal(render_control_track(track, sample_rate=22050, tail=0, effects=("tremolo",),
+                                               modulation_depth=0), dry)
+    wet = render_control_track(track, sample_rate=22050, tail=0, effects=("tremolo",), modulation_depth=1)
+    # Peaks over the second half, in 20 ms windows: the gain dips with the LFO
+    peaks = np.abs(wet[11025:22050]).reshape(-1, 441).max(axis=1) / np.abs(dry[11025:22050]).max()
+    assert peaks.min() < 0.5 and peaks.max() > 0.9
@@ -0,0 +1,81 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+from oscillator import StreamingOscillator, AMPLITUDE
+
+
+def test_streaming_oscillator_phase_is_continuous_across_blocks():
+    """
+    Test that consecutive blocks join into one continuous sine wave.
+    """
+    oscillator = StreamingOscillator(sample_rate=8000, block_size=64)
+    oscillator.set_target(440, 100)
+    oscillator.volume = 100
+    signal = np.concatenate([oscillator.render_block().copy() for _ in range(8)])
+
+    expected = AMPLITUDE * np.sin(2 * np.pi * 440 * np.arange(signal.size) / 8000)
+    assert np.allclose(signal, expected, atol=1e-4 * AMPLITUDE)
+
+
+def test_streaming_oscillator_glides_to_target():
+    """
+    Test that frequency and volume converge to their targets without jumping.
+    """
+    oscillator = StreamingOscillator(sample_rate=8000, block_size=64, glide_time=0.01)
+    oscillator.set_target(110, 0)
+    assert oscillator.frequency == 110  # The first frequency is taken as is
+    oscillator.set_target(220, 50)
+    oscillator.render_block()
+    assert 110 < oscillator.frequency < 220
+    assert 0 < oscillator.volume < 50
+    for _ in range(100):
+        oscillator.render_block()
+    assert abs(oscillator.frequency - 220) < 1e-3
+    assert abs(oscillator.volume - 50) < 1e-3
+    assert np.max(np.abs(oscillator.render_block())) <= AMPLITUDE * 0.5 + 1e-6
+
+
+def test_streaming_oscillator_keeps_target_when_none():
+    """
+    Test that a None target leaves the previous target untouched.
+    """
+    oscillator = StreamingOscillator()
+    oscillator.set_target(330, 80)
+    oscillator.set_target(None, 0)
+    assert oscillator.target_frequency == 330
+    assert oscillator.target_volume == 0
+
+
+def test_streaming_oscillator_smoothing_is_frame_rate_independent():
+    """
+    Test that the GUI smoothing parameters bound the pitch change per second.
+    """
+    oscillator = StreamingOscillator(sample_rate=8000, block_size=80)
+    oscillator.set_smoothing(smoothing_factor=1, change_limit=10)
+    oscillator.set_target(100, 50)
+    oscillator.set_target(1000, 50)
+    oscillator.render_block()
+    # 10 Hz per frame at the 30 fps reference rate is 300 Hz/s, 3 Hz per 10 ms block
+    assert abs(oscillator.frequency - 103) < 1e-9
+
+
+def test_streaming_oscillator_silent_start_renders_in_real_time():
+    """
+    Test that a silent oscillator follows its targets and feeds its output tap without pygame.
+    """
+    from pitch_detector import AudioRing
+
+    oscillator = StreamingOscillator(sample_rate=8000, block_size=80)
+    oscillator.output_tap = AudioRing()
+    oscillator.set_target(440, 100)
+    oscillator.start(silent=True)
+    time.sleep(0.2)
+    oscillator.stop()
+
+    assert oscillator.volume > 90 and abs(oscillator.frequency - 440) < 1
+    # About one block per 10 ms block duration
+    assert 8 <= oscillator.output_tap.written // 80 <= 30
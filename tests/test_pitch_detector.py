@@ -0,0 +1,60 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from oscillator import StreamingOscillator
+from pitch_detector import AudioRing, PitchDetector
+
+
+def cents(frequency, reference):
+    return 1200 * np.log2(frequency / reference)
+
+
+def test_detects_sine_pitch_and_silence():
+    """
+    Test that the pitch of sines is found within a cent, and silence has no pitch.
+    """
+    detector = PitchDetector()
+    t = np.arange(detector.frame_size) / detector.sample_rate
+    for frequency in (32.7, 110, 440, 1046.5):
+        assert abs(cents(detector.detect(4096 * np.sin(2 * np.pi * frequency * t)), frequency)) < 1
+    assert detector.detect(np.zeros(detector.frame_size)) is None
+    assert detector.detect(np.random.default_rng(0).normal(0, 1000, detector.frame_size)) is None
+
+
+def test_ring_reads_newest_samples():
+    """
+    Test that the ring returns the newest samples across the wrap-around.
+    """
+    ring = AudioRing(capacity=1000)
+    out = np.empty(300)
+    assert not ring.read_latest(out)
+    for start in range(0, 2000, 128):
+        ring.write(np.arange(start, start + 128))
+    assert ring.read_latest(out)
+    assert np.array_equal(out, np.arange(2048 - 300, 2048))
+    # Samples a block being written could overwrite are not returned as valid
+    assert not ring.read_latest(np.empty(900))
+
+
+def test_detects_pitch_of_oscillator_output():
+    """
+    Test that the pitch of the oscillator's output blocks is tracked through the ring.
+    """
+    oscillator = StreamingOscillator(waveform="saw")
+    ring = AudioRing()
+    oscillator.output_tap = ring
+    detector = PitchDetector(oscillator.sample_rate)
+    oscillator.set_target(220, 50)
+    view = np.empty(oscillator.block_size)
+    assert detector.update(ring) is None
+    for _ in range(20):
+        oscillator._write_block(view)
+    assert abs(cents(detector.update(ring), 220)) < 2
+
+    oscillator.set_target(None, 0)
+    for _ in range(40):
+        oscillator._write_block(view)
+    assert detector.update(ring) is None
@@ -0,0 +1,55 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiles import PROFILES, ProfileTuner
+
+
+def feed(tuner, seconds, count):
+    """Give the tuner count inferences of the same duration, returning the switches decided."""
+    return [profile for profile in (tuner.update(seconds) for _ in range(count)) if profile is not None]
+
+
+def test_profiles_go_from_cheapest_to_most_accurate():
+    """
+    Test the order and the model settings of the profiles.
+    """
+    assert list(PROFILES) == ["low-power", "balanced", "high-accuracy"]
+    assert PROFILES["low-power"].model_settings["model_complexity"] == 0
+    # The default profile keeps MediaPipe's default model
+    assert PROFILES["balanced"].model_settings["model_complexity"] == 1
+    assert PROFILES["high-accuracy"].model_settings["model_complexity"] == 1
+    assert PROFILES["high-accuracy"].inference_width is None
+
+
+def test_tuner_steps_down_when_over_budget_and_settles():
+    """
+    Test that slow inference steps to cheaper profiles, ignoring the warm-up after a switch.
+    """
+    tuner = ProfileTuner(target_fps=30, initial="high-accuracy", settle=10)
+    # The first inferences after a switch are ignored, however slow
+    assert feed(tuner, 1.0, 10) == []
+    assert feed(tuner, 0.05, 10) == ["balanced"]
+    assert tuner.costs["high-accuracy"] > 1 / 30
+    assert feed(tuner, 0.04, 20) == ["low-power"]
+    # Nothing cheaper: stay
+    assert feed(tuner, 0.04, 100) == []
+    assert tuner.profile == "low-power" and tuner.switches == 2
+
+
+def test_tuner_steps_up_with_headroom_but_not_back_to_a_slow_profile():
+    """
+    Test that idle inference tries the next profile, unless it was measured over budget.
+    """
+    tuner = ProfileTuner(target_fps=30, initial="balanced", settle=10)
+    assert feed(tuner, 0.005, 20) == ["high-accuracy"]
+    assert feed(tuner, 0.05, 20) == ["balanced"]
+    # Back on balanced with headroom, but high-accuracy is known to be too slow
+    assert feed(tuner, 0.005, 100) == []
+    assert tuner.profile == "balanced"
+
+    # A profile chosen by hand resets the estimate
+    tuner.select("low-power")
+    assert tuner.profile == "low-power" and tuner.cost == 0
+    assert feed(tuner, 0.005, 20) == ["balanced"]
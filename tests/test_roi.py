@@ -0,0 +1,57 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from roi import RoiTracker, FULL_FRAME
+
+
+def find_blob(image):
+    """
+    Stand-in detector: one hand whose landmarks all sit on the bright blob, normalized to the image.
+    """
+    ys, xs = np.nonzero(image[..., 0] > 128)
+    if xs.size == 0:
+        return np.empty((0, 21, 3), dtype=np.float32)
+    point = ((xs.mean() + 0.5) / image.shape[1], (ys.mean() + 0.5) / image.shape[0], 0.0)
+    return np.tile(np.array(point, dtype=np.float32), (1, 21, 1))
+
+
+def make_frame(x, y):
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[y - 10:y + 10, x - 10:x + 10] = 255
+    return frame
+
+
+def test_roi_crops_downscales_and_maps_back():
+    """
+    Test that after a full-frame search the tracker crops around the hand and maps landmarks back.
+    """
+    tracker = RoiTracker(inference_width=160)
+    image, roi = tracker.prepare(make_frame(400, 300))
+    assert roi == FULL_FRAME and image.shape == (120, 160, 3)
+    tracker.update(RoiTracker.map_back(find_blob(image), roi), roi)
+
+    image, roi = tracker.prepare(make_frame(405, 300))
+    assert roi != FULL_FRAME
+    assert image.shape[1] <= 160
+    landmarks = RoiTracker.map_back(find_blob(image), roi)
+    assert abs(landmarks[0, 8, 0] * 640 - 405) < 2
+    assert abs(landmarks[0, 8, 1] * 480 - 300) < 2
+    tracker.update(landmarks, roi)
+
+
+def test_roi_falls_back_to_full_frame_when_hand_is_lost():
+    """
+    Test that losing a hand in the crop triggers a full-frame search.
+    """
+    tracker = RoiTracker()
+    image, roi = tracker.prepare(make_frame(100, 100))
+    tracker.update(find_blob(image), roi)
+    image, roi = tracker.prepare(make_frame(600, 400))
+    landmarks = RoiTracker.map_back(find_blob(image), roi)
+    assert len(landmarks) == 0
+    tracker.update(landmarks, roi)
+    image, roi = tracker.prepare(make_frame(600, 400))
+    assert roi == FULL_FRAME
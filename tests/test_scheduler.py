@@ -0,0 +1,119 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from scheduler import HeadlessLoop, Scheduler
+
+
+class FakeRoot:
+    """Timers of a Tk root, run by hand against a fake clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = {}
+        self._next_id = 0
+
+    def clock(self):
+        return self.now
+
+    def after(self, delay_ms, callback, *args):
+        self._next_id += 1
+        after_id = f"after#{self._next_id}"
+        self.timers[after_id] = (self.now + delay_ms / 1000, callback, args)
+        return after_id
+
+    def after_cancel(self, after_id):
+        del self.timers[after_id]
+
+    def run_until(self, end):
+        while self.timers:
+            after_id, (due, callback, args) = min(self.timers.items(), key=lambda item: item[1][0])
+            if due > end:
+                break
+            del self.timers[after_id]
+            self.now = max(self.now, due)
+            callback(*args)
+        self.now = end
+
+
+def test_tasks_run_at_their_rates():
+    """
+    Test that each task runs at its own rate, without drifting.
+    """
+    root = FakeRoot()
+    scheduler = Scheduler(root, clock=root.clock)
+    calls = {"fast": 0, "slow": 0}
+    scheduler.add_task("fast", lambda: calls.__setitem__("fast", calls["fast"] + 1), 100)
+    scheduler.add_task("slow", lambda: calls.__setitem__("slow", calls["slow"] + 1), 30)
+    scheduler.start()
+    root.run_until(1.0)
+    assert calls["fast"] in (100, 101)
+    assert calls["slow"] in (30, 31)
+    assert scheduler.summary()["fast"]["late_runs"] == 0
+
+
+def test_late_tasks_skip_missed_runs():
+    """
+    Test that a task slower than its period skips the missed runs instead of bursting.
+    """
+    root = FakeRoot()
+    scheduler = Scheduler(root, clock=root.clock)
+
+    def slow_callback():
+        root.now += 0.025
+
+    task = scheduler.add_task("slow", slow_callback, 100)
+    scheduler.start()
+    root.run_until(1.0)
+    # Each run takes 25 ms, so only every third 10 ms tick can run
+    assert 30 <= task.runs <= 35
+    assert task.late_runs == task.runs
+    assert task.next_run > root.now - task.interval
+
+
+def test_stop_cancels_timers():
+    """
+    Test that stopping the scheduler cancels the pending timers.
+    """
+    root = FakeRoot()
+    scheduler = Scheduler(root, clock=root.clock)
+    calls = []
+    scheduler.add_task("task", lambda: calls.append(root.now), 10)
+    scheduler.start()
+    root.run_until(0.25)
+    scheduler.stop()
+    count = len(calls)
+    root.run_until(1.0)
+    assert len(calls) == count
+    assert not root.timers
+    with pytest.raises(ValueError):
+        scheduler.add_task("bad", lambda: None, 0)
+
+
+def test_headless_loop_runs_scheduler_until_destroyed():
+    """
+    Test that the headless loop sleeps between deadlines, skips cancelled timers, and stops on destroy.
+    """
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    loop = HeadlessLoop(clock=lambda: now[0], sleep=sleep)
+    scheduler = Scheduler(loop, clock=lambda: now[0])
+    calls = []
+    scheduler.add_task("control", lambda: calls.append(now[0]), 100)
+    cancelled = loop.after(5, calls.append, "cancelled")
+    loop.after_cancel(cancelled)
+    loop.after(1000, loop.destroy)
+    scheduler.start()
+    loop.mainloop()
+
+    assert "cancelled" not in calls
+    assert 99 <= len(calls) <= 101 and now[0] == pytest.approx(1.0)
+    assert all(seconds > 0 for seconds in sleeps)
+    assert not loop.running
@@ -0,0 +1,67 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from frame_sources import SyntheticSource
+from session import SessionRecorder, SessionRecording, SessionReplayer, record_dtype
+
+
+def test_record_and_read_back(tmp_path):
+    """
+    Test that hands and control values survive the quantized recording, and that a new recording replaces an old one.
+    """
+    path = str(tmp_path / "session.thr")
+    source = SyntheticSource(realtime=False)
+    recorder = SessionRecorder(path, frame_shape=(480, 640), buffer_records=8)
+    expected = []
+    for index in range(20):
+        landmarks = source.landmarks_at(index)
+        landmarks[:, :, 2] = -0.1 * index / 20
+        handedness = ["Right", "Left"] if index < 10 else ["Left"]
+        recorder.append(index / 30, landmarks[:len(handedness)], handedness, 220.0 + index, 50.0)
+        expected.append((landmarks[:len(handedness)], handedness))
+    recorder.close()
+    # A crash while writing leaves a partial record, which is ignored
+    with open(path, "ab") as session_file:
+        session_file.write(b"\0" * 10)
+
+    recording = SessionRecording(path)
+    assert len(recording) == 20 and recording.frame_shape == (480, 640)
+    for index, (landmarks, handedness) in enumerate(expected):
+        decoded, decoded_handedness = recording.hands(index)
+        assert decoded_handedness == handedness
+        assert np.abs(decoded[..., :2] - landmarks[..., :2]).max() < 1e-4
+        assert np.abs(decoded[..., 2] - landmarks[..., 2]).max() < 3e-3
+        assert recording.controls(index) == (220.0 + index, 50.0)
+    assert recording.duration == 19 / 30
+
+    # Recording again to the same path starts a new session, with its own header
+    recorder = SessionRecorder(path, frame_shape=(720, 1280))
+    recorder.append(5.0, None, [], 0.0, 0.0)
+    recorder.close()
+    recording = SessionRecording(path)
+    assert len(recording) == 1 and recording.frame_shape == (720, 1280)
+    assert recording.hands(0)[1] == [] and recording.duration == 0
+
+
+def test_replayer_paces_and_skips(tmp_path):
+    """
+    Test that the replayer returns the newest frame due, skipping missed ones, until the end.
+    """
+    path = str(tmp_path / "session.thr")
+    recorder = SessionRecorder(path)
+    for index in range(10):
+        recorder.append(100 + index * 0.1, None, [], 0.0, 0.0)
+    recorder.close()
+
+    now = [0.0]
+    replayer = SessionReplayer(SessionRecording(path), clock=lambda: now[0])
+    assert replayer.poll() == 0
+    assert replayer.poll() is None
+    now[0] = 0.35
+    assert replayer.poll() == 3
+    now[0] = 5.0
+    assert replayer.poll() == 9 and replayer.finished
+    assert replayer.poll() is None
@@ -0,0 +1,82 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from smoothing import DataSmoother, LandmarkFilter, ParameterRamp
+
+
+def test_parameter_ramp_matches_data_smoother_at_reference_rate():
+    """
+    Test that a ramp configured from DataSmoother parameters tracks it frame by frame.
+    """
+    smoother = DataSmoother(smoothing_factor=0.3, change_limit=1000)
+    ramp = ParameterRamp(sample_rate=3000)
+    ramp.configure_from_frame_parameters(0.3, 1000, frame_rate=30)
+    smoother.smooth(0)
+    ramp.set_target(0)
+    out = np.empty(100)  # One frame at 30 fps
+    for _ in range(10):
+        expected = smoother.smooth(100)
+        ramp.set_target(100)
+        ramp.render(out)
+        assert abs(ramp.value - expected) < 1e-9
+
+
+def test_parameter_ramp_is_slew_limited():
+    """
+    Test that the ramp never moves faster than its slew rate.
+    """
+    ramp = ParameterRamp(time_constant=0, slew_rate=100, sample_rate=1000, value=0)
+    ramp.set_target(-50)
+    out = np.empty(100)
+    ramp.render(out)
+    assert np.allclose(np.diff(out), -0.1)
+    assert abs(ramp.value + 10) < 1e-9
+
+
+def test_landmark_filter_smooths_still_hands_and_follows_moving_ones():
+    """
+    Test that jitter is reduced on still hands while moving hands are followed with little lag.
+    """
+    rng = np.random.default_rng(0)
+    landmark_filter = LandmarkFilter()
+    still = np.full((1, 21, 3), 0.5, dtype=np.float32)
+    raw_error, filtered_error = [], []
+    for frame in range(60):
+        noisy = still + rng.normal(0, 0.005, still.shape).astype(np.float32)
+        filtered = landmark_filter.update(noisy, ["Right"], frame / 30)
+        if frame > 10:
+            raw_error.append(np.abs(noisy - still).mean())
+            filtered_error.append(np.abs(filtered - still).mean())
+    assert np.mean(filtered_error) < 0.5 * np.mean(raw_error)
+
+    landmark_filter.reset()
+    for frame in range(30):
+        moving = still + frame / 30  # One unit per second
+        filtered = landmark_filter.update(moving, ["Right"], frame / 30)
+    assert np.abs(filtered - moving).max() < 0.01
+    # The prediction extrapolates the motion, up to max_prediction
+    predicted, handedness = landmark_filter.predict(29 / 30 + 0.05)
+    assert handedness == ["Right"]
+    assert np.allclose(predicted, moving + 0.05, atol=0.01)
+    far, _ = landmark_filter.predict(10)
+    assert np.allclose(far, predicted + (landmark_filter.max_prediction - 0.05), atol=0.01)
+
+
+def test_landmark_filter_tracks_hands_by_label():
+    """
+    Test that hands keep their state when their order changes, and are forgotten when lost.
+    """
+    landmark_filter = LandmarkFilter()
+    right = np.full((21, 3), 0.2, dtype=np.float32)
+    left = np.full((21, 3), 0.8, dtype=np.float32)
+    landmark_filter.update(np.stack([right, left]), ["Right", "Left"], 0)
+    filtered = landmark_filter.update(np.stack([left, right]), ["Left", "Right"], 1 / 30)
+    assert np.allclose(filtered[0], left) and np.allclose(filtered[1], right)
+    assert landmark_filter.handedness == ["Left", "Right"]
+
+    filtered = landmark_filter.update(left[None], ["Left"], 2 / 30)
+    assert filtered.shape == (1, 21, 3)
+    assert landmark_filter.predict(3 / 30)[1] == ["Left"]
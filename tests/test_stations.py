@@ -0,0 +1,105 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+import pytest
+import midi
+from frame_sources import FrameSource
+from stations import Station, StationHost
+from fake_hands import FakeHand, FakeResults
+
+
+class ColorDetector:
+    """Detects a right hand at the mean red level of the frame from the top, and a left hand at the green one."""
+
+    def process(self, image_rgb):
+        red, green = image_rgb[..., 0].mean() / 255, image_rgb[..., 1].mean() / 255
+        return FakeResults([FakeHand(0.5, red), FakeHand(0.5, green)], ["Right", "Left"])
+
+def create_color_detector(max_num_hands, **model_settings):
+    return ColorDetector()
+
+class ColorSource(FrameSource):
+    """Frames of a single BGR color, as fast as they are read."""
+
+    def __init__(self, bgr):
+        super().__init__(realtime=False)
+        self.frame = np.empty((48, 64, 3), dtype=np.uint8)
+        self.frame[:] = bgr
+
+    @property
+    def frame_shape(self):
+        return self.frame.shape
+
+    def _read_frame(self):
+        return True, self.frame
+
+class VoiceRecorder:
+    def __init__(self):
+        self.voices = None
+
+    def set_voices(self, voices):
+        self.voices = voices
+
+
+def test_station_host_mixes_one_voice_per_station():
+    """
+    Test that every station tracks its own source in its own worker and plays its own voice slot, with per-station rates and latencies.
+    """
+    stations = [
+        Station(name, ColorSource(bgr), slot, detector_factory=create_color_detector, use_roi=False)
+        for slot, (name, bgr) in enumerate((("high", (0, 102, 51)), ("low", (0, 204, 204))))
+    ]
+    synth = VoiceRecorder()
+    host = StationHost(stations, synth)
+    host.start()
+    try:
+        deadline = time.time() + 30
+        while min(station.tracked_frames for station in stations) < 3 and time.time() < deadline:
+            host.capture_task()
+            host.poll_task()
+            time.sleep(0.01)
+        host.control_task()
+
+        pitch_map = midi.PitchMap()
+        assert set(synth.voices) == {0, 1}
+        # Heights are measured from the bottom of the frame
+        assert synth.voices[0][0] == pytest.approx(pitch_map.frequency(80), rel=1e-3)
+        assert synth.voices[1][0] == pytest.approx(pitch_map.frequency(20), rel=1e-3)
+        # Each volume is halved to leave headroom for the other station
+        assert synth.voices[0][1] == pytest.approx(30, abs=0.1)
+        assert synth.voices[1][1] == pytest.approx(10, abs=0.1)
+
+        report = host.report()
+        assert set(report) == {"high", "low"}
+        for stats in report.values():
+            assert stats["tracking_fps"] > 0 and stats["capture_fps"] >= stats["tracking_fps"]
+            assert 0 <= stats["capture_to_hands_p50_ms"] <= stats["capture_to_hands_p95_ms"]
+            assert stats["dropped_frames"] >= 0
+
+        # Every report covers the time since the previous one only
+        second = host.report()
+        for stats in second.values():
+            assert stats["tracking_fps"] == 0 and stats["dropped_frames"] == 0
+            assert "capture_to_hands_p50_ms" not in stats
+    finally:
+        host.stop()
+    assert all(station.worker is None for station in stations)
+
+
+def test_station_host_ends_with_its_sources():
+    """
+    Test that a station releases its voice once its source ended, and that the host ends with the last source.
+    """
+    stations = [Station(name, ColorSource((0, 0, 0)), slot, use_roi=False) for slot, name in enumerate(("a", "b"))]
+    stations[0].hands_coord = stations[1].hands_coord = {"Right": {"x": 50, "y": 50}}
+    host = StationHost(stations, VoiceRecorder())
+    stations[0].frame_source.ended = True
+    host.control_task()
+    assert set(host.synth.voices) == {1}
+    assert not host.ended
+    stations[1].frame_source.ended = True
+    assert host.ended
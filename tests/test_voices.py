@@ -0,0 +1,105 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from voices import VoiceAllocator, PolyphonicOscillator
+from oscillator import StreamingOscillator
+
+
+def test_voice_ids_are_stable_while_hands_move():
+    """
+    Test that moving hands keep their voice IDs, whatever the detection order.
+    """
+    allocator = VoiceAllocator(max_voices=4)
+    first = {voice.voice_id: (voice.x, voice.y) for voice in allocator.update([(10, 10), (80, 50)])}
+    second = {voice.voice_id: (voice.x, voice.y) for voice in allocator.update([(82, 52), (12, 9)])}
+    assert first.keys() == second.keys()
+    for voice_id in first:
+        assert np.hypot(*np.subtract(first[voice_id], second[voice_id])) < 5
+
+
+def test_voices_are_held_then_released():
+    """
+    Test that a voice survives short dropouts and is released after release_frames.
+    """
+    allocator = VoiceAllocator(release_frames=2)
+    allocator.update([(50, 50)])
+    assert len(allocator.update([])) == 1
+    assert len(allocator.update([])) == 1
+    assert len(allocator.update([])) == 0
+
+
+def test_voice_stealing_respects_the_cap():
+    """
+    Test that the number of voices never exceeds max_voices and held voices are stolen first.
+    """
+    allocator = VoiceAllocator(max_voices=2, release_frames=3)
+    allocator.update([(10, 10), (90, 90)])
+    voices = allocator.update([(10, 10)])
+    held = [voice for voice in voices if voice.missing_frames][0]
+    voices = allocator.update([(10, 10), (50, 50)])
+    assert len(voices) == 2
+    assert held not in voices
+    assert {voice.slot for voice in voices} == {0, 1}
+
+
+def test_extra_hands_do_not_steal_playing_voices():
+    """
+    Test that with more hands than voices, the voices stay with their hands instead of being stolen every frame.
+    """
+    allocator = VoiceAllocator(max_voices=2)
+    hands = [(10, 10), (50, 50), (90, 90)]
+    first = [(voice.voice_id, voice.slot) for voice in allocator.update(hands)]
+    for _ in range(5):
+        voices = allocator.update(hands)
+        assert [(voice.voice_id, voice.slot) for voice in voices] == first
+        assert [(voice.x, voice.y) for voice in voices] == hands[:2]
+
+
+def test_polyphonic_voice_matches_monophonic_oscillator():
+    """
+    Test that one polyphonic voice renders like the monophonic oscillator.
+    """
+    mono = StreamingOscillator(sample_rate=8000, block_size=64)
+    poly = PolyphonicOscillator(max_voices=4, sample_rate=8000, block_size=64)
+    mono.set_target(440, 80)
+    poly.set_voices({2: (440, 80)})
+    for _ in range(10):
+        assert np.allclose(mono.render_block(), poly.render_block(), atol=1e-6)
+    assert poly.frequency == 440
+
+
+def test_polyphonic_oscillator_frees_released_slots():
+    """
+    Test that a released slot fades out and becomes inactive.
+    """
+    poly = PolyphonicOscillator(max_voices=2, sample_rate=8000, block_size=64, glide_time=0.005)
+    poly.set_voices({0: (220, 50), 1: (330, 50)})
+    poly.render_block()
+    poly.set_voices({1: (330, 50)})
+    for _ in range(50):
+        poly.render_block()
+    assert list(poly.active) == [False, True]
+
+
+def test_stolen_slot_starts_on_the_new_pitch():
+    """
+    Test that a hand taking over the slot of a held voice starts on its own pitch instead of gliding from the stolen one.
+    """
+    allocator = VoiceAllocator(max_voices=1, release_frames=3)
+    poly = PolyphonicOscillator(max_voices=1, sample_rate=8000, block_size=64)
+
+    def play(positions):
+        voices = allocator.update(positions)
+        poly.set_voices({voice.slot: (200 + 10 * voice.y, 50) for voice in voices},
+                        {voice.slot: voice.voice_id for voice in voices})
+        poly.render_block()
+
+    play([(50, 10)])
+    play([])
+    assert poly.active[0] and poly.frequency == 300
+    play([(50, 90)])
+    assert allocator.voices[0].voice_id == 1
+    assert poly.frequency == 1100
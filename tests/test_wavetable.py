@@ -0,0 +1,53 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from wavetable import WavetableBank
+
+
+def test_wavetables_are_band_limited():
+    """
+    Test that no table holds harmonics above Nyquist at the top of its octave.
+    """
+    bank = WavetableBank(sample_rate=44100)
+    tables = bank.get_tables("saw")
+    for octave in range(bank.octave_count):
+        spectrum = np.abs(np.fft.rfft(tables[octave, :-1]))
+        highest = np.nonzero(spectrum > 1e-3 * spectrum.max())[0].max()
+        top_frequency = bank.base_frequency * 2 ** (octave + 1)
+        assert highest == 1 or highest * top_frequency <= 44100 / 2
+
+
+def test_wavetable_render_matches_sine():
+    """
+    Test that rendering the sine table matches np.sin within interpolation error.
+    """
+    bank = WavetableBank(sample_rate=44100)
+    phases = np.linspace(0, 3, 1000)
+    out = np.empty_like(phases)
+    bank.render(bank.get_tables("sine"), phases, 440, out)
+    assert np.allclose(out, np.sin(2 * np.pi * phases), atol=1e-4)
+
+
+def test_user_waveform_from_samples():
+    """
+    Test that a user-supplied single cycle is reproduced in the lowest octave.
+    """
+    bank = WavetableBank(sample_rate=44100, table_size=256)
+    cycle = np.sin(2 * np.pi * np.arange(256) / 256) + 0.5 * np.cos(2 * np.pi * 3 * np.arange(256) / 256)
+    bank.add_waveform("custom", samples=cycle)
+    table = bank.get_tables("custom")[0, :-1]
+    assert np.allclose(table, cycle / np.max(np.abs(cycle)), atol=1e-6)
+    assert "custom" in bank.names
+
+
+def test_wavetable_cache_is_bounded():
+    """
+    Test that the cache evicts tables beyond its memory budget.
+    """
+    bank = WavetableBank(sample_rate=44100, max_cache_bytes=1)
+    bank.get_tables("square")
+    assert len(bank._cache) == 1
+    assert bank.get_tables("saw").shape == (bank.octave_count, bank.table_size + 1)
@@ -1,30 +1,37 @@
 import tkinter as tk
 import math
 
+GRADUATIONS = range(-50, 51, 10)
+
 class TunerCanvas(tk.Canvas):
     def __init__(self, master=None, **kwargs):
         super().__init__(master, **kwargs)
+        # The dial is built once per canvas size, then only reconfigured
+        self._dial_size = None
+        self._cursor_coords = {}
+        self._circle = None
+        self._note_text = None
+        self._cursor = None
+        self._last_reading = None
+        self._last_color = None
 
-    def draw_tuner(self, note: str, cents_diff: int):
+    def build_dial(self, width: int, height: int):
         self.delete("all")  # Clear the canvas
 
-        width = self.winfo_width()
-        height = self.winfo_height()
         center_x, center_y = width // 2, height // 2
-
         circle_radius = min(width, height) // 4
-        circle_color = self.calculate_color(cents_diff)
 
         # Draw the circle
-        self.create_oval(center_x - circle_radius, center_y - circle_radius,
-                         center_x + circle_radius, center_y + circle_radius,
-                         fill=circle_color, outline="")
+        self._circle = self.create_oval(center_x - circle_radius, center_y - circle_radius,
+                                        center_x + circle_radius, center_y + circle_radius,
+                                        fill="", outline="")
 
         # Draw the note text
-        self.create_text(center_x, center_y, text=note, font=("Helvetica", circle_radius // 2, "bold"))
+        self._note_text = self.create_text(center_x, center_y, text="", font=("Helvetica", circle_radius // 2, "bold"))
 
-        # Draw the graduations and the cursor
-        for i in range(-50, 51, 10):
+        # Draw the graduations and compute the cursor position for each of them
+        self._cursor_coords = {}
+        for i in GRADUATIONS:
             angle = math.radians(180 - (i * 180 / 50))
             line_length = circle_radius // 4 if i % 25 == 0 else circle_radius // 8
             start_x = center_x + (circle_radius + 5) * math.cos(angle)
@@ -33,11 +40,40 @@ class TunerCanvas(tk.Canvas):
             end_y = center_y - (circle_radius + line_length + 5) * math.sin(angle)
             self.create_line(start_x, start_y, end_x, end_y, width=2)
 
-            # Draw the cursor
-            if i == cents_diff:
-                cursor_end_x = center_x + (circle_radius - 5) * math.cos(angle)
-                cursor_end_y = center_y - (circle_radius - 5) * math.sin(angle)
-                self.create_line(start_x, start_y, cursor_end_x, cursor_end_y, width=4, fill="black")
+            cursor_end_x = center_x + (circle_radius - 5) * math.cos(angle)
+            cursor_end_y = center_y - (circle_radius - 5) * math.sin(angle)
+            self._cursor_coords[i] = (start_x, start_y, cursor_end_x, cursor_end_y)
+
+        # The cursor is hidden until the cents difference matches a graduation
+        self._cursor = self.create_line(0, 0, 0, 0, width=4, fill="black", state=tk.HIDDEN)
+
+        self._dial_size = (width, height)
+        self._last_reading = None
+        self._last_color = None
+
+    def draw_tuner(self, note: str, cents_diff: int):
+        width = self.winfo_width()
+        height = self.winfo_height()
+        if (width, height) != self._dial_size:
+            self.build_dial(width, height)
+
+        if (note, cents_diff) == self._last_reading:
+            return  # Nothing changed
+        self._last_reading = (note, cents_diff)
+
+        circle_color = self.calculate_color(cents_diff)
+        if circle_color != self._last_color:
+            self.itemconfigure(self._circle, fill=circle_color)
+            self._last_color = circle_color
+        self.itemconfigure(self._note_text, text=note)
+
+        # Draw the cursor
+        cursor_coords = self._cursor_coords.get(cents_diff)
+        if cursor_coords is not None:
+            self.coords(self._cursor, *cursor_coords)
+            self.itemconfigure(self._cursor, state=tk.NORMAL)
+        else:
+            self.itemconfigure(self._cursor, state=tk.HIDDEN)
 
     def calculate_color(self, cents_diff: int) -> str:
         if abs(cents_diff) <= 5:
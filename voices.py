@@ -0,0 +1,257 @@
+import itertools
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from oscillator import StreamingOscillator, AMPLITUDE
+from smoothing import ParameterRamp
+
+MAX_VOICES = 8
+MATCH_DISTANCE = 20.0
+RELEASE_FRAMES = 5
+
+
+class Voice:
+    """A voice played by one tracked hand."""
+
+    def __init__(self, voice_id: int, slot: int, x: float, y: float) -> None:
+        """
+        Initialize a voice.
+
+        :param voice_id: The stable ID of the voice.
+        :param slot: The index of the oscillator slot playing the voice.
+        :param x: The x-coordinate of the hand as a percentage.
+        :param y: The y-coordinate of the hand as a percentage.
+        """
+        self.voice_id = voice_id
+        self.slot = slot
+        self.x = x
+        self.y = y
+        self.missing_frames = 0
+
+
+class VoiceAllocator:
+    """
+    Assign detected hands to voices with stable IDs.
+
+    Hands are matched to the voices of the previous frame by nearest position, so a
+    voice keeps its ID (and its oscillator slot) while the hand moves. A voice whose
+    hand disappears is held for a few frames before it is released. When more hands
+    than max_voices are detected, the held voice that has been missing the longest,
+    or else the oldest held one, is stolen; without a held voice, the extra hands
+    stay silent.
+    """
+
+    def __init__(
+            self,
+            max_voices: int = MAX_VOICES,
+            match_distance: float = MATCH_DISTANCE,
+            release_frames: int = RELEASE_FRAMES
+        ) -> None:
+        """
+        Initialize the voice allocator.
+
+        :param max_voices: The maximum number of simultaneous voices. (default: 8)
+        :param match_distance: The maximum distance, in percent of the frame, between a hand
+                               and the voice it continues. (default: 20)
+        :param release_frames: The number of frames a voice is held without its hand. (default: 5)
+        """
+        self.max_voices = max_voices
+        self.match_distance = match_distance
+        self.release_frames = release_frames
+        self.voices: List[Voice] = []
+        self._ids = itertools.count()
+
+    def update(self, positions: Sequence[Tuple[float, float]]) -> List[Voice]:
+        """
+        Match the hand positions of a frame to voices.
+
+        :param positions: The (x, y) percentages of every detected hand.
+        :return: The active voices, including the held ones.
+        """
+        matched_voices = set()
+        matched_positions = set()
+
+        if self.voices and positions:
+            voice_xy = np.array([(voice.x, voice.y) for voice in self.voices])
+            hand_xy = np.asarray(positions, dtype=np.float64)
+            distances = np.linalg.norm(voice_xy[:, np.newaxis, :] - hand_xy[np.newaxis, :, :], axis=2)
+            # Greedy matching, closest pairs first
+            for flat_index in np.argsort(distances, axis=None):
+                voice_index, hand_index = np.unravel_index(flat_index, distances.shape)
+                if distances[voice_index, hand_index] > self.match_distance:
+                    break
+                if voice_index in matched_voices or hand_index in matched_positions:
+                    continue
+                voice = self.voices[voice_index]
+                voice.x, voice.y = positions[hand_index]
+                voice.missing_frames = 0
+                matched_voices.add(voice_index)
+                matched_positions.add(hand_index)
+
+        for voice_index, voice in enumerate(self.voices):
+            if voice_index not in matched_voices:
+                voice.missing_frames += 1
+        self.voices = [voice for voice in self.voices if voice.missing_frames <= self.release_frames]
+
+        for hand_index, (x, y) in enumerate(positions):
+            if hand_index not in matched_positions:
+                self._start_voice(x, y)
+
+        return self.voices
+
+    def _start_voice(self, x: float, y: float) -> None:
+        """
+        Start a voice for a new hand, stealing a held one if all slots are taken.
+
+        Voices playing a hand of the current frame are never stolen: when every slot
+        plays one, the new hand gets no voice rather than taking one back and forth
+        with another hand on every frame.
+
+        :param x: The x-coordinate of the hand as a percentage.
+        :param y: The y-coordinate of the hand as a percentage.
+        """
+        used_slots = {voice.slot for voice in self.voices}
+        if len(used_slots) >= self.max_voices:
+            held = [voice for voice in self.voices if voice.missing_frames > 0]
+            if not held:
+                return
+            # Steal the voice missing the longest, then the oldest (lowest ID)
+            stolen = max(held, key=lambda voice: (voice.missing_frames, -voice.voice_id))
+            self.voices.remove(stolen)
+            slot = stolen.slot
+        else:
+            slot = min(set(range(self.max_voices)) - used_slots)
+        self.voices.append(Voice(next(self._ids), slot, x, y))
+
+
+class PolyphonicOscillator(StreamingOscillator):
+    """
+    A streaming oscillator playing several voices mixed into one stream.
+
+    Every voice has a slot with its own phase, frequency ramp and volume ramp. All
+    slots are rendered together in one batch per block (ramps, phase accumulation,
+    wavetable lookup and mix), so the cost per block is fixed by max_voices whatever
+    the number of hands in frame.
+    """
+
+    def __init__(self, max_voices: int = MAX_VOICES, **kwargs) -> None:
+        """
+        Initialize the polyphonic oscillator.
+
+        :param max_voices: The number of voice slots. (default: 8)
+        :param kwargs: The StreamingOscillator arguments.
+        """
+        super().__init__(**kwargs)
+        self.max_voices = max_voices
+        glide_time = self.frequency_ramp.time_constant
+        self.voice_frequency_ramp = ParameterRamp(glide_time, sample_rate=self.sample_rate, value=np.zeros(max_voices))
+        self.voice_volume_ramp = ParameterRamp(glide_time, sample_rate=self.sample_rate, value=np.zeros(max_voices))
+        self.voice_phases = np.zeros(max_voices)
+        self.active = np.zeros(max_voices, dtype=bool)
+        # The ID of the voice each slot plays, -1 when not given
+        self.slot_voice_ids = np.full(max_voices, -1)
+
+        shape = (max_voices, self.block_size)
+        self._voice_increments = np.empty(shape)
+        self._voice_phases = np.empty(shape)
+        self._voice_gains = np.empty(shape)
+        self._voice_samples = np.empty(shape)
+        self._start_frequencies = np.empty(max_voices)
+
+    @property
+    def frequency(self) -> float:
+        """The frequency of the lowest active slot, in Hz."""
+        slots = np.flatnonzero(self.active)
+        return float(self.voice_frequency_ramp.value[slots[0]]) if slots.size else 0.0
+
+    @property
+    def volume(self) -> float:
+        """The volume of the lowest active slot (0 to 100)."""
+        slots = np.flatnonzero(self.active)
+        return float(self.voice_volume_ramp.value[slots[0]]) if slots.size else 0.0
+
+    def set_target(self, frequency: Optional[float], volume: Optional[float]) -> None:
+        """
+        Drive slot 0 only, so the oscillator can stand in for a monophonic one.
+
+        :param frequency: The target frequency in Hz, or None to release the voice.
+        :param volume: The target volume (0 to 100), or None to keep the current one.
+        """
+        if frequency is None:
+            self.set_voices({})
+            return
+        if volume is None:
+            volume = self.voice_volume_ramp.target[0]
+        self.set_voices({0: (frequency, volume)})
+
+    def set_voices(
+            self,
+            voices: Dict[int, Tuple[float, float]],
+            voice_ids: Optional[Dict[int, int]] = None
+        ) -> None:
+        """
+        Set the frequency and volume targets of the playing slots.
+
+        Slots that are not given fade out and become inactive. A slot starting a
+        voice, either inactive or now playing another voice ID than before (such as
+        a stolen held voice), starts on its pitch instead of gliding from the old one.
+
+        :param voices: The (frequency, volume) targets keyed by slot index.
+        :param voice_ids: The ID of the voice played by each slot, such as Voice.voice_id. (default: None)
+        """
+        frequency_targets = self.voice_frequency_ramp.target
+        volume_targets = self.voice_volume_ramp.target
+        volume_targets[~np.isin(np.arange(self.max_voices), list(voices))] = 0
+        for slot, (frequency, volume) in voices.items():
+            voice_id = voice_ids.get(slot, -1) if voice_ids is not None else -1
+            if not self.active[slot] or voice_id != self.slot_voice_ids[slot]:
+                # A new voice starts on its pitch instead of sliding from the previous one
+                self.voice_frequency_ramp.value[slot] = frequency
+                self.active[slot] = True
+                self.slot_voice_ids[slot] = voice_id
+            frequency_targets[slot] = frequency
+            volume_targets[slot] = volume
+
+    def set_smoothing(self, smoothing_factor: float, change_limit: float) -> None:
+        """
+        Map the GUI smoothing factor and change limit onto the voice ramps.
+
+        :param smoothing_factor: The per-frame smoothing factor (0 to 1).
+        :param change_limit: The maximum change per frame.
+        """
+        super().set_smoothing(smoothing_factor, change_limit)
+        self.voice_frequency_ramp.configure_from_frame_parameters(smoothing_factor, change_limit)
+        self.voice_volume_ramp.configure_from_frame_parameters(smoothing_factor, change_limit)
+
+    def render_block(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Render the next block of all voices mixed together.
+
+        :param out: An optional float array of block_size samples to render into.
+        :return: The rendered block, scaled to the int16 range.
+        """
+        if out is None:
+            out = self._block
+
+        self.voice_frequency_ramp.sample_rate = self.voice_volume_ramp.sample_rate = self.sample_rate
+        self._start_frequencies[:] = self.voice_frequency_ramp.value
+        self.voice_frequency_ramp.render(self._voice_increments)
+        self.voice_volume_ramp.render(self._voice_gains)
+
+        self._voice_increments /= self.sample_rate
+        np.cumsum(self._voice_increments, axis=1, out=self._voice_phases)
+        next_phases = self.voice_phases + self._voice_phases[:, -1]
+        self._voice_phases -= self._voice_increments
+        self._voice_phases += self.voice_phases[:, np.newaxis]
+        np.mod(next_phases, 1.0, out=self.voice_phases)
+
+        top_frequencies = np.maximum(self._start_frequencies, self.voice_frequency_ramp.value)
+        self.wavetables.render_batch(self._tables, self._voice_phases, top_frequencies, self._voice_samples)
+
+        self._voice_gains *= AMPLITUDE / 100
+        self._voice_samples *= self._voice_gains
+        np.sum(self._voice_samples, axis=0, out=out)
+        np.clip(out, -32767, 32767, out=out)
+
+        # Slots that faded out are free again
+        self.active &= (self.voice_volume_ramp.value > 1e-3) | (self.voice_volume_ramp.target > 0)
+        return out
@@ -0,0 +1,273 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+TABLE_SIZE = 2048
+BASE_FREQUENCY = 20.0
+MAX_CACHE_BYTES = 4 * 1024 * 1024
+
+
+def sine_harmonics(count: int) -> np.ndarray:
+    """
+    Harmonic amplitudes of a sine wave.
+
+    :param count: The number of harmonics to return.
+    :return: The amplitudes of harmonics 1 to count.
+    """
+    harmonics = np.zeros(count)
+    harmonics[0] = 1
+    return harmonics
+
+def saw_harmonics(count: int) -> np.ndarray:
+    """
+    Harmonic amplitudes of a sawtooth wave.
+
+    :param count: The number of harmonics to return.
+    :return: The amplitudes of harmonics 1 to count.
+    """
+    n = np.arange(1, count + 1)
+    return ((-1.0) ** (n + 1)) / n
+
+def square_harmonics(count: int) -> np.ndarray:
+    """
+    Harmonic amplitudes of a square wave.
+
+    :param count: The number of harmonics to return.
+    :return: The amplitudes of harmonics 1 to count.
+    """
+    n = np.arange(1, count + 1)
+    return np.where(n % 2 == 1, 1.0 / n, 0.0)
+
+def triangle_harmonics(count: int) -> np.ndarray:
+    """
+    Harmonic amplitudes of a triangle wave.
+
+    :param count: The number of harmonics to return.
+    :return: The amplitudes of harmonics 1 to count.
+    """
+    n = np.arange(1, count + 1)
+    signs = (-1.0) ** ((n - 1) // 2)
+    return np.where(n % 2 == 1, signs / n ** 2, 0.0)
+
+WAVEFORMS = {
+    "sine": sine_harmonics,
+    "saw": saw_harmonics,
+    "square": square_harmonics,
+    "triangle": triangle_harmonics,
+}
+
+
+class WavetableBank:
+    """
+    A bank of band-limited wavetables, one table per octave and per waveform.
+
+    Every waveform is stored as a harmonic spectrum. For each octave the spectrum is
+    truncated to the harmonics that stay below Nyquist at the top of the octave and
+    turned into a single-cycle table, so playback never aliases. Tables are built
+    once, kept in a cache bounded by max_cache_bytes, and rendered by linear
+    interpolation with NumPy indexing instead of evaluating sin() for every sample.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int,
+            table_size: int = TABLE_SIZE,
+            base_frequency: float = BASE_FREQUENCY,
+            max_cache_bytes: int = MAX_CACHE_BYTES
+        ) -> None:
+        """
+        Initialize the bank and build the tables of the built-in waveforms.
+
+        :param sample_rate: The sample rate the tables are band-limited for.
+        :param table_size: The number of samples in one cycle. (default: 2048)
+        :param base_frequency: The lowest frequency of the first octave in Hz. (default: 20)
+        :param max_cache_bytes: The memory budget of the table cache. (default: 4 MiB)
+        """
+        self.sample_rate = sample_rate
+        self.table_size = table_size
+        self.base_frequency = base_frequency
+        self.max_cache_bytes = max_cache_bytes
+        nyquist = sample_rate / 2
+        self.octave_count = max(1, int(np.ceil(np.log2(nyquist / base_frequency))))
+
+        self._spectra: Dict[str, np.ndarray] = {}
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._scratch: Dict[tuple, tuple] = {}
+
+        max_harmonics = table_size // 2 - 1
+        for name, harmonics in WAVEFORMS.items():
+            self._spectra[name] = harmonics(max_harmonics).astype(np.complex128)
+            self.get_tables(name)
+
+    @property
+    def names(self) -> Sequence[str]:
+        """The names of all waveforms known to the bank."""
+        return list(self._spectra)
+
+    def add_waveform(
+            self,
+            name: str,
+            harmonics: Optional[Sequence[float]] = None,
+            samples: Optional[Sequence[float]] = None
+        ) -> None:
+        """
+        Register a user-supplied waveform.
+
+        :param name: The name of the waveform.
+        :param harmonics: Amplitudes of harmonics 1, 2, 3... of the waveform.
+        :param samples: A single cycle of the waveform, used when harmonics is not given.
+        """
+        max_harmonics = self.table_size // 2 - 1
+        if harmonics is not None:
+            spectrum = np.zeros(max_harmonics, dtype=np.complex128)
+            harmonics = np.asarray(harmonics, dtype=np.float64)[:max_harmonics]
+            spectrum[:harmonics.size] = harmonics
+        elif samples is not None:
+            samples = np.asarray(samples, dtype=np.float64)
+            # Express the cycle as sine amplitudes, the convention used by the built-in spectra
+            coefficients = np.fft.rfft(samples - samples.mean()) * (2 / samples.size)
+            spectrum = np.zeros(max_harmonics, dtype=np.complex128)
+            count = min(max_harmonics, coefficients.size - 1)
+            spectrum[:count] = coefficients[1:count + 1] * 1j
+        else:
+            raise ValueError("add_waveform needs either harmonics or samples")
+
+        with self._lock:
+            self._spectra[name] = spectrum
+            self._evict(name)
+        self.get_tables(name)
+
+    def get_tables(self, name: str) -> np.ndarray:
+        """
+        Return the per-octave tables of a waveform, building them if needed.
+
+        :param name: The name of the waveform.
+        :return: An array of shape (octave_count, table_size + 1), the last column
+                 repeating the first sample for interpolation.
+        """
+        with self._lock:
+            tables = self._cache.get(name)
+            if tables is not None:
+                self._cache.move_to_end(name)
+                return tables
+
+        if name not in self._spectra:
+            raise KeyError(f"Unknown waveform: {name}")
+        tables = self._build_tables(self._spectra[name])
+
+        with self._lock:
+            self._evict(name)
+            self._cache[name] = tables
+            self._cache_bytes += tables.nbytes
+            while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.nbytes
+        return tables
+
+    def _evict(self, name: str) -> None:
+        """
+        Drop a waveform from the cache. The caller must hold the lock.
+
+        :param name: The name of the waveform.
+        """
+        tables = self._cache.pop(name, None)
+        if tables is not None:
+            self._cache_bytes -= tables.nbytes
+
+    def _build_tables(self, spectrum: np.ndarray) -> np.ndarray:
+        """
+        Build the band-limited tables of a spectrum, one per octave.
+
+        :param spectrum: The complex sine amplitudes of harmonics 1, 2, 3...
+        :return: The tables, normalized so the richest one peaks at 1.
+        """
+        nyquist = self.sample_rate / 2
+        tables = np.empty((self.octave_count, self.table_size + 1), dtype=np.float32)
+        bins = np.zeros(self.table_size // 2 + 1, dtype=np.complex128)
+        for octave in range(self.octave_count):
+            top_frequency = self.base_frequency * 2 ** (octave + 1)
+            count = int(min(spectrum.size, max(1, nyquist // top_frequency)))
+            bins[:] = 0
+            # A sine amplitude a on harmonic n is the rfft bin -1j * a * N / 2
+            bins[1:count + 1] = -1j * spectrum[:count] * (self.table_size / 2)
+            tables[octave, :-1] = np.fft.irfft(bins, self.table_size)
+        tables[:, -1] = tables[:, 0]
+        peak = np.max(np.abs(tables[0]))
+        if peak > 0:
+            tables /= peak
+        return tables
+
+    def octave_for(self, frequency: float) -> int:
+        """
+        Return the index of the table to use for a frequency.
+
+        :param frequency: The highest frequency played in the block, in Hz.
+        :return: The octave index.
+        """
+        if frequency <= self.base_frequency:
+            return 0
+        octave = int(np.log2(frequency / self.base_frequency))
+        return min(octave, self.octave_count - 1)
+
+    def render(self, tables: np.ndarray, phases: np.ndarray, frequency: float, out: np.ndarray) -> np.ndarray:
+        """
+        Render samples by interpolated lookup.
+
+        :param tables: The tables returned by get_tables.
+        :param phases: The phase of each sample in cycles.
+        :param frequency: The highest frequency played in the block, in Hz.
+        :param out: The float array to render into, the same length as phases.
+        :return: The rendered samples.
+        """
+        offset = self.octave_for(frequency) * (self.table_size + 1)
+        return self._interpolate(tables.ravel(), phases, offset, out)
+
+    def render_batch(self, tables: np.ndarray, phases: np.ndarray, frequencies: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Render several voices at once by interpolated lookup, each from its own octave.
+
+        :param tables: The tables returned by get_tables.
+        :param phases: The phase of each sample in cycles, one row per voice.
+        :param frequencies: The highest frequency played by each voice in the block, in Hz.
+        :param out: The float array to render into, the same shape as phases.
+        :return: The rendered samples.
+        """
+        ratios = np.maximum(frequencies, self.base_frequency) / self.base_frequency
+        octaves = np.minimum(np.log2(ratios).astype(np.intp), self.octave_count - 1)
+        offsets = (octaves * (self.table_size + 1))[:, np.newaxis]
+        return self._interpolate(tables.ravel(), phases, offsets, out)
+
+    def _interpolate(self, flat_tables: np.ndarray, phases: np.ndarray, offset, out: np.ndarray) -> np.ndarray:
+        """
+        Linearly interpolate the flattened tables at the given phases.
+
+        :param flat_tables: The tables flattened to one dimension.
+        :param phases: The phase of each sample in cycles.
+        :param offset: The start of the table to read in flat_tables, a scalar or an
+                       array broadcasting against phases.
+        :param out: The float array to render into, the same shape as phases.
+        :return: The rendered samples.
+        """
+        scratch = self._scratch.get(phases.shape)
+        if scratch is None:
+            scratch = (np.empty(phases.shape, dtype=np.float64), np.empty(phases.shape, dtype=np.intp), np.empty(phases.shape, dtype=np.float32))
+            self._scratch[phases.shape] = scratch
+        position, index, upper = scratch
+
+        np.mod(phases, 1.0, out=position)
+        position *= self.table_size
+        index[...] = position
+        np.minimum(index, self.table_size - 1, out=index)
+        position -= index
+        index += offset
+        np.take(flat_tables, index, out=upper)
+        out[...] = upper
+        index += 1
+        np.take(flat_tables, index, out=upper)
+        upper -= out
+        upper *= position
+        out += upper
+        return out